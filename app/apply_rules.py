@@ -2,8 +2,9 @@
 from __future__ import annotations
 import time, argparse
 from typing import List
-from app.db import init_db, list_rules, list_quakes_since, add_alert
+from app.db import init_db, list_rules, list_quakes_since, alert_snapshot
 from app.rules import Rule, quake_matches_rule
+from app.writer import writer
 
 def main():
     ap = argparse.ArgumentParser(description="Apply rules to stored quakes")
@@ -22,16 +23,13 @@ def main():
     quakes = list_quakes_since(since_ms)
     print(f"Scanning {len(quakes)} quakes across {len(rules)} rules (since {args.hours}h)...")
 
-    total_matches = 0
-    for q in quakes:
-        for r in rules:
-            if quake_matches_rule(q, r):
-                inserted = add_alert(q["id"], r.id, int(time.time() * 1000))
-                if inserted:
-                    total_matches += 1
-                    print(f"[ALERT] Rule#{r.id}({r.name}) matched {q['id']}  M{q['mag']}  {q['place']}")
+    now_ms = int(time.time() * 1000)
+    candidates = [alert_snapshot(q, r, now_ms) for q in quakes for r in rules if quake_matches_rule(q, r)]
+    inserted = writer.submit_alerts(candidates).result()
+    for a in inserted:
+        print(f"[ALERT] Rule#{a['rule_id']}({a['rule_name']}) matched {a['quake_id']}  M{a['mag']}  {a['place']}")
 
-    print(f"Done. New alerts inserted: {total_matches}")
+    print(f"Done. New alerts inserted: {len(inserted)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,259 @@
+# app/bulk_load.py
+"""
+Seed the database from historical catalog exports on disk.
+
+    python -m app.bulk_load exports/*.csv --workers 4
+    python -m app.bulk_load exports/ --checkpoint seed.ckpt.json
+
+Accepts USGS CSV (ComCat search or summary feed format) and GeoJSON
+FeatureCollections, plain files or directories of them. CSV files are cut
+into byte ranges on line boundaries and parsed into QuakeBatches by a
+process pool; a GeoJSON file is one unit (ComCat caps those at 20k events
+per export anyway). Parsed units are written in order, several per
+transaction, with idx_quakes_time/idx_quakes_mag dropped during the load
+and rebuilt at the end.
+
+After every commit the per-file offsets reached are saved to a checkpoint
+file; rerunning the same command after an interruption skips what was
+committed. Quake ids are the primary key, so redoing part of a file is
+harmless. Into an empty database rows are only inserted (the first copy
+of an id wins); otherwise an id already stored is revised when the
+export's `updated` time is newer. The checkpoint is removed once the load
+finishes. An abandoned load leaves the two indexes missing until the next
+init_db() (any app start) recreates them.
+
+In sharded mode, months that are already frozen are read-only: their rows
+are counted as skipped_frozen rather than loaded.
+"""
+from __future__ import annotations
+import argparse, csv, io, json, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app import db, shards
+from app.usgs import QuakeBatch, csv_column_index, iter_geojson_features
+
+CHUNK_BYTES = 8 * 1024 * 1024
+TXN_ROWS = 100_000
+CSV_SUFFIXES = (".csv",)
+GEOJSON_SUFFIXES = (".geojson", ".json")
+
+# (path, kind, start, end, header); header is the CSV header row, None for GeoJSON
+Unit = Tuple[str, str, int, int, Optional[Tuple[str, ...]]]
+
+# ---------- planning ----------
+def find_files(paths: Sequence[str]) -> List[Path]:
+    out: List[Path] = []
+    for p in map(Path, paths):
+        candidates = sorted(p.iterdir()) if p.is_dir() else [p]
+        out.extend(c.resolve() for c in candidates if c.suffix.lower() in CSV_SUFFIXES + GEOJSON_SUFFIXES)
+    return out
+
+def plan_units(path: Path, start_at: int = 0, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Unit]:
+    """Cut one file into parse units starting at byte `start_at`."""
+    size = path.stat().st_size
+    if path.suffix.lower() not in CSV_SUFFIXES:
+        if start_at < size:
+            yield (str(path), "geojson", 0, size, None)
+        return
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header = tuple(next(csv.reader([header_line.decode("utf-8-sig")])))
+        pos = max(start_at, f.tell())
+        # exports never quote newlines, so every line is one record
+        while pos < size:
+            f.seek(min(size, pos + chunk_bytes))
+            f.readline()
+            end = min(size, f.tell())
+            yield (str(path), "csv", pos, end, header)
+            pos = end
+
+def parse_unit(unit: Unit) -> QuakeBatch:
+    """Runs in a pool worker: read one unit from disk and parse it into columns."""
+    path, kind, start, end, header = unit
+    if kind == "geojson":
+        with open(path, "rb") as f:
+            return QuakeBatch.from_features(iter_geojson_features(iter(lambda: f.read(1 << 20), b"")))
+    idx = csv_column_index(header)
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    batch = QuakeBatch()
+    for row in csv.reader(io.StringIO(text)):
+        if row:
+            batch.add_csv_row(row, idx)
+    return batch
+
+# ---------- checkpoint ----------
+def _file_key(path: Path) -> Dict:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def read_checkpoint(path: Path) -> Dict:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {"files": {}, "rows": 0, "inserted": 0, "dropped": 0, "skipped_frozen": 0}
+
+def write_checkpoint(path: Path, ckpt: Dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(ckpt, indent=1))
+    os.replace(tmp, path)
+
+# ---------- indexes ----------
+def drop_quake_indexes(conn) -> None:
+    for name in db.QUAKE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+def rebuild_quake_indexes(conn) -> None:
+    for ddl in db.QUAKE_INDEXES.values():
+        conn.execute(ddl)
+
+# ---------- load ----------
+def _write(conn, batches: List[QuakeBatch], revise: bool = True) -> Tuple[int, int]:
+    """(rows inserted, rows skipped because their shard month is frozen)."""
+    stats: Dict[str, float] = {}
+    if shards.enabled():
+        # month shards have to be attached outside a transaction
+        inserted = 0
+        for batch in batches:
+            for part in db.split_quake_write(batch):
+                db.prepare_quake_write(conn, part)
+                conn.execute("BEGIN IMMEDIATE")
+                inserted += db.write_quakes(conn, part, stats, revise=revise)
+                conn.execute("COMMIT")
+        return inserted, int(stats.get("skipped_frozen", 0))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        inserted = sum(db.write_quakes(conn, b, revise=revise) for b in batches)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return inserted, 0
+
+def bulk_load(paths: Sequence[str], checkpoint: Path, workers: int = os.cpu_count() or 1,
+              chunk_bytes: int = CHUNK_BYTES, txn_rows: int = TXN_ROWS, defer_indexes: bool = True,
+              progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Load `paths` into the current app.db database. `workers=0` parses in
+    this process. `progress(stats)` is called after every commit.
+    """
+    defer = defer_indexes and not shards.enabled()
+    # creating the indexes here would rebuild them over a half-loaded table on every resume
+    db.init_db(indexes=not defer)
+    ckpt = read_checkpoint(checkpoint)
+    # loading into an empty database there is nothing to revise, including after a resume
+    ckpt.setdefault("empty_at_start", not ckpt["files"] and db.quakes_empty())
+    files = find_files(paths)
+    units: List[Unit] = []
+    for path in files:
+        done = ckpt["files"].get(str(path))
+        if done is not None and {k: done.get(k) for k in ("size", "mtime_ns")} != _file_key(path):
+            done = None  # file changed since the checkpoint; start it over
+        units.extend(plan_units(path, done["offset"] if done else 0, chunk_bytes))
+
+    stats = {"files": len(files), "units": len(units), "rows": ckpt["rows"], "inserted": ckpt["inserted"],
+             "dropped": ckpt["dropped"], "skipped_frozen": ckpt.get("skipped_frozen", 0), "seconds": 0.0, "rows_per_s": 0.0, "index_rebuild_s": 0.0}
+    conn = db.get_conn()
+    conn.isolation_level = None
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB; mostly for the index rebuild
+    if defer:
+        drop_quake_indexes(conn)
+    started = time.perf_counter()
+    loaded_now = 0
+
+    def commit(group: List[Tuple[Unit, QuakeBatch]]) -> None:
+        nonlocal loaded_now
+        inserted, skipped = _write(conn, [b for _, b in group], revise=not ckpt["empty_at_start"])
+        for (path, _kind, _start, end, _h), batch in group:
+            entry = ckpt["files"].setdefault(path, {})
+            entry.update(_file_key(Path(path)), offset=end)
+            ckpt["rows"] += len(batch)
+            ckpt["dropped"] += batch.dropped
+            loaded_now += len(batch)
+        # rows for frozen shard months were read but not loaded
+        ckpt["rows"] -= skipped
+        ckpt["skipped_frozen"] = ckpt.get("skipped_frozen", 0) + skipped
+        ckpt["inserted"] += inserted
+        write_checkpoint(checkpoint, ckpt)
+        elapsed = time.perf_counter() - started
+        stats.update(rows=ckpt["rows"], inserted=ckpt["inserted"], dropped=ckpt["dropped"],
+                     skipped_frozen=ckpt["skipped_frozen"],
+                     seconds=round(elapsed, 3), rows_per_s=round(loaded_now / elapsed, 1) if elapsed else 0.0)
+        if progress:
+            progress(stats)
+
+    pool = ProcessPoolExecutor(workers) if workers > 0 else None
+    try:
+        if pool is None:
+            parsed: Iterator[Tuple[Unit, QuakeBatch]] = ((u, parse_unit(u)) for u in units)
+        else:
+            parsed = _ordered(pool, units, 2 * workers)
+        group: List[Tuple[Unit, QuakeBatch]] = []
+        rows = 0
+        for unit, batch in parsed:
+            group.append((unit, batch))
+            rows += len(batch)
+            if rows >= txn_rows:
+                commit(group)
+                group, rows = [], 0
+        if group:
+            commit(group)
+    except BaseException:
+        conn.close()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    if defer:
+        t0 = time.perf_counter()
+        rebuild_quake_indexes(conn)
+        stats["index_rebuild_s"] = round(time.perf_counter() - t0, 3)
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    elapsed = time.perf_counter() - started
+    stats.update(seconds=round(elapsed, 3), rows_per_s=round(loaded_now / elapsed, 1) if elapsed else 0.0)
+    checkpoint.unlink(missing_ok=True)
+    return stats
+
+def _ordered(pool: ProcessPoolExecutor, units: List[Unit], in_flight: int) -> Iterator[Tuple[Unit, QuakeBatch]]:
+    """Parse units in the pool, at most `in_flight` ahead, yielding in input order."""
+    pending: deque = deque()
+    it = iter(units)
+    for unit in it:
+        pending.append((unit, pool.submit(parse_unit, unit)))
+        if len(pending) >= in_flight:
+            break
+    while pending:
+        unit, fut = pending.popleft()
+        nxt = next(it, None)
+        if nxt is not None:
+            pending.append((nxt, pool.submit(parse_unit, nxt)))
+        yield unit, fut.result()
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk-load historical quakes from CSV/GeoJSON exports")
+    ap.add_argument("paths", nargs="+", help="Export files or directories of them")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes (0 = inline)")
+    ap.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / 2**20, help="CSV bytes per parse unit")
+    ap.add_argument("--txn-rows", type=int, default=TXN_ROWS, help="Rows per transaction")
+    ap.add_argument("--checkpoint", type=str, default=None, help="Checkpoint file (default: <db>.bulkload.json)")
+    ap.add_argument("--keep-indexes", action="store_true", help="Maintain indexes during the load")
+    args = ap.parse_args()
+
+    checkpoint = Path(args.checkpoint or db.DB_PATH + ".bulkload.json")
+    report = lambda s: print(f"rows {s['rows']:>10}  new {s['inserted']:>10}  {s['rows_per_s']:>10.0f} rows/s",
+                             file=sys.stderr)
+    stats = bulk_load(args.paths, checkpoint, workers=args.workers, chunk_bytes=int(args.chunk_mb * 2**20),
+                      txn_rows=args.txn_rows, defer_indexes=not args.keep_indexes, progress=report)
+    print(json.dumps(stats, indent=2))
+    if stats["skipped_frozen"]:
+        print(f"warning: {stats['skipped_frozen']} rows belong to frozen shard months and were not loaded",
+              file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,117 @@
 # app/db.py
 from __future__ import annotations
-import sqlite3
+import os, queue, sqlite3, threading, time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable, Mapping, Any, List, Dict
+from typing import Iterable, Iterator, Mapping, Any, List, Dict, Optional, Sequence
 
-DB_PATH = (Path(__file__).resolve().parent.parent / "quakes.db").as_posix()
+from app import memstats, shards
+from app.sqlstats import InstrumentedConnection
+from app.usgs import QuakeBatch
+from app.metrics import READ_POOL_WAIT, READ_POOL_IN_USE, READ_POOL_TIMEOUTS
+
+DB_PATH = os.environ.get("QUAKE_HUB_DB") or (Path(__file__).resolve().parent.parent / "quakes.db").as_posix()
+READ_POOL_SIZE = int(os.environ.get("QUAKE_HUB_READ_POOL_SIZE", "8"))
+READ_POOL_TIMEOUT_S = float(os.environ.get("QUAKE_HUB_READ_POOL_TIMEOUT_S", "10"))
 
 def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=InstrumentedConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
-def init_db() -> None:
+# ---------- read-only pool ----------
+class ReadPool:
+    """
+    Fixed-size pool of read-only connections (mode=ro, query_only).
+    With WAL, readers never block on the writer, so web reads can run in
+    parallel with ingest. Connections are opened lazily up to `size`.
+    """
+
+    def __init__(self, path: str, size: int = READ_POOL_SIZE, timeout: float = READ_POOL_TIMEOUT_S):
+        self.path = path
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=InstrumentedConnection)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            READ_POOL_TIMEOUTS.inc()
+            raise TimeoutError(f"no read connection available after {self.timeout}s")
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        t0 = time.perf_counter()
+        conn = self._acquire()
+        READ_POOL_WAIT.observe(time.perf_counter() - t0)
+        READ_POOL_IN_USE.inc()
+        try:
+            yield conn
+        finally:
+            READ_POOL_IN_USE.dec()
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+_read_pool: Optional[ReadPool] = None
+_read_pool_lock = threading.Lock()
+
+def get_read_pool() -> ReadPool:
+    global _read_pool
+    with _read_pool_lock:
+        if _read_pool is None or _read_pool.path != DB_PATH:
+            if _read_pool is not None:
+                _read_pool.close()
+            _read_pool = ReadPool(DB_PATH)
+        return _read_pool
+
+def _read_pool_size():
+    # each connection's page cache and statement cache live in SQLite's heap (sqlite.heap)
+    pool = _read_pool
+    return (pool._opened if pool is not None else 0), None
+
+memstats.register("db.read_pool", _read_pool_size)
+
+def read_conn():
+    """`with read_conn() as conn:` borrows a pooled read-only connection."""
+    return get_read_pool().connection()
+
+def init_db(indexes: bool = True) -> None:
+    """Create/migrate the schema; `indexes=False` leaves out the secondary quake indexes (bulk loads)."""
     conn = get_conn()
     cur = conn.cursor()
     cur.executescript(
         """
+        PRAGMA auto_vacuum=INCREMENTAL;  -- only takes effect on a brand-new file
         PRAGMA journal_mode=WAL;
 
         CREATE TABLE IF NOT EXISTS quakes (
@@ -44,64 +140,283 @@ def init_db() -> None:
             FOREIGN KEY(rule_id)  REFERENCES rules(id)
         );
 
-        CREATE INDEX IF NOT EXISTS idx_quakes_time ON quakes(time_ms DESC);
-        CREATE INDEX IF NOT EXISTS idx_quakes_mag  ON quakes(mag DESC);
-
         -- prevent duplicate alerts for the same (quake, rule)
         CREATE UNIQUE INDEX IF NOT EXISTS uq_alert_quake_rule ON alerts(quake_id, rule_id);
         """
     )
+    if indexes:
+        for ddl in QUAKE_INDEXES.values():
+            cur.execute(ddl)
     conn.commit()
+    _migrate(conn)
     conn.close()
 
-def upsert_quake_record(q: Mapping[str, Any]) -> None:
-    conn = get_conn()
+# ---------- migrations (tracked in PRAGMA user_version) ----------
+# alert rows carry a copy of the quake/rule fields the listings need
+ALERT_SNAPSHOT_COLS = ("quake_time_ms", "mag", "place", "lon", "lat", "depth_km", "rule_name", "min_mag", "bbox")
+BACKFILL_BATCH = 5000
+
+def _migrate_alert_snapshot(conn: sqlite3.Connection) -> None:
+    have = {r["name"] for r in conn.execute("PRAGMA table_info(alerts)")}
+    for col, typ in zip(ALERT_SNAPSHOT_COLS, ("INTEGER", "REAL", "TEXT", "REAL", "REAL", "REAL", "TEXT", "REAL", "TEXT")):
+        if col not in have:
+            conn.execute(f"ALTER TABLE alerts ADD COLUMN {col} {typ}")
+    conn.commit()
+
+    # backfill in id ranges so a large table never holds the write lock for long
+    last = 0
+    top = conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
+    while last < top:
+        conn.execute(
+            """
+            UPDATE alerts SET
+              quake_time_ms = (SELECT time_ms  FROM quakes WHERE id = alerts.quake_id),
+              mag           = (SELECT mag      FROM quakes WHERE id = alerts.quake_id),
+              place         = (SELECT place    FROM quakes WHERE id = alerts.quake_id),
+              lon           = (SELECT lon      FROM quakes WHERE id = alerts.quake_id),
+              lat           = (SELECT lat      FROM quakes WHERE id = alerts.quake_id),
+              depth_km      = (SELECT depth_km FROM quakes WHERE id = alerts.quake_id),
+              rule_name     = (SELECT name     FROM rules  WHERE id = alerts.rule_id),
+              min_mag       = (SELECT min_mag  FROM rules  WHERE id = alerts.rule_id),
+              bbox          = (SELECT bbox     FROM rules  WHERE id = alerts.rule_id)
+            WHERE id > ? AND id <= ? AND rule_name IS NULL
+            """,
+            (last, last + BACKFILL_BATCH),
+        )
+        conn.commit()
+        last += BACKFILL_BATCH
+
+    # recent-alert listings become one range scan over this index
     conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_alerts_recent
+        ON alerts(created_ms DESC, id, quake_id, rule_id, {", ".join(ALERT_SNAPSHOT_COLS)})
         """
-        INSERT OR IGNORE INTO quakes(id, time_ms, mag, place, lon, lat, depth_km)
-        VALUES (:id, :time_ms, :mag, :place, :lon, :lat, :depth_km)
-        """,
-        q,
     )
     conn.commit()
-    conn.close()
 
-def bulk_upsert_quakes(quakes: Iterable[Mapping[str, Any]]) -> int:
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.executemany(
+def _migrate_retention(conn: sqlite3.Connection) -> None:
+    # daily aggregates of quakes that app.retention has archived out of `quakes`
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quake_daily_rollup (
+            day     TEXT PRIMARY KEY,  -- 'YYYY-MM-DD' (UTC)
+            n       INTEGER NOT NULL,
+            sum_mag REAL    NOT NULL,
+            max_mag REAL    NOT NULL
+        )
         """
-        INSERT OR IGNORE INTO quakes(id, time_ms, mag, place, lon, lat, depth_km)
-        VALUES (:id, :time_ms, :mag, :place, :lon, :lat, :depth_km)
-        """,
-        list(quakes),
     )
     conn.commit()
-    count = cur.rowcount if cur.rowcount is not None else 0
+    # freed pages are only returned to the OS with auto_vacuum. On an existing
+    # file the setting only takes hold after one full VACUUM, which would block
+    # every worker at startup; `python -m app.retention --vacuum` does it once.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
+def _migrate_leases(conn: sqlite3.Connection) -> None:
+    # named leases for leader election between worker processes (app.lease)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name       TEXT PRIMARY KEY,
+            holder     TEXT    NOT NULL,
+            expires_ms INTEGER NOT NULL
+        )
+        """
+    )
+    conn.commit()
+
+def _migrate_quake_revisions(conn: sqlite3.Connection) -> None:
+    # source revision time; 0 for existing rows so any reported update wins
+    if "updated_ms" not in {r["name"] for r in conn.execute("PRAGMA table_info(quakes)")}:
+        conn.execute("ALTER TABLE quakes ADD COLUMN updated_ms INTEGER NOT NULL DEFAULT 0")
+    conn.commit()
+
+def _migrate_archived_shards(conn: sqlite3.Connection) -> None:
+    # shard months app.retention has already rolled up; their files may still be on disk
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_shards (
+            month       TEXT PRIMARY KEY,  -- 'YYYY-MM'
+            rows        INTEGER NOT NULL,
+            archived_ms INTEGER NOT NULL
+        )
+        """
+    )
+    conn.commit()
+
+MIGRATIONS = [
+    _migrate_alert_snapshot,  # 1
+    _migrate_retention,       # 2
+    _migrate_leases,          # 3
+    _migrate_quake_revisions, # 4
+    _migrate_archived_shards, # 5
+]
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in enumerate(MIGRATIONS, start=1):
+        if version < target:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+
+# a quake row is only rewritten when the feed reports a newer `updated` time
+QUAKE_INSERT_SQL = """
+    INSERT OR IGNORE INTO {table}(id, time_ms, mag, place, lon, lat, depth_km, updated_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+QUAKE_REVISE_SQL = """
+    UPDATE {table} SET time_ms = ?, mag = ?, place = ?, lon = ?, lat = ?, depth_km = ?, updated_ms = ?
+    WHERE id = ? AND updated_ms < ?
+"""
+QUAKE_COLS = "id, time_ms, mag, place, lon, lat, depth_km"
+# secondary indexes on quakes, created by init_db; bulk loads drop and rebuild them
+QUAKE_INDEXES = {
+    "idx_quakes_time": "CREATE INDEX IF NOT EXISTS idx_quakes_time ON quakes(time_ms DESC)",
+    "idx_quakes_mag":  "CREATE INDEX IF NOT EXISTS idx_quakes_mag  ON quakes(mag DESC)",
+}
+
+def upsert_quake_record(q: Mapping[str, Any]) -> None:
+    bulk_upsert_quakes([q])
+
+def bulk_upsert_quakes(quakes: Iterable[Mapping[str, Any]]) -> int:
+    conn = get_conn()
+    count = 0
+    for rows in split_quake_write(list(quakes)):
+        prepare_quake_write(conn, rows)
+        count += write_quakes(conn, rows)
+        conn.commit()
     conn.close()
     return count
 
-def list_recent_quakes(limit: int = 20) -> List[Dict]:
+def split_quake_write(quakes: Sequence[Mapping[str, Any]]) -> List[Sequence[Mapping[str, Any]]]:
+    """
+    Split a batch so each part fits in one transaction. Only sharded storage
+    ever splits: a part may touch at most MAX_ATTACHED month shards.
+    Otherwise a QuakeBatch is passed through whole.
+    """
+    if not shards.enabled():
+        return [quakes]
+    by_month: Dict[str, List[Mapping[str, Any]]] = {}
+    for q in (quakes.to_dicts() if isinstance(quakes, QuakeBatch) else quakes):
+        by_month.setdefault(shards.month_of(q["time_ms"]), []).append(q)
+    return [[q for m in group for q in by_month[m]] for group in shards.chunks(sorted(by_month))]
+
+class RetryAfterCommit(Exception):
+    """A prepare step can only proceed once the writes queued before it are committed."""
+
+def prepare_quake_write(conn: sqlite3.Connection, quakes: Iterable[Mapping[str, Any]], fresh: bool = True) -> None:
+    """
+    In sharded mode, ATTACH the month shards these rows route to. Must run
+    before the write transaction starts; a no-op for single-file storage.
+    `fresh=False` means earlier writes in the same transaction still need the
+    shards attached now, so none may be detached.
+    """
+    if shards.enabled():
+        try:
+            shards.attach_for_write(conn, {shards.month_of(q["time_ms"]) for q in quakes}, evict=fresh)
+        except shards.ShardCapacityError as exc:
+            raise RetryAfterCommit(str(exc)) from exc
+
+def quake_row(q: Mapping[str, Any]) -> tuple:
+    """A quake mapping as a QuakeBatch.rows() tuple; rows without updated_ms count as never revised."""
+    return (q["id"], q["time_ms"], q["mag"], q["place"], q["lon"], q["lat"], q["depth_km"],
+            q.get("updated_ms") or q["time_ms"])
+
+LOOKUP_CHUNK = 500  # ids per IN (...) list, under SQLite's default 999 host parameters
+
+def _stored_versions(conn: sqlite3.Connection, table: str, ids: List[str]) -> Dict[str, int]:
+    """{id: updated_ms} for the ids already in `table`."""
+    known: Dict[str, int] = {}
+    for i in range(0, len(ids), LOOKUP_CHUNK):
+        part = ids[i:i + LOOKUP_CHUNK]
+        sql = f"SELECT id, updated_ms FROM {table} WHERE id IN ({', '.join('?' * len(part))})"
+        known.update((r[0], r[1]) for r in conn.execute(sql, part))
+    return known
+
+def _write_quake_rows(conn: sqlite3.Connection, table: str, rows: List[tuple],
+                      stats: Optional[Dict[str, float]] = None, revise: bool = True) -> int:
+    # one id lookup per row decides insert vs revise; without `revise` every row is inserted or ignored
+    known = _stored_versions(conn, table, [r[0] for r in rows]) if revise else {}
+    fresh = [r for r in rows if r[0] not in known]
+    stale = [r for r in rows if r[0] in known and known[r[0]] < r[7]]
+    new = max(conn.executemany(QUAKE_INSERT_SQL.format(table=table), fresh).rowcount or 0, 0) if fresh else 0
+    revised = 0
+    if stale:
+        cur = conn.executemany(QUAKE_REVISE_SQL.format(table=table),
+                               [(t, m, p, lon, lat, d, u, i, u) for i, t, m, p, lon, lat, d, u in stale])
+        revised = max(cur.rowcount or 0, 0)
+    if stats is not None:
+        stats["new"] = stats.get("new", 0) + new
+        stats["revised"] = stats.get("revised", 0) + revised
+        new_mags = [r[2] for r in fresh]
+        if new_mags:
+            stats["max_new_mag"] = max(stats.get("max_new_mag", new_mags[0]), *new_mags)
+    return new
+
+def write_quakes(conn: sqlite3.Connection, quakes: Iterable[Mapping[str, Any]],
+                 stats: Optional[Dict[str, float]] = None, revise: bool = True) -> int:
+    """
+    Upsert on a caller-owned connection (no commit). New ids are inserted;
+    known ones are updated only if their updated_ms is newer. Returns rows
+    inserted; new/revised counts and the largest magnitude among the new
+    rows (max_new_mag) are added into `stats` when given, as are rows
+    for frozen shard months that could not be written (skipped_frozen). `revise=False`
+    skips the lookup and keeps the first copy of an id (loads into an
+    empty table).
+    """
+    rows = list(quakes.rows() if isinstance(quakes, QuakeBatch) else map(quake_row, quakes))
+    if shards.enabled():
+        return shards.write_quakes(conn, rows, lambda c, table, part: _write_quake_rows(c, table, part, stats, revise),
+                                   stats)
+    return _write_quake_rows(conn, "quakes", rows, stats, revise)
+
+def quakes_empty() -> bool:
+    """No quakes stored yet, in the main table or any shard."""
     conn = get_conn()
-    rows = conn.execute(
-        "SELECT id, time_ms, mag, place, lon, lat, depth_km FROM quakes ORDER BY time_ms DESC LIMIT ?",
-        (limit,),
-    ).fetchall()
-    conn.close()
+    try:
+        return conn.execute("SELECT 1 FROM quakes LIMIT 1").fetchone() is None and not shards.existing_months()
+    finally:
+        conn.close()
+
+def _sharded_quakes(where: str, params: tuple, months: List[str], limit: Optional[int] = None) -> List[Dict]:
+    """Run the same SELECT over each shard in `months` (newest first), newest rows first."""
+    out: List[Dict] = []
+    with read_conn() as conn:
+        for group in shards.chunks(months):
+            with shards.attached(conn, group) as names:
+                union = " UNION ALL ".join(f"SELECT {QUAKE_COLS} FROM {n}.quakes {where}" for n in names)
+                sql = f"SELECT * FROM ({union}) ORDER BY time_ms DESC" + (" LIMIT ?" if limit else "")
+                rows = conn.execute(sql, params * len(names) + ((limit - len(out),) if limit else ())).fetchall()
+            out.extend(dict(r) for r in rows)
+            if limit and len(out) >= limit:
+                break
+    return out
+
+def list_recent_quakes(limit: int = 20) -> List[Dict]:
+    if shards.enabled():
+        return _sharded_quakes("", (), shards.existing_months(), limit)
+    with read_conn() as conn:
+        rows = conn.execute(
+            "SELECT id, time_ms, mag, place, lon, lat, depth_km FROM quakes ORDER BY time_ms DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
     return [dict(r) for r in rows]
 
 def list_quakes_since(since_ms: int) -> List[Dict]:
-    conn = get_conn()
-    rows = conn.execute(
-        """
-        SELECT id, time_ms, mag, place, lon, lat, depth_km
-        FROM quakes
-        WHERE time_ms >= ?
-        ORDER BY time_ms DESC
-        """,
-        (since_ms,),
-    ).fetchall()
-    conn.close()
+    if shards.enabled():
+        return _sharded_quakes("WHERE time_ms >= ?", (since_ms,), shards.months_in_range(since_ms))
+    with read_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT id, time_ms, mag, place, lon, lat, depth_km
+            FROM quakes
+            WHERE time_ms >= ?
+            ORDER BY time_ms DESC
+            """,
+            (since_ms,),
+        ).fetchall()
     return [dict(r) for r in rows]
 
 # ---------- rules ----------
@@ -117,9 +432,8 @@ def create_rule(name: str, min_mag: float, bbox: str | None) -> int:
     return int(rid)
 
 def list_rules() -> List[Dict]:
-    conn = get_conn()
-    rows = conn.execute("SELECT id, name, min_mag, bbox FROM rules ORDER BY id DESC").fetchall()
-    conn.close()
+    with read_conn() as conn:
+        rows = conn.execute("SELECT id, name, min_mag, bbox FROM rules ORDER BY id DESC").fetchall()
     return [dict(r) for r in rows]
 
 def delete_rule(rule_id: int) -> None:
@@ -129,36 +443,123 @@ def delete_rule(rule_id: int) -> None:
     conn.close()
 
 # ---------- alerts ----------
-def add_alert(quake_id: str, rule_id: int, created_ms: int) -> bool:
+def alert_snapshot(quake: Mapping[str, Any], rule: Any, created_ms: int) -> Dict:
     """
-    Returns True if inserted; False if duplicate (same quake_id, rule_id).
+    Build an alert row for write_alerts from a quake mapping and a rule
+    (anything with id/name/min_mag/bbox attributes, e.g. app.rules.Rule).
     """
-    conn = get_conn()
-    try:
-        conn.execute(
-            "INSERT INTO alerts(quake_id, rule_id, created_ms) VALUES (?,?,?)",
-            (quake_id, rule_id, created_ms),
+    return {
+        "quake_id": quake["id"], "rule_id": rule.id, "created_ms": created_ms,
+        "quake_time_ms": quake["time_ms"], "mag": quake["mag"], "place": quake["place"],
+        "lon": quake["lon"], "lat": quake["lat"], "depth_km": quake["depth_km"],
+        "rule_name": rule.name, "min_mag": rule.min_mag, "bbox": rule.bbox,
+    }
+
+def write_alerts(conn: sqlite3.Connection, alerts: Iterable[Mapping[str, Any]]) -> List[Dict]:
+    """
+    Insert alerts on a caller-owned connection (no commit).
+    Rows come from alert_snapshot(); extra keys are passed through.
+    Returns only the alerts that were new (duplicates are skipped).
+    """
+    inserted: List[Dict] = []
+    for a in alerts:
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO alerts(quake_id, rule_id, created_ms,
+                                         quake_time_ms, mag, place, lon, lat, depth_km,
+                                         rule_name, min_mag, bbox)
+            VALUES (:quake_id, :rule_id, :created_ms,
+                    :quake_time_ms, :mag, :place, :lon, :lat, :depth_km,
+                    :rule_name, :min_mag, :bbox)
+            """,
+            a,
         )
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
+        if cur.rowcount == 1:
+            inserted.append({**a, "id": cur.lastrowid})
+    return inserted
+
+# both listings are one range scan over the covering idx_alerts_recent
+LIST_ALERTS_SQL = """
+    SELECT id, quake_id, rule_id, created_ms,
+           mag, place, quake_time_ms AS time_ms, rule_name, min_mag, bbox
+    FROM alerts INDEXED BY idx_alerts_recent
+    ORDER BY created_ms DESC
+    LIMIT ?
+"""
+RECENT_ALERTS_SQL = """
+    SELECT
+      id, created_ms,
+      datetime(created_ms/1000, 'unixepoch', 'localtime') AS created_at,
+      quake_id, rule_id,
+      quake_time_ms AS time_ms, mag, place, lon, lat, depth_km,
+      rule_name, min_mag, bbox
+    FROM alerts INDEXED BY idx_alerts_recent
+    ORDER BY created_ms DESC
+    LIMIT ?
+"""
 
 def list_alerts(limit: int = 50) -> List[Dict]:
-    conn = get_conn()
-    rows = conn.execute(
-        """
-        SELECT a.id, a.quake_id, a.rule_id, a.created_ms,
-               q.mag, q.place, q.time_ms, r.name as rule_name, r.min_mag, r.bbox
-        FROM alerts a
-        JOIN quakes q ON q.id = a.quake_id
-        JOIN rules r  ON r.id = a.rule_id
-        ORDER BY a.created_ms DESC
-        LIMIT ?
-        """,
-        (limit,),
-    ).fetchall()
-    conn.close()
+    with read_conn() as conn:
+        rows = conn.execute(LIST_ALERTS_SQL, (limit,)).fetchall()
     return [dict(r) for r in rows]
+
+def list_recent_alerts(limit: int = 25) -> List[Dict]:
+    with read_conn() as conn:
+        rows = conn.execute(RECENT_ALERTS_SQL, (limit,)).fetchall()
+    return [dict(r) for r in rows]
+
+# ---------- reports ----------
+DAILY_AGG_SQL = """
+    SELECT date(time_ms/1000,'unixepoch') AS day,
+           COUNT(*) AS n, SUM(mag) AS sum_mag, MAX(mag) AS max_mag
+    FROM {table}
+    GROUP BY day
+"""
+
+def get_daily_report(limit_days: int = 7) -> List[Dict]:
+    """Per-day count/avg/max over live quakes plus the archived rollup."""
+    if shards.enabled():
+        return _sharded_daily_report(limit_days)
+    with read_conn() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT day,
+                   SUM(n) AS n,
+                   ROUND(SUM(sum_mag) / SUM(n),2) AS avg_mag,
+                   ROUND(MAX(max_mag),2) AS max_mag
+            FROM (
+                {DAILY_AGG_SQL.format(table="quakes")}
+                UNION ALL
+                SELECT day, n, sum_mag, max_mag FROM quake_daily_rollup
+            )
+            GROUP BY day
+            ORDER BY day DESC
+            LIMIT ?
+            """,
+            (limit_days,),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+def _sharded_daily_report(limit_days: int) -> List[Dict]:
+    # a day never spans two shards, so walk shards newest first until we have
+    # enough days; anything in older shards is older than what we already hold
+    days: Dict[str, List[float]] = {}
+    with read_conn() as conn:
+        for r in conn.execute("SELECT day, n, sum_mag, max_mag FROM quake_daily_rollup"):
+            days[r["day"]] = [r["n"], r["sum_mag"], r["max_mag"]]
+        live = 0
+        for month in shards.existing_months():
+            if live >= limit_days:
+                break
+            with shards.attached(conn, [month]) as [name]:
+                rows = conn.execute(DAILY_AGG_SQL.format(table=f"{name}.quakes")).fetchall()
+            for r in rows:
+                agg = days.setdefault(r["day"], [0, 0.0, r["max_mag"]])
+                agg[0] += r["n"]
+                agg[1] += r["sum_mag"]
+                agg[2] = max(agg[2], r["max_mag"])
+                live += 1
+    return [
+        {"day": d, "n": n, "avg_mag": round(s / n, 2), "max_mag": round(m, 2)}
+        for d, (n, s, m) in sorted(days.items(), reverse=True)[:limit_days]
+    ]
@@ -4,6 +4,8 @@ from collections import deque
 from threading import Lock
 from time import time
 
+from app import memstats, tracing
+
 class EventBus:
   
     def __init__(self, maxlen: int = 1000):
@@ -11,12 +13,18 @@ class EventBus:
         self._lock = Lock()
 
     def publish(self, ev: dict) -> None:
-        ev.setdefault("ts_ms", int(time() * 1000))
-        with self._lock:
-            self._q.append(ev)
+        with tracing.span("events.publish", **{"event.type": ev.get("type", "")}):
+            ev.setdefault("ts_ms", int(time() * 1000))
+            with self._lock:
+                self._q.append(ev)
 
     def tail(self, n: int = 50) -> list:
         with self._lock:
             return list(self._q)[-n:]
 
+    def snapshot(self) -> list:
+        with self._lock:
+            return list(self._q)
+
 bus = EventBus()
+memstats.register("events.ring", lambda: memstats.measure(bus.snapshot()))
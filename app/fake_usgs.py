@@ -0,0 +1,268 @@
+# app/fake_usgs.py
+"""
+Local stand-in for the USGS summary feeds, over real sockets.
+
+    python -m app.fake_usgs --port 8089 --latency-ms 150 --bandwidth-kbps 512 --error-rate 0.05
+    QUAKE_HUB_USGS_BASE_URL=http://127.0.0.1:8089 uvicorn app.main:app
+
+Serves every FEEDS path. A feed is either a recorded file
+(`<record-dir>/<feed>.geojson[.gz]`, served as is) or synthetic: one
+seeded catalog that gains `rate_per_s` quakes per second of server time,
+cut per feed by its time window (hour/day/week/month) and magnitude floor
+(2.5, 4.5, significant = 6), newest first like the real feeds.
+
+Knobs: latency before the response, bandwidth cap on the body, ETag +
+If-None-Match (304), gzip when the client accepts it, random or queued
+failures (HTTP status or a dropped connection). Keep-alive is on and
+`stats` counts connections and requests, so connection reuse, timeouts and
+large bodies can be measured against the real fetch code.
+"""
+from __future__ import annotations
+import argparse, gzip, json, math, random, re, threading, time, zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from app.usgs import FEEDS, FEED_PATH
+
+WINDOWS_MS = {"hour": 3_600_000, "day": 86_400_000, "week": 7 * 86_400_000, "month": 30 * 86_400_000}
+MIN_MAG = {"2.5": 2.5, "4.5": 4.5, "significant": 6.0}
+
+_PATH = re.compile("^" + re.escape(FEED_PATH).replace(r"\{feed\}", "(?P<feed>[^/?]+)") + r"(\?.*)?$")
+
+Outcome = Union[int, str]  # HTTP status, or "drop" to close without answering
+
+def feed_filter(feed: str) -> Tuple[int, float]:
+    """(window_ms, min_mag) for a summary feed name like '2.5_day'."""
+    level, _, period = feed.partition("_")
+    return WINDOWS_MS.get(period, WINDOWS_MS["day"]), MIN_MAG.get(level, -10.0)
+
+class SyntheticCatalog:
+    """Seeded quakes at a fixed rate; quake i happens at origin_ms + i / rate."""
+
+    def __init__(self, start_ms: int, rate_per_s: float = 0.05, backlog: int = 200, seed: int = 7):
+        self.rate = max(rate_per_s, 1e-6)
+        self.origin_ms = start_ms - int(backlog * 1000 / self.rate)
+        self.seed = seed
+        self._rnd = random.Random(seed)
+        self._features: List[dict] = []
+        self._lock = threading.Lock()
+
+    def count_at(self, now_ms: int) -> int:
+        return max(0, int((now_ms - self.origin_ms) * self.rate / 1000) + 1)
+
+    def features(self, now_ms: int) -> List[dict]:
+        """All quakes up to now_ms, oldest first."""
+        n = self.count_at(now_ms)
+        with self._lock:
+            rnd = self._rnd
+            while len(self._features) < n:
+                i = len(self._features)
+                t = self.origin_ms + int(i * 1000 / self.rate)
+                self._features.append({
+                    "type": "Feature", "id": f"fk{self.seed}n{i}",
+                    "properties": {"time": t, "updated": t, "mag": round(1.0 + rnd.expovariate(math.log(10)), 2),
+                                   "place": f"{rnd.randint(1, 150)} km {rnd.choice('NSEW')} of Fakeville"},
+                    "geometry": {"type": "Point", "coordinates": [round(rnd.uniform(-180, 180), 4),
+                                                                  round(rnd.uniform(-70, 70), 4),
+                                                                  round(rnd.uniform(0, 700), 2)]},
+                })
+            return self._features[:n]
+
+class FakeUSGS:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 bandwidth_bps: float = 0.0, etag: bool = True, compress: bool = True,
+                 error_rate: float = 0.0, rate_per_s: float = 0.05, backlog: int = 200, seed: int = 7,
+                 record_dir: Optional[Path] = None, clock: Optional[Callable[[], float]] = None):
+        self.latency = latency_ms / 1000.0
+        self.bandwidth = bandwidth_bps
+        self.etag = etag
+        self.compress = compress
+        self.error_rate = error_rate
+        self.clock = clock or time.time  # seconds
+        self.catalog = SyntheticCatalog(int(self.clock() * 1000), rate_per_s, backlog, seed)
+        self.recorded: Dict[str, bytes] = {}
+        if record_dir is not None:
+            for path in Path(record_dir).glob("*.geojson*"):
+                body = path.read_bytes()
+                self.recorded[path.name.split(".geojson")[0]] = gzip.decompress(body) if path.suffix == ".gz" else body
+        self.stats = {"connections": 0, "requests": 0, "not_modified": 0, "errors": 0, "bytes_sent": 0}
+        self._rnd = random.Random(seed)
+        self._queued: List[Outcome] = []
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[str, bytes, bytes]] = {}  # feed -> (etag, body, gzipped body)
+
+        fake = self
+
+        class Handler(_Handler):
+            owner = fake
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- lifecycle ----------
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, feed: str) -> str:
+        return self.base_url + FEED_PATH.format(feed=feed)
+
+    def start(self) -> "FakeUSGS":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-usgs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeUSGS":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---------- behaviour ----------
+    def fail_next(self, *outcomes: Outcome) -> None:
+        """Answer the next requests with these statuses (or 'drop'), in order."""
+        with self._lock:
+            self._queued.extend(outcomes)
+
+    def _failure(self) -> Optional[Outcome]:
+        with self._lock:
+            if self._queued:
+                return self._queued.pop(0)
+            if self.error_rate and self._rnd.random() < self.error_rate:
+                return self._rnd.choice((500, 502, 503, "drop"))
+        return None
+
+    def body(self, feed: str) -> Tuple[str, bytes, bytes]:
+        """(etag, body, gzipped body) as of now."""
+        raw = self.recorded.get(feed)
+        if raw is not None:
+            key = f'"{zlib.crc32(raw):08x}"'
+        else:
+            now_ms = int(self.clock() * 1000)
+            window, min_mag = feed_filter(feed)
+            feats = [f for f in self.catalog.features(now_ms)
+                     if f["properties"]["time"] > now_ms - window and f["properties"]["mag"] >= min_mag]
+            key = f'"{feed}-{feats[-1]["id"] if feats else "empty"}-{len(feats)}"'
+        cached = self._cache.get(feed)
+        if cached and cached[0] == key:
+            return cached
+        if raw is None:
+            raw = json.dumps({
+                "type": "FeatureCollection",
+                "metadata": {"generated": now_ms, "url": FEEDS.get(feed, feed), "title": f"Fake USGS {feed}",
+                             "status": 200, "count": len(feats)},
+                "features": feats[::-1],
+            }).encode()
+        entry = (key, raw, gzip.compress(raw, 6))
+        self._cache[feed] = entry
+        return entry
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real CDN
+    owner: FakeUSGS
+
+    def setup(self) -> None:
+        super().setup()
+        with self.owner._lock:
+            self.owner.stats["connections"] += 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        fake = self.owner
+        with fake._lock:
+            fake.stats["requests"] += 1
+        m = _PATH.match(self.path)
+        if not m or (m.group("feed") not in FEEDS and m.group("feed") not in fake.recorded):
+            return self._plain(404, b"not found")
+        if fake.latency:
+            time.sleep(fake.latency)
+        failure = fake._failure()
+        if failure is not None:
+            with fake._lock:
+                fake.stats["errors"] += 1
+            if failure == "drop":
+                self.close_connection = True
+                return
+            return self._plain(int(failure), b"injected failure")
+
+        etag, raw, packed = fake.body(m.group("feed"))
+        if fake.etag and etag in (self.headers.get("If-None-Match") or ""):
+            with fake._lock:
+                fake.stats["not_modified"] += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        use_gzip = fake.compress and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        payload = packed if use_gzip else raw
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        if fake.etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self._send(payload)
+
+    def _plain(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        if status in (429, 503):
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send(self, payload: bytes) -> None:
+        bps = self.owner.bandwidth
+        step = max(1024, int(bps / 20)) if bps else len(payload) or 1
+        try:
+            for i in range(0, len(payload), step):
+                piece = payload[i:i + step]
+                with self.owner._lock:
+                    self.owner.stats["bytes_sent"] += len(piece)
+                self.wfile.write(piece)
+                if bps:
+                    time.sleep(len(piece) / bps)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client gave up (e.g. read timeout)
+
+def main():
+    ap = argparse.ArgumentParser(description="Local stand-in for the USGS summary feeds")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--bandwidth-kbps", type=float, default=0.0, help="Body bandwidth cap in KiB/s (0 = none)")
+    ap.add_argument("--no-etag", action="store_true")
+    ap.add_argument("--no-gzip", action="store_true")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    ap.add_argument("--rate", type=float, default=0.05, help="Synthetic quakes per second")
+    ap.add_argument("--backlog", type=int, default=200, help="Synthetic quakes already present at start")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--record-dir", type=str, default=None, help="Serve <feed>.geojson[.gz] files from here")
+    args = ap.parse_args()
+
+    fake = FakeUSGS(args.host, args.port, args.latency_ms, args.bandwidth_kbps * 1024, not args.no_etag,
+                    not args.no_gzip, args.error_rate, args.rate, args.backlog, args.seed,
+                    Path(args.record_dir) if args.record_dir else None)
+    print(f"Fake USGS on {fake.base_url} (set QUAKE_HUB_USGS_BASE_URL={fake.base_url})")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake._server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# app/ingest.py
+from __future__ import annotations
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from app.events import bus
+from app.pipeline import IngestPipeline
+from app.writer import DbWriter
+from app.metrics import INGEST_COUNT, LAST_INGEST_TS, INGEST_LATENCY
+
+def run_ingest(feed: str = "all_hour", stages: Optional[Dict[str, float]] = None,
+               source: Optional[Iterable[bytes]] = None, writer: Optional[DbWriter] = None,
+               now_ms: Optional[Callable[[], int]] = None) -> Dict:
+    """
+    Fetch one feed, store its quakes, evaluate rules and publish alerts
+    through the staged pipeline. Seconds each stage spent working are
+    recorded into `stages` when given. `source` replaces the HTTP download
+    with any iterable of body chunks; `writer` and `now_ms` (the clock
+    stamped on new alerts) default to the shared writer and wall time.
+    """
+    start = time.time()
+    pipeline = IngestPipeline(feed, source=source, writer=writer, now_ms=now_ms)
+    try:
+        result = pipeline.run()
+    finally:
+        if stages is not None:
+            stages.update(pipeline.stages)
+    INGEST_COUNT.inc(result["ingested"])
+    LAST_INGEST_TS.set(int(time.time() * 1000))
+    INGEST_LATENCY.observe(time.time() - start)
+    bus.publish({"type": "IngestCompleted", "feed": feed, "ingested": result["ingested"], "alerts": len(result["alerts"])})
+    return result
@@ -0,0 +1,99 @@
+# app/jobs.py
+from __future__ import annotations
+import logging, threading, time, uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from app import tracing
+from app.ingest import run_ingest
+
+log = logging.getLogger(__name__)
+
+RunFn = Callable[..., Dict]  # run(feed, stages=dict) -> result
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+@dataclass
+class IngestJob:
+    id: str
+    feed: str
+    status: str = "queued"  # queued | running | succeeded | failed
+    created_ms: int = field(default_factory=_now_ms)
+    started_ms: Optional[int] = None
+    finished_ms: Optional[int] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    future: Future = field(default_factory=Future, repr=False)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id, "feed": self.feed, "status": self.status,
+            "created_ms": self.created_ms, "started_ms": self.started_ms, "finished_ms": self.finished_ms,
+            "stages": self.stages, "result": self.result, "error": self.error,
+        }
+
+class JobManager:
+    """
+    Runs ingests off the request thread. At most one job per feed is in
+    flight: submitting a feed that is already queued or running returns
+    that job instead of starting a second one. Finished jobs are kept (most
+    recent `keep`) so their status can still be read.
+    """
+
+    def __init__(self, run: RunFn = run_ingest, max_workers: int = 4, keep: int = 200):
+        self.run = run
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._inflight: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, feed: str) -> Tuple[IngestJob, bool]:
+        """Returns (job, created); created is False when an in-flight job was reused."""
+        with self._lock:
+            job = self._inflight.get(feed)
+            if job is not None:
+                return job, False
+            job = IngestJob(id=uuid.uuid4().hex, feed=feed)
+            self._inflight[feed] = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in ("queued", "running"):
+                    break
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._execute, job)
+        return job, True
+
+    def run_and_wait(self, feed: str, timeout: Optional[float] = None) -> Dict:
+        """Submit (or join) the feed's job and block for its result."""
+        job, _ = self.submit(feed)
+        return job.future.result(timeout)
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _execute(self, job: IngestJob) -> None:
+        job.status, job.started_ms = "running", _now_ms()
+        try:
+            with tracing.span("ingest.job", feed=job.feed, **{"job.id": job.id}):
+                job.result = self.run(job.feed, stages=job.stages)
+            job.status = "succeeded"
+        except Exception as exc:
+            log.exception("ingest job %s (%s) failed", job.id, job.feed)
+            job.error, job.status = f"{type(exc).__name__}: {exc}", "failed"
+        finally:
+            job.finished_ms = _now_ms()
+            with self._lock:
+                self._inflight.pop(job.feed, None)
+        if job.error is None:
+            job.future.set_result(job.result)
+        else:
+            job.future.set_exception(RuntimeError(job.error))
+
+jobs = JobManager()
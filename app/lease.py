@@ -0,0 +1,117 @@
+# app/lease.py
+from __future__ import annotations
+import argparse, logging, os, socket, threading, time, uuid
+from typing import Callable, Optional
+
+from app.db import init_db, get_conn
+from app.metrics import LEADER_IS_LEADER, LEADER_TRANSITIONS
+
+log = logging.getLogger(__name__)
+
+LEASE_TTL_S = float(os.environ.get("QUAKE_HUB_LEASE_TTL_S", "10"))
+
+def default_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class Lease:
+    """
+    Leader election on a row in the `leases` table.
+
+    Acquire/renew is one atomic upsert: it succeeds when the row is free,
+    expired, or already ours. The holder renews every ttl/3; if it cannot
+    renew before its own expiry it steps down, and any other process takes
+    over on its next attempt once the row has expired.
+    """
+
+    def __init__(self, name: str, holder: Optional[str] = None, ttl_s: float = LEASE_TTL_S,
+                 on_acquire: Optional[Callable[[], None]] = None,
+                 on_lose: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.holder = holder or default_holder()
+        self.ttl_ms = int(ttl_s * 1000)
+        self.on_acquire = on_acquire
+        self.on_lose = on_lose
+        self.is_leader = False
+        self._expires_ms = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def try_acquire(self, now_ms: Optional[int] = None) -> bool:
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        conn = get_conn()
+        try:
+            cur = conn.execute(
+                """
+                INSERT INTO leases(name, holder, expires_ms) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_ms = excluded.expires_ms
+                WHERE leases.holder = excluded.holder OR leases.expires_ms < ?
+                """,
+                (self.name, self.holder, now_ms + self.ttl_ms, now_ms),
+            )
+            conn.commit()
+            if cur.rowcount == 1:
+                self._expires_ms = now_ms + self.ttl_ms
+                return True
+            return False
+        finally:
+            conn.close()
+
+    def release(self) -> None:
+        conn = get_conn()
+        try:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ---------- background heartbeat ----------
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name=f"lease-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.ttl_ms / 1000)
+        if self.is_leader:
+            self._set_leader(False)
+            self.release()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                held = self.try_acquire()
+            except Exception:
+                log.exception("lease %s: heartbeat failed", self.name)
+                held = self.is_leader and time.time() * 1000 < self._expires_ms
+            if held != self.is_leader:
+                self._set_leader(held)
+            self._stop.wait(self.ttl_ms / 3000)
+
+    def _set_leader(self, leader: bool) -> None:
+        self.is_leader = leader
+        LEADER_IS_LEADER.labels(self.name).set(1 if leader else 0)
+        LEADER_TRANSITIONS.labels(self.name, "acquired" if leader else "lost").inc()
+        log.info("lease %s: %s %s", self.name, self.holder, "acquired" if leader else "lost")
+        callback = self.on_acquire if leader else self.on_lose
+        if callback is not None:
+            try:
+                callback()
+            except Exception:
+                log.exception("lease %s: callback failed", self.name)
+
+def main():
+    ap = argparse.ArgumentParser(description="Show leader leases")
+    ap.parse_args()
+    init_db()
+    conn = get_conn()
+    now_ms = int(time.time() * 1000)
+    for r in conn.execute("SELECT name, holder, expires_ms FROM leases ORDER BY name"):
+        state = "live" if r["expires_ms"] >= now_ms else "expired"
+        print(f"{r['name']}: {r['holder']} ({state}, {(r['expires_ms'] - now_ms) / 1000:+.1f}s)")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
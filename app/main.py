@@ -1,90 +1,97 @@
 # app/main.py
 from __future__ import annotations
-import time, json, sys, subprocess  # <-- added sys, subprocess
+import hmac, os, time, json, sys, subprocess  # <-- added sys, subprocess
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Dict, Optional
 
-from fastapi import FastAPI, Request, Form, Response
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi import FastAPI, Request, Form, Response, HTTPException, Header
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from app.db import (
-    init_db, get_conn, create_rule, list_rules, bulk_upsert_quakes,
-    add_alert
-)
-from app.rules import Rule, quake_matches_rule
-from app.usgs import fetch_quakes
+from app import memstats, profiler, runtime, server_timing, sqlstats, tracing
+from app.db import init_db, create_rule, list_rules, get_daily_report, list_recent_alerts
 from app.events import bus
-
-app = FastAPI(title="Earthquake Alert Hub")
+from app.jobs import jobs
+from app.lease import Lease
+from app.metrics import (ALERT_INSERT_TO_SSE, STREAM_SUBSCRIBERS, STREAM_BYTES, HTTP_REQUEST_SECONDS,
+                         render as render_metrics, process_exit)
+from app.scheduler import FeedScheduler, scheduler_enabled
+from app.usgs import feed_label
+from app.writer import writer
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # every worker competes for the lease; only the holder polls USGS
+    scheduler = FeedScheduler(jobs.run_and_wait) if scheduler_enabled() else None
+    lease = Lease("feed-scheduler", on_acquire=scheduler.start, on_lose=scheduler.stop) if scheduler else None
+    if lease:
+        lease.start()
+    app.state.scheduler, app.state.lease = scheduler, lease
+    probe = runtime.start_probe()
+    yield
+    await runtime.stop_probe(probe)
+    if lease:
+        lease.stop()
+    writer.stop()
+    process_exit()
+
+app = FastAPI(title="Earthquake Alert Hub", lifespan=lifespan,
+              default_response_class=server_timing.TimedJSONResponse)
 
 # robust paths
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent  # <-- tests live here
 STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR = BASE_DIR / "templates"
+# how often each /events/stream client checks the bus for a new event
+SSE_POLL_S = float(os.environ.get("QUAKE_HUB_SSE_POLL_S", "1"))
 STATIC_DIR.mkdir(parents=True, exist_ok=True)
 TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # the endpoint (and the threadpool it may run in) inherits this span's context
+    with tracing.span(f"{request.method} {request.url.path}", tracing.SERVER,
+                      **{"http.method": request.method, "http.target": request.url.path}) as sp:
+        response = await call_next(request)
+        if sp is not None:
+            route = request.scope.get("route")
+            if route is not None:
+                sp.name = f"{request.method} {route.path}"
+                sp.set("http.route", route.path)
+            sp.set("http.status_code", response.status_code)
+        return response
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Server-Timing header + per-route latency; time to response headers for streams."""
+    token = server_timing.begin()
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        acc = server_timing.end(token)
+    total = time.perf_counter() - t0
+    response.headers["Server-Timing"] = server_timing.header(acc, total)
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(request.method, route.path if route is not None else "unmatched",
+                                f"{response.status_code // 100}xx").observe(total)
+    return response
+
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 init_db()
 
-# ---------- metrics ----------
-INGEST_COUNT   = Counter("quakes_ingested_total", "Total quakes ingested")
-ALERT_COUNT    = Counter("alerts_emitted_total",  "Total alerts emitted")
-LAST_INGEST_TS = Gauge(  "last_ingest_timestamp",  "Last ingest epoch millis")
-INGEST_LATENCY = Histogram("ingest_duration_seconds", "Ingest duration")
-
-def get_daily_report(limit_days: int = 7) -> List[Dict]:
-    conn = get_conn()
-    rows = conn.execute(
-        """
-        SELECT date(time_ms/1000,'unixepoch') AS day,
-               COUNT(*) AS n,
-               ROUND(AVG(mag),2) AS avg_mag,
-               ROUND(MAX(mag),2) AS max_mag
-        FROM quakes
-        GROUP BY day
-        ORDER BY day DESC
-        LIMIT ?
-        """,
-        (limit_days,),
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
-
-def list_recent_alerts(limit: int = 25) -> List[Dict]:
-    conn = get_conn()
-    rows = conn.execute(
-        """
-        SELECT
-          a.id, a.created_ms,
-          datetime(a.created_ms/1000, 'unixepoch', 'localtime') AS created_at,
-          a.quake_id, a.rule_id,
-          q.time_ms, q.mag, q.place, q.lon, q.lat, q.depth_km,
-          r.name AS rule_name, r.min_mag, r.bbox
-        FROM alerts a
-        JOIN quakes q ON q.id = a.quake_id
-        JOIN rules  r ON r.id = a.rule_id
-        ORDER BY a.created_ms DESC
-        LIMIT ?
-        """,
-        (limit,),
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
-
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "rules": list_rules(), "report": get_daily_report(7), "alerts": list_recent_alerts(25)},
-    )
+    context = {"rules": list_rules(), "report": get_daily_report(7), "alerts": list_recent_alerts(25)}
+    with server_timing.timed("template"):
+        return templates.TemplateResponse(request, "index.html", context)
 
 @app.post("/rules")
 def add_rule_endpoint(name: str = Form(...), min_mag: float = Form(...), bbox: Optional[str] = Form(None)):
@@ -97,28 +104,17 @@ def get_rules():
 
 @app.post("/ingest")
 def ingest(feed: str = Form("all_hour")):
-    start = time.time()
-    quakes = [q.to_dict() for q in fetch_quakes(feed)]
-    bulk_upsert_quakes(quakes)
-    INGEST_COUNT.inc(len(quakes))
-
-    rules = [Rule(**{**r, "id": r["id"]}) for r in list_rules()]
-    now_ms = int(time.time() * 1000)
-    alerts = []
-
-    for q in quakes:
-        for r in rules:
-            if quake_matches_rule(q, r):
-                if add_alert(q["id"], r.id, now_ms):
-                    bus.publish({"type": "QuakeDetected", "rule": {"id": r.id, "name": r.name}, "quake": q})
-                    ALERT_COUNT.inc()
-                    alerts.append({"quake_id": q["id"], "rule_id": r.id, "mag": q["mag"], "place": q["place"]})
-
-    LAST_INGEST_TS.set(int(time.time() * 1000))
-    INGEST_LATENCY.observe(time.time() - start)
-    bus.publish({"type": "IngestCompleted", "feed": feed, "ingested": len(quakes), "alerts": len(alerts)})
-
-    return JSONResponse({"ingested": len(quakes), "alerts": alerts})
+    """Queue an ingest (or join the one already running for this feed)."""
+    job, created = jobs.submit(feed)
+    return JSONResponse({"job_id": job.id, "feed": feed, "status": job.status, "deduplicated": not created},
+                        status_code=202)
+
+@app.get("/ingest/jobs/{job_id}")
+def ingest_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    return job.to_dict()
 
 @app.get("/reports/daily")
 def reports_daily():
@@ -133,16 +129,31 @@ def get_alerts():
 def events_tail(n: int = 50):
     return bus.tail(n)
 
+def observe_delivery(ev: dict) -> None:
+    """Last hop of the alert latency: alert commit to this SSE write."""
+    if ev.get("type") == "QuakeDetected" and "alerted_ms" in ev:
+        ALERT_INSERT_TO_SSE.labels(feed_label(ev.get("feed", "")), ev["rule"].get("class", "")).observe(
+            max(0, time.time() * 1000 - ev["alerted_ms"]) / 1000.0)
+
 @app.get("/events/stream")
 def events_stream():
+    subscribers, pushed = STREAM_SUBSCRIBERS.labels("events"), STREAM_BYTES.labels("events")
+
     def gen():
         last = None
-        while True:
-            events = bus.tail(1)
-            if events and events[-1] is not last:
-                last = events[-1]
-                yield "data: " + json.dumps(last) + "\n\n"
-            time.sleep(1)
+        subscribers.inc()
+        try:
+            while True:
+                events = bus.tail(1)
+                if events and events[-1] is not last:
+                    last = events[-1]
+                    chunk = "data: " + json.dumps(last) + "\n\n"
+                    pushed.inc(len(chunk.encode()))
+                    yield chunk
+                    observe_delivery(last)
+                time.sleep(SSE_POLL_S)
+        finally:
+            subscribers.dec()
     return StreamingResponse(gen(), media_type="text/event-stream")
 
 @app.post("/events/test")
@@ -174,7 +185,58 @@ def run_tests():
         bus.publish({"type": "TestsRun", "ok": False})
         return JSONResponse({"ok": False, "error": "timeout running tests"}, status_code=500)
 
+# ---------- debug (admin only) ----------
+def require_admin(token: Optional[str]) -> None:
+    """Debug endpoints need X-Admin-Token to match QUAKE_HUB_ADMIN_TOKEN; without one they are off."""
+    expected = os.environ.get("QUAKE_HUB_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="debug endpoints disabled")
+    # constant-time, and bytes so a non-ASCII header can't raise
+    if not hmac.compare_digest((token or "").encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="bad admin token")
+
+@app.get("/debug/sql")
+def debug_sql(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return sqlstats.status()
+
+@app.post("/debug/sql")
+def debug_sql_configure(enabled: Optional[bool] = None, slow_ms: Optional[float] = None,
+                        x_admin_token: Optional[str] = Header(None)):
+    """Toggle statement timing and/or set the slow-query threshold at runtime."""
+    require_admin(x_admin_token)
+    return sqlstats.configure(enabled, slow_ms)
+
+@app.get("/debug/profile")
+def debug_profile(seconds: float = 10.0, mode: str = "cpu", hz: float = 100.0, top: int = 25,
+                  format: str = "collapsed", x_admin_token: Optional[str] = Header(None)):
+    """
+    Profile the running process for `seconds` (max 60). mode=cpu samples
+    every thread's stack; mode=alloc diffs tracemalloc snapshots. Returns
+    collapsed stacks for flamegraph.pl/speedscope, or with format=json the
+    top frames / allocation sites as well.
+    """
+    require_admin(x_admin_token)
+    if mode not in ("cpu", "alloc"):
+        raise HTTPException(status_code=400, detail="mode must be cpu or alloc")
+    try:
+        result = profiler.profile(seconds, mode, hz, top)
+    except profiler.ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if format == "json":
+        return result
+    return PlainTextResponse(result["collapsed"])
+
+@app.get("/debug/memory")
+def debug_memory(x_admin_token: Optional[str] = Header(None)):
+    """Approximate entries and bytes of every structure registered with app.memstats."""
+    require_admin(x_admin_token)
+    structures = memstats.update()
+    total = sum(s.get("bytes") or 0 for s in structures.values())
+    return {"pid": os.getpid(), "total_bytes": total, "structures": structures}
+
 # ---------- metrics ----------
 @app.get("/metrics")
 def metrics():
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    memstats.update()
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,155 @@
+# app/memstats.py
+"""
+Approximate memory held by the hub's own in-process structures.
+
+    curl -H "X-Admin-Token: $TOKEN" localhost:8000/debug/memory
+
+Modules that keep something around for the life of the process (the event
+bus ring, SQL template caches, pipeline and writer queues, the read pool)
+register a sizer here next to where the structure is defined:
+
+    memstats.register("events.ring", lambda: memstats.measure(bus.snapshot()))
+
+A sizer returns (entries, bytes); either may be None when it cannot be
+known cheaply. measure() walks a container with sys.getsizeof, following
+dicts, sequences, sets and object attributes; containers longer than
+`sample` items are sized from an even sample of them and extrapolated, so
+a full ring costs about as much as a short one. Objects shared between
+structures are counted in each of them.
+
+The numbers land in memory_structure_bytes / _entries{structure} on every
+/metrics scrape, and every QUAKE_HUB_MEMSTATS_S (default 30; 0 = scrape
+only) from the runtime probe, so each worker's figures stay current in
+multiprocess mode.
+"""
+from __future__ import annotations
+import ctypes, logging, os, sys, threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.metrics import MEMORY_BYTES, MEMORY_ENTRIES
+
+log = logging.getLogger(__name__)
+
+REFRESH_S = float(os.environ.get("QUAKE_HUB_MEMSTATS_S", "30"))
+SAMPLE = 64
+
+Sizer = Callable[[], Tuple[Optional[int], Optional[int]]]
+
+_sizers: Dict[str, Sizer] = {}
+_lock = threading.Lock()
+
+def register(name: str, sizer: Sizer) -> None:
+    """Add (or replace) the structure `name`; sizer() -> (entries, bytes)."""
+    with _lock:
+        _sizers[name] = sizer
+
+def unregister(name: str) -> None:
+    """Drop the structure and its gauge series."""
+    with _lock:
+        _sizers.pop(name, None)
+    for gauge in (MEMORY_ENTRIES, MEMORY_BYTES):
+        try:
+            gauge.remove(name)
+        except KeyError:
+            pass
+
+def registered() -> list:
+    with _lock:
+        return sorted(_sizers)
+
+# ---------- sizing ----------
+_ATOMIC = (str, bytes, bytearray, int, float, bool, complex, type(None))
+_SEQUENCES = (list, tuple, set, frozenset, deque)
+
+def deep_size(obj: Any, sample: int = SAMPLE, _seen: Optional[set] = None) -> int:
+    """sys.getsizeof of obj and everything it references, sampling long containers."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen or isinstance(obj, (type, type(sys), type(deep_size))):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, _ATOMIC):
+        return size
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        children = [x for kv in _sampled(items, sample) for x in kv]
+        scale = len(items) / max(1, min(len(items), sample))
+    elif isinstance(obj, _SEQUENCES):
+        items = list(obj)
+        children = _sampled(items, sample)
+        scale = len(items) / max(1, len(children))
+    else:
+        children = []
+        scale = 1.0
+        if hasattr(obj, "__dict__"):
+            children.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    children.append(getattr(obj, slot))
+    return size + int(sum(deep_size(c, sample, seen) for c in children) * scale)
+
+def _sampled(items: list, k: int) -> list:
+    if len(items) <= k:
+        return items
+    step = len(items) / k
+    return [items[int(i * step)] for i in range(k)]
+
+def measure(container: Any, sample: int = SAMPLE) -> Tuple[int, int]:
+    """(len, deep_size) of a container snapshot; a ready-made sizer result."""
+    return len(container), deep_size(container, sample)
+
+# ---------- SQLite's own heap ----------
+def _sqlite_lib():
+    try:
+        import _sqlite3
+        lib = ctypes.CDLL(_sqlite3.__file__)
+        lib.sqlite3_memory_used.restype = ctypes.c_int64
+        return lib
+    except (ImportError, OSError, AttributeError):
+        return None  # statically linked builds don't export the C API
+
+_SQLITE = _sqlite_lib()
+_SQLITE_STATUS_MALLOC_COUNT = 9
+
+def sqlite_heap() -> Tuple[Optional[int], Optional[int]]:
+    """
+    Bytes SQLite has allocated in this process (page caches, prepared
+    statements including sqlite3's per-connection statement caches, schema)
+    and the number of live allocations. sqlite3 doesn't expose per-connection
+    figures, so this is the whole library.
+    """
+    if _SQLITE is None:
+        return None, None
+    cur, high = ctypes.c_int(), ctypes.c_int()
+    count = cur.value if _SQLITE.sqlite3_status(_SQLITE_STATUS_MALLOC_COUNT, ctypes.byref(cur),
+                                                ctypes.byref(high), 0) == 0 else None
+    return count, int(_SQLITE.sqlite3_memory_used())
+
+register("sqlite.heap", sqlite_heap)
+
+# ---------- report ----------
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """{structure: {"entries": n, "bytes": b}}; a failing sizer reports its error instead."""
+    with _lock:
+        sizers = dict(_sizers)
+    out: Dict[str, Dict[str, Any]] = {}
+    for name in sorted(sizers):
+        try:
+            entries, size = sizers[name]()
+            out[name] = {"entries": entries, "bytes": size}
+        except Exception as exc:
+            log.debug("memstats sizer %s failed", name, exc_info=True)
+            out[name] = {"error": f"{type(exc).__name__}: {exc}"}
+    return out
+
+def update() -> Dict[str, Dict[str, Any]]:
+    """Take a snapshot and copy it into the gauges."""
+    snap = snapshot()
+    for name, row in snap.items():
+        if row.get("entries") is not None:
+            MEMORY_ENTRIES.labels(name).set(row["entries"])
+        if row.get("bytes") is not None:
+            MEMORY_BYTES.labels(name).set(row["bytes"])
+    return snap
@@ -0,0 +1,145 @@
+# app/metrics.py
+"""
+Prometheus metrics for the whole app.
+
+With several uvicorn/gunicorn workers, point PROMETHEUS_MULTIPROC_DIR at an
+empty directory shared by all of them (wipe it before each start):
+
+    rm -rf /tmp/quake-metrics && mkdir /tmp/quake-metrics
+    PROMETHEUS_MULTIPROC_DIR=/tmp/quake-metrics uvicorn app.main:app --workers 4
+
+prometheus_client then keeps every value in per-process mmapped files and
+render() merges them, so /metrics is the same whichever worker answers.
+Counters and histograms are summed; each gauge declares how its per-worker
+values combine (multiprocess_mode), which single-process mode ignores.
+"""
+from __future__ import annotations
+import os
+from typing import Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+# ---------- ingest ----------
+INGEST_COUNT   = Counter("quakes_ingested_total", "Total quakes ingested")
+ALERT_COUNT    = Counter("alerts_emitted_total",  "Total alerts emitted")
+LAST_INGEST_TS = Gauge(  "last_ingest_timestamp",  "Last ingest epoch millis", multiprocess_mode="max")
+INGEST_LATENCY = Histogram("ingest_duration_seconds", "Ingest duration")
+
+# ---------- db writer ----------
+WRITER_GROUP_SIZE = Histogram(
+    "db_writer_group_ops", "Batches merged into one write transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+WRITER_COMMIT_LATENCY = Histogram("db_writer_commit_seconds", "Group commit duration")
+WRITER_QUEUE_WAIT     = Histogram("db_writer_queue_wait_seconds", "Time a batch waited before its commit started")
+WRITER_FAILED_OPS     = Counter("db_writer_failed_ops_total", "Write batches rolled back with an error")
+
+# ---------- db read pool ----------
+READ_POOL_WAIT = Histogram(
+    "db_read_pool_wait_seconds", "Time spent waiting for a pooled read connection",
+    buckets=(.0001, .0005, .001, .005, .01, .05, .1, .5, 1, 5),
+)
+READ_POOL_IN_USE   = Gauge("db_read_pool_in_use", "Read connections currently borrowed", multiprocess_mode="livesum")
+READ_POOL_TIMEOUTS = Counter("db_read_pool_timeouts_total", "Read connection requests that timed out")
+
+# ---------- feed scheduler ----------
+FEED_POLLS         = Counter("feed_polls_total", "Scheduled feed polls", ["feed", "outcome"])
+# only the lease holder polls, so the most recent write across workers is the live value
+FEED_INTERVAL      = Gauge("feed_poll_interval_seconds", "Current adaptive poll interval", ["feed"],
+                           multiprocess_mode="livemostrecent")
+FEED_LAST_SUCCESS  = Gauge("feed_last_success_timestamp_seconds", "Epoch seconds of the last successful poll", ["feed"],
+                           multiprocess_mode="max")
+FEED_FRESHNESS_LAG = Gauge("feed_freshness_lag_seconds", "Seconds since the feed was last ingested successfully", ["feed"],
+                           multiprocess_mode="livemostrecent")
+
+FEED_WIRE_BYTES    = Counter("feed_wire_bytes_total", "Feed body bytes as received (compressed when the server compressed)", ["feed"])
+FEED_DECODED_BYTES = Counter("feed_decoded_bytes_total", "Feed body bytes after decompression", ["feed"])
+
+# ---------- leader election ----------
+LEADER_IS_LEADER   = Gauge("leader_is_leader", "1 while this process holds the lease", ["lease"], multiprocess_mode="livesum")
+LEADER_TRANSITIONS = Counter("leader_transitions_total", "Lease acquired/lost events", ["lease", "event"])
+
+# ---------- ingest pipeline ----------
+STAGE_ITEMS = Counter(
+    "ingest_stage_items_total", "Items emitted per pipeline stage (bytes for fetch, quakes/alerts otherwise)",
+    ["feed", "stage"],
+)
+STAGE_BUSY  = Counter("ingest_stage_busy_seconds_total", "Time each stage spent working (not waiting on queues)", ["feed", "stage"])
+QUEUE_DEPTH = Gauge("ingest_queue_depth", "Chunks waiting in the queue in front of a stage", ["stage"],
+                    multiprocess_mode="livesum")
+# one observation per ingest run; decode = parse busy time minus normalize
+INGEST_STAGE_SECONDS = Histogram(
+    "ingest_stage_duration_seconds", "Busy time per ingest run and stage",
+    ["feed", "stage"], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+FEATURES_SEEN = Counter("ingest_features_seen_total", "Feed features read, including dropped ones", ["feed"])
+FEATURES      = Counter("ingest_features_total", "Feed features by outcome: dropped, new, revised or duplicate",
+                        ["feed", "result"])
+
+# ---------- end-to-end alert latency (one observation per new alert) ----------
+_FEED_LAG_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 21600)
+_HOP_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ALERT_ORIGIN_TO_INGEST = Histogram(
+    "alert_origin_to_ingest_seconds", "Quake origin time to our commit of the quake row",
+    ["feed", "rule_class"], buckets=_FEED_LAG_BUCKETS,
+)
+ALERT_UPDATED_TO_INGEST = Histogram(
+    "alert_updated_to_ingest_seconds", "USGS `updated` time to our commit of the quake row",
+    ["feed", "rule_class"], buckets=_FEED_LAG_BUCKETS,
+)
+ALERT_INGEST_TO_INSERT = Histogram(
+    "alert_ingest_to_insert_seconds", "Quake row commit to alert row commit",
+    ["feed", "rule_class"], buckets=_HOP_BUCKETS,
+)
+ALERT_INSERT_TO_SSE = Histogram(
+    "alert_insert_to_sse_seconds", "Alert row commit to the QuakeDetected event written to an SSE client",
+    ["feed", "rule_class"], buckets=_HOP_BUCKETS + (30, 60),
+)
+
+# ---------- sqlite statements (only while app.sqlstats is enabled) ----------
+SQL_STATEMENT_SECONDS = Histogram(
+    "sqlite_statement_duration_seconds", "Statement execute time by SQL template", ["statement"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+SQL_SLOW_STATEMENTS = Counter("sqlite_slow_statements_total", "Statements over the slow-query threshold")
+
+# ---------- http ----------
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency to response headers, by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# ---------- runtime saturation (sampled by app.runtime's probe) ----------
+THREADPOOL_TOKENS  = Gauge("anyio_threadpool_tokens", "Default anyio thread limiter tokens", ["state"],
+                           multiprocess_mode="livesum")  # state: in_use | total
+THREADPOOL_WAITING = Gauge("anyio_threadpool_waiting", "Tasks waiting for a threadpool token", multiprocess_mode="livesum")
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Extra delay of a periodic probe sleep on the event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_LAG_LAST = Gauge("event_loop_lag_last_seconds", "Most recent event loop lag probe", multiprocess_mode="livemax")
+STREAM_SUBSCRIBERS = Gauge("stream_subscribers", "Open streaming clients", ["stream"], multiprocess_mode="livesum")
+STREAM_BYTES = Counter("stream_bytes_pushed_total", "Bytes written to streaming clients", ["stream"])
+
+# ---------- in-process memory (app.memstats registry) ----------
+MEMORY_BYTES   = Gauge("memory_structure_bytes", "Approximate bytes held by a registered in-process structure",
+                       ["structure"], multiprocess_mode="livesum")
+MEMORY_ENTRIES = Gauge("memory_structure_entries", "Entries in a registered in-process structure",
+                       ["structure"], multiprocess_mode="livesum")
+
+# ---------- exposition ----------
+def render() -> bytes:
+    """/metrics body: this process's registry, or every worker's merged in multiprocess mode."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def process_exit(pid: Optional[int] = None) -> None:
+    """Drop this worker's live-gauge files on shutdown so livesum/livemax stop counting it."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid(), MULTIPROC_DIR)
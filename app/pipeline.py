@@ -0,0 +1,249 @@
+# app/pipeline.py
+from __future__ import annotations
+import os, queue, threading, time, weakref
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.db import list_rules, alert_snapshot
+from app.rules import Rule, match_batch, rule_class
+from app.usgs import QuakeBatch, QuakeRow, adapter_for, feed_label, stream_feed
+from app import memstats, tracing
+from app.events import bus
+from app.writer import DbWriter, writer as default_writer
+from app.metrics import (ALERT_COUNT, STAGE_ITEMS, STAGE_BUSY, QUEUE_DEPTH, INGEST_STAGE_SECONDS,
+                         FEATURES_SEEN, FEATURES, ALERT_ORIGIN_TO_INGEST, ALERT_UPDATED_TO_INGEST,
+                         ALERT_INGEST_TO_INSERT)
+
+CHUNK_ROWS  = int(os.environ.get("QUAKE_HUB_PIPELINE_CHUNK", "500"))
+QUEUE_SLOTS = int(os.environ.get("QUAKE_HUB_PIPELINE_QUEUE", "8"))
+
+STAGES = ("fetch", "parse", "store", "match", "alert_write", "publish")
+# per-run histogram stages; parse is split into decode (bytes -> records) and normalize
+TIMED_STAGES = ("fetch", "decode", "normalize", "upsert", "match", "alert_insert", "publish")
+FEATURE_RESULTS = ("dropped", "new", "revised", "duplicate")
+
+_END = object()
+_running: "weakref.WeakSet[IngestPipeline]" = weakref.WeakSet()
+
+def _queued_chunks():
+    items = []
+    for p in list(_running):
+        for q in p._queues:
+            with q.mutex:
+                items.extend(item for item in q.queue if item is not _END)
+    return memstats.measure(items)
+
+memstats.register("pipeline.queues", _queued_chunks)
+
+class _Aborted(Exception):
+    pass
+
+class IngestPipeline:
+    """
+    One feed ingest as six threads joined by bounded queues:
+
+        fetch -> parse -> store -> match -> alert_write -> publish
+
+    Each stage hands chunks (bytes, then QuakeBatches of up to CHUNK_ROWS quakes)
+    downstream as soon as they are ready, so the download, JSON parsing and
+    SQLite writes overlap. A full queue blocks the producer, which bounds
+    memory on large feeds. The first stage error aborts every stage and is
+    re-raised from run().
+    """
+
+    def __init__(self, feed: str, source: Optional[Iterable[bytes]] = None,
+                 writer: Optional[DbWriter] = None, chunk_rows: int = CHUNK_ROWS,
+                 queue_slots: int = QUEUE_SLOTS, now_ms: Optional[Callable[[], int]] = None):
+        self.feed = feed
+        self.label = feed_label(feed)  # metric label; ad-hoc URLs share "custom"
+        self.source = source
+        self.writer = writer or default_writer
+        self.chunk_rows = max(1, chunk_rows)
+        self.queue_slots = max(1, queue_slots)
+        self.now_ms = now_ms or (lambda: int(time.time() * 1000))
+        self.stages: Dict[str, float] = {}
+        self.ingested = self.new = self.revised = self.dropped = 0
+        self._timings: Dict[str, float] = {}
+        self.max_mag: Optional[float] = None
+        self.alerts: List[Dict] = []
+        self._abort = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._queues: List[queue.Queue] = []
+
+    # ---------- plumbing ----------
+    def _put(self, q: queue.Queue, stage: str, item: Any, waited: List[float]) -> None:
+        t0 = time.perf_counter()
+        while True:
+            if self._abort.is_set() and item is not _END:
+                raise _Aborted()
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self._abort.is_set():
+                    return  # downstream is gone; don't block on the end marker
+        waited[0] += time.perf_counter() - t0
+        if item is not _END:
+            QUEUE_DEPTH.labels(stage).inc()
+
+    def _drain(self, q: queue.Queue, stage: str, waited: List[float]) -> Iterator[Any]:
+        while True:
+            t0 = time.perf_counter()
+            while True:
+                if self._abort.is_set():
+                    raise _Aborted()
+                try:
+                    item = q.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    pass
+            waited[0] += time.perf_counter() - t0
+            if item is _END:
+                return
+            QUEUE_DEPTH.labels(stage).dec()
+            yield item
+
+    def _spawn(self, name: str, fn: Callable[[Optional[Iterator[Any]]], Iterator[Any]],
+               inq: Optional[queue.Queue], outq: Optional[queue.Queue], nxt: Optional[str]) -> threading.Thread:
+        items, busy = STAGE_ITEMS.labels(self.label, name), STAGE_BUSY.labels(self.label, name)
+
+        def body():
+            waited = [0.0]
+            t0 = time.perf_counter()
+            with tracing.span("ingest.stage." + name, feed=self.feed) as sp:
+                try:
+                    for out in fn(self._drain(inq, name, waited) if inq is not None else None):
+                        items.inc(len(out))
+                        if outq is not None:
+                            self._put(outq, nxt, out, waited)
+                except _Aborted:
+                    pass
+                except BaseException as exc:
+                    if self._error is None:
+                        self._error = exc
+                    self._abort.set()
+                finally:
+                    if outq is not None:
+                        self._put(outq, nxt, _END, waited)
+                    spent = max(0.0, time.perf_counter() - t0 - waited[0])
+                    self.stages[name] = round(spent, 6)
+                    busy.inc(spent)
+                    if sp is not None:
+                        sp.set("busy_s", round(spent, 6))
+                        sp.set("queue_wait_s", round(waited[0], 6))
+
+        # each stage thread continues the trace run() was called in
+        return threading.Thread(target=tracing.bind(body), name=f"ingest-{self.feed}-{name}", daemon=True)
+
+    # ---------- stages ----------
+    def _fetch(self, _: None) -> Iterator[bytes]:
+        yield from (self.source if self.source is not None else stream_feed(self.feed))
+
+    def _parse(self, chunks: Iterator[bytes]) -> Iterator[QuakeBatch]:
+        yield from adapter_for(self.feed).batches(chunks, self.chunk_rows, self._timings)
+
+    def _store(self, batches: Iterator[QuakeBatch]) -> Iterator[QuakeBatch]:
+        seen = FEATURES_SEEN.labels(self.label)
+        counted = {r: FEATURES.labels(self.label, r) for r in FEATURE_RESULTS}
+        for batch in batches:
+            stats: Dict[str, float] = {}
+            new = self.writer.submit_quakes(batch, stats).result()
+            batch.stored_ms = self.now_ms()
+            revised = stats.get("revised", 0)
+            self.new += new
+            self.revised += revised
+            self.dropped += batch.dropped
+            self.ingested += len(batch)
+            seen.inc(len(batch) + batch.dropped)
+            counted["dropped"].inc(batch.dropped)
+            counted["new"].inc(new)
+            counted["revised"].inc(revised)
+            counted["duplicate"].inc(len(batch) - new - revised)
+            # only quakes this poll added; old big events stay in the day/week feeds
+            top = stats.get("max_new_mag")
+            if top is not None:
+                self.max_mag = top if self.max_mag is None else max(self.max_mag, top)
+            yield batch
+
+    def _match(self, batches: Iterator[QuakeBatch]) -> Iterator[List[Tuple[QuakeRow, Rule]]]:
+        rules = [Rule(**r) for r in list_rules()]
+        for batch in batches:
+            pairs = [(batch[i], r) for i, r in match_batch(batch, rules)]
+            if pairs:
+                yield pairs
+
+    def _alert_write(self, pairs_batches: Iterator[List[Tuple[QuakeRow, Rule]]]) -> Iterator[List[Tuple[QuakeRow, Rule, int]]]:
+        for pairs in pairs_batches:
+            now_ms = self.now_ms()
+            by_key = {(q["id"], r.id): (q, r) for q, r in pairs}
+            inserted = self.writer.submit_alerts([alert_snapshot(q, r, now_ms) for q, r in pairs]).result()
+            alerted_ms = self.now_ms()
+            fresh = [by_key[(a["quake_id"], a["rule_id"])] + (alerted_ms,) for a in inserted]
+            for q, r, _ in fresh:
+                self._observe_alert(q, rule_class(r), alerted_ms)
+            if fresh:
+                yield fresh
+
+    def _observe_alert(self, q: QuakeRow, cls: str, alerted_ms: int) -> None:
+        # one observation per new alert, so re-polls of a known quake don't skew the feed lag
+        ingested_ms = q.batch.stored_ms
+        ALERT_ORIGIN_TO_INGEST.labels(self.label, cls).observe(max(0, ingested_ms - q["time_ms"]) / 1000.0)
+        ALERT_UPDATED_TO_INGEST.labels(self.label, cls).observe(max(0, ingested_ms - q["updated_ms"]) / 1000.0)
+        ALERT_INGEST_TO_INSERT.labels(self.label, cls).observe(max(0, alerted_ms - ingested_ms) / 1000.0)
+
+    def _publish(self, fresh_batches: Iterator[List[Tuple[QuakeRow, Rule, int]]]) -> Iterator[Any]:
+        for fresh in fresh_batches:
+            for q, r, alerted_ms in fresh:
+                # the timestamps ride along so the SSE side can record the last hop
+                bus.publish({"type": "QuakeDetected", "feed": self.feed,
+                             "rule": {"id": r.id, "name": r.name, "class": rule_class(r)},
+                             "quake": dict(q), "ingested_ms": q.batch.stored_ms, "alerted_ms": alerted_ms})
+                ALERT_COUNT.inc()
+                self.alerts.append({"quake_id": q["id"], "rule_id": r.id, "mag": q["mag"], "place": q["place"]})
+        yield from ()
+
+    # ---------- run ----------
+    def run(self) -> Dict:
+        with tracing.span("ingest.pipeline", feed=self.feed) as sp:
+            result = self._run()
+            if sp is not None:
+                for key in ("ingested", "new", "revised", "dropped"):
+                    sp.set(key, result[key])
+            return result
+
+    def _run(self) -> Dict:
+        fns = [self._fetch, self._parse, self._store, self._match, self._alert_write, self._publish]
+        queues = self._queues = [queue.Queue(maxsize=self.queue_slots) for _ in STAGES[1:]]
+        _running.add(self)
+        threads = []
+        for i, (name, fn) in enumerate(zip(STAGES, fns)):
+            inq = queues[i - 1] if i > 0 else None
+            outq = queues[i] if i < len(queues) else None
+            nxt = STAGES[i + 1] if i + 1 < len(STAGES) else None
+            threads.append(self._spawn(name, fn, inq, outq, nxt))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        _running.discard(self)
+        for name, q in zip(STAGES[1:], queues):
+            # anything left behind after an abort no longer counts as queued
+            QUEUE_DEPTH.labels(name).dec(sum(1 for item in list(q.queue) if item is not _END))
+        if self._error is not None:
+            raise self._error
+        self._observe()
+        return {"ingested": self.ingested, "new": self.new, "revised": self.revised, "dropped": self.dropped,
+                "max_mag": self.max_mag, "alerts": self.alerts}
+
+    def _observe(self) -> None:
+        normalize = self._timings.get("normalize", 0.0)
+        spent = {
+            "fetch": self.stages.get("fetch", 0.0),
+            "decode": max(0.0, self.stages.get("parse", 0.0) - normalize),
+            "normalize": normalize,
+            "upsert": self.stages.get("store", 0.0),
+            "match": self.stages.get("match", 0.0),
+            "alert_insert": self.stages.get("alert_write", 0.0),
+            "publish": self.stages.get("publish", 0.0),
+        }
+        for stage in TIMED_STAGES:
+            INGEST_STAGE_SECONDS.labels(self.label, stage).observe(spent[stage])
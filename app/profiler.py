@@ -0,0 +1,117 @@
+# app/profiler.py
+"""
+On-demand profiling of the live process, no agent or restart needed.
+
+    curl -H "X-Admin-Token: $TOKEN" "localhost:8000/debug/profile?seconds=10&mode=cpu" > cpu.folded
+    flamegraph.pl cpu.folded > cpu.svg      # or drop the file on speedscope.app
+
+cpu: the calling thread (a request worker for the endpoint) samples every
+other thread's stack via sys._current_frames() `hz` times a second and
+counts identical stacks. Nothing is installed in the profiled threads (no
+settrace/setprofile), so the cost is one stack walk per thread per sample,
+on the sampling thread, holding the GIL.
+
+alloc: tracemalloc runs for the window (started and stopped here unless it
+was already on) and the difference between the start and end snapshots is
+reported, weighted by bytes still allocated at the end.
+
+Both give collapsed stacks ("frame;frame;frame count" lines, root first)
+and a top-N list. Only one profile runs at a time.
+"""
+from __future__ import annotations
+import sys, threading, time, tracemalloc
+from collections import Counter
+from typing import Dict, List, Tuple
+
+MAX_SECONDS = 60.0
+MAX_DEPTH = 128
+ALLOC_FRAMES = 32
+
+_busy = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """Another profile is already running."""
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{code.co_firstlineno}"
+
+def sample_stacks(seconds: float, hz: float = 100.0) -> Tuple[Counter, int]:
+    """(collapsed stack -> samples, ticks taken) over `seconds`; stacks are rooted at the thread name."""
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    interval = 1.0 / max(1.0, min(hz, 1000.0))
+    stacks: Counter = Counter()
+    ticks = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            parts: List[str] = []
+            while frame is not None and len(parts) < MAX_DEPTH:
+                parts.append(_frame_name(frame))
+                frame = frame.f_back
+            if ident not in names:
+                names = {t.ident: t.name for t in threading.enumerate()}
+            parts.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(parts))] += 1
+        ticks += 1
+        time.sleep(interval)
+    return stacks, ticks
+
+def trace_allocations(seconds: float, top: int = 25) -> Tuple[Counter, List[Dict]]:
+    """(collapsed stack -> bytes, top allocation sites) for memory allocated and still live after `seconds`."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(ALLOC_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    skip = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    before, after = before.filter_traces(skip), after.filter_traces(skip)
+    stacks: Counter = Counter()
+    for stat in after.compare_to(before, "traceback"):
+        if stat.size_diff > 0:
+            # tracemalloc tracebacks iterate oldest frame first, the same order as collapsed stacks
+            frames = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+            stacks[";".join(frames)] += stat.size_diff
+    sites = [
+        {"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size_diff": s.size_diff,
+         "count_diff": s.count_diff, "size": s.size}
+        for s in after.compare_to(before, "lineno")[:top]
+    ]
+    return stacks, sites
+
+def collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+def _top_leaves(stacks: Counter, top: int) -> List[Dict]:
+    leaves: Counter = Counter()
+    for stack, n in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += n
+    total = sum(leaves.values()) or 1
+    return [{"frame": f, "samples": n, "share": round(n / total, 4)} for f, n in leaves.most_common(top)]
+
+def profile(seconds: float, mode: str = "cpu", hz: float = 100.0, top: int = 25) -> Dict:
+    """Run one profile in the calling thread (blocks for `seconds`). Raises ProfilerBusy if one is running."""
+    if mode not in ("cpu", "alloc"):
+        raise ValueError(f"unknown profile mode {mode!r}")
+    seconds = max(0.1, min(float(seconds), MAX_SECONDS))
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        t0 = time.perf_counter()
+        if mode == "cpu":
+            stacks, ticks = sample_stacks(seconds, hz)
+            out = {"samples": ticks, "top": _top_leaves(stacks, top)}
+        else:
+            stacks, sites = trace_allocations(seconds, top)
+            out = {"bytes": sum(stacks.values()), "top": sites}
+        return {"mode": mode, "seconds": round(time.perf_counter() - t0, 3), **out, "collapsed": collapsed(stacks)}
+    finally:
+        _busy.release()
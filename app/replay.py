@@ -0,0 +1,194 @@
+# app/replay.py
+"""
+Replay archived (or synthetic) feed snapshots through the real ingest path
+against a scratch database, without touching USGS.
+
+    python -m app.replay --dir snapshots/ --speed 60
+    python -m app.replay --synthetic 120 --seed 7 --speed 0
+
+Snapshots are GeoJSON FeatureCollections as served by the summary feeds
+(`*.geojson`, `*.json`, optionally `.gz`), replayed in `metadata.generated`
+order. Each one goes through run_ingest() exactly like a poll would. With
+`--speed N` the gaps between snapshots are compressed N times; `--speed 0`
+replays back to back. Alert timestamps follow the snapshot clock, so the
+counts and the alert digest in the report are the same on every run and
+only the timing figures vary.
+"""
+from __future__ import annotations
+import argparse, gzip, hashlib, json, math, random, re, tempfile, time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app import db, shards
+from app.ingest import run_ingest
+from app.pipeline import STAGES
+from app.writer import DbWriter
+
+CHUNK = 64 * 1024
+SYNTHETIC_START_MS = 1_700_000_000_000
+DEFAULT_RULES = (("M2.5+", 2.5, None), ("M4.5+", 4.5, None), ("US West Coast", 1.5, "-125,32,-114,49"))
+
+_GENERATED = re.compile(rb'"generated"\s*:\s*(\d+)')
+
+Snapshot = Tuple[int, str, bytes]  # (generated_ms, name, body)
+
+# ---------- sources ----------
+def load_snapshots(directory: Path) -> List[Snapshot]:
+    """All snapshot files under `directory`, oldest `metadata.generated` first."""
+    snaps = []
+    for path in sorted(Path(directory).iterdir()):
+        name = path.name
+        if not name.endswith((".geojson", ".json", ".geojson.gz", ".json.gz")):
+            continue
+        body = path.read_bytes()
+        if name.endswith(".gz"):
+            body = gzip.decompress(body)
+        # USGS puts metadata first, so the head of the file is enough
+        m = _GENERATED.search(body[:4096])
+        generated = int(m.group(1)) if m else int(path.stat().st_mtime * 1000)
+        snaps.append((generated, name, body))
+    snaps.sort(key=lambda s: (s[0], s[1]))
+    return snaps
+
+def synthetic_snapshots(count: int, seed: int = 7, interval_s: float = 60.0,
+                        rate_per_min: float = 2.5, window_s: float = 3600.0) -> Iterator[Snapshot]:
+    """
+    A seeded stand-in for polling all_hour every `interval_s`: quakes arrive
+    as a Poisson process, magnitudes follow Gutenberg-Richter (b=1) from
+    M1.0, a third of them fall in California like in the real feed, and
+    each snapshot lists the quakes of the trailing `window_s`, so
+    consecutive snapshots overlap like the real feed does.
+    """
+    rnd = random.Random(seed)
+    quakes: List[Dict] = []
+    t = float(SYNTHETIC_START_MS)
+    n = 0
+    for i in range(count):
+        now = SYNTHETIC_START_MS + int((i + 1) * interval_s * 1000)
+        while True:
+            t += rnd.expovariate(rate_per_min / 60_000.0)
+            if t > now:
+                t = float(now)
+                break
+            n += 1
+            if rnd.random() < 1 / 3:
+                lon, lat = rnd.uniform(-124, -115), rnd.uniform(33, 41)
+            else:
+                lon, lat = rnd.uniform(-180, 180), rnd.uniform(-70, 70)
+            quakes.append({
+                "type": "Feature", "id": f"syn{seed}x{n}",
+                "properties": {"time": int(t), "mag": round(1.0 + rnd.expovariate(math.log(10)), 2),
+                               "place": f"{rnd.randint(1, 120)} km {rnd.choice('NSEW')} of Synthetic"},
+                "geometry": {"type": "Point",
+                             "coordinates": [round(lon, 4), round(lat, 4), round(rnd.uniform(0, 700), 2)]},
+            })
+        live = [q for q in quakes if q["properties"]["time"] > now - window_s * 1000]
+        quakes = live
+        doc = {"type": "FeatureCollection",
+               "metadata": {"generated": now, "title": "synthetic", "count": len(live)},
+               "features": list(reversed(live))}
+        yield now, f"synthetic-{i:05d}", json.dumps(doc).encode()
+
+def _chunked(body: bytes, size: int = CHUNK) -> Iterator[bytes]:
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def _percentiles(xs: Sequence[float]) -> Dict[str, float]:
+    xs = sorted(xs)
+    if not xs:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    pick = lambda p: xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+    return {"p50_ms": round(pick(50) * 1000, 3), "p95_ms": round(pick(95) * 1000, 3),
+            "p99_ms": round(pick(99) * 1000, 3), "max_ms": round(xs[-1] * 1000, 3)}
+
+# ---------- replay ----------
+def replay(snapshots: Iterable[Snapshot], speed: float = 0.0, feed: str = "replay",
+           writer: Optional[DbWriter] = None, sleep=time.sleep) -> Dict:
+    """
+    Ingest each snapshot in turn on the current app.db database and return
+    the report. The caller owns the database (see main()).
+    """
+    own_writer = writer is None
+    writer = writer or DbWriter()
+    stage_times: Dict[str, List[float]] = {s: [] for s in STAGES}
+    ingest_times: List[float] = []
+    totals = {"snapshots": 0, "ingested": 0, "new": 0, "alerts": 0}
+    digest = hashlib.sha256()
+    prev_gen: Optional[int] = None
+    wall0 = time.perf_counter()
+    try:
+        for generated, _name, body in snapshots:
+            if speed > 0 and prev_gen is not None:
+                # sleep whatever is left of the compressed gap after the last ingest
+                due = last_start + max(0, generated - prev_gen) / 1000.0 / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    sleep(delay)
+            prev_gen, last_start = generated, time.perf_counter()
+
+            stages: Dict[str, float] = {}
+            t0 = time.perf_counter()
+            result = run_ingest(feed, stages=stages, source=_chunked(body), writer=writer,
+                                now_ms=lambda g=generated: g)
+            ingest_times.append(time.perf_counter() - t0)
+            for s, secs in stages.items():
+                stage_times[s].append(secs)
+
+            totals["snapshots"] += 1
+            totals["ingested"] += result["ingested"]
+            totals["new"] += result["new"]
+            totals["alerts"] += len(result["alerts"])
+            for a in sorted(result["alerts"], key=lambda a: (a["quake_id"], a["rule_id"])):
+                digest.update(f"{a['quake_id']}:{a['rule_id']}\n".encode())
+    finally:
+        if own_writer:
+            writer.stop()
+    wall = time.perf_counter() - wall0
+    busy = sum(ingest_times)
+    return {
+        **totals,
+        "alert_digest": digest.hexdigest()[:16],
+        "speed": speed,
+        "wall_s": round(wall, 3),
+        "ingest_s": round(busy, 3),
+        "quakes_per_s": round(totals["ingested"] / busy, 1) if busy else 0.0,
+        "ingest": _percentiles(ingest_times),
+        "stages": {s: _percentiles(v) for s, v in stage_times.items()},
+    }
+
+def seed_rules(rules: Sequence[Tuple[str, float, Optional[str]]] = DEFAULT_RULES) -> None:
+    for name, min_mag, bbox in rules:
+        db.create_rule(name, min_mag, bbox)
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay feed snapshots through the ingest pipeline")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dir", type=str, help="Directory of GeoJSON feed snapshots")
+    src.add_argument("--synthetic", type=int, metavar="N", help="Replay N generated snapshots instead")
+    ap.add_argument("--seed", type=int, default=7, help="Seed for --synthetic")
+    ap.add_argument("--interval", type=float, default=60.0, help="Seconds between synthetic snapshots")
+    ap.add_argument("--rate", type=float, default=2.5, help="Synthetic quakes per minute")
+    ap.add_argument("--speed", type=float, default=0.0, help="N x real time; 0 = as fast as possible")
+    ap.add_argument("--db", type=str, default=None, help="Database file (default: a temporary one)")
+    args = ap.parse_args()
+
+    snapshots = (load_snapshots(Path(args.dir)) if args.dir
+                 else synthetic_snapshots(args.synthetic, args.seed, args.interval, args.rate))
+    saved = db.DB_PATH, shards.SHARD_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        # never touch the real database or shards/ (QUAKE_HUB_STORAGE=sharded)
+        path = Path(args.db) if args.db else Path(tmp) / "replay.db"
+        db.DB_PATH = path.as_posix()
+        shards.SHARD_DIR = path.with_name(path.stem + "-shards")
+        try:
+            db.init_db()
+            if not db.list_rules():
+                seed_rules()
+            report = replay(snapshots, speed=args.speed)
+            db.get_read_pool().close()
+        finally:
+            db.DB_PATH, shards.SHARD_DIR = saved
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
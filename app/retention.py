@@ -0,0 +1,206 @@
+# app/retention.py
+from __future__ import annotations
+import argparse, gzip, json, os, sqlite3, time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app import shards
+from app.db import init_db, get_conn
+
+DAY_MS = 86_400_000
+ARCHIVE_DIR = Path(os.environ.get("QUAKE_HUB_ARCHIVE_DIR", Path(__file__).resolve().parent.parent / "archive"))
+BATCH = 2000
+
+@dataclass
+class RetentionPolicy:
+    table: str       # 'quakes' or 'alerts'
+    time_col: str    # column the age is measured on
+    keep_days: float
+
+def default_policies() -> List[RetentionPolicy]:
+    return [
+        RetentionPolicy("quakes", "time_ms",    float(os.environ.get("QUAKE_HUB_KEEP_QUAKES_DAYS", "90"))),
+        RetentionPolicy("alerts", "created_ms", float(os.environ.get("QUAKE_HUB_KEEP_ALERTS_DAYS", "365"))),
+    ]
+
+def _append_archive(archive_dir: Path, table: str, rows: List[Dict], time_col: str) -> None:
+    """Append rows to <table>-YYYY-MM.ndjson.gz; each call adds one gzip member."""
+    by_month: Dict[str, List[Dict]] = {}
+    for r in rows:
+        by_month.setdefault(shards.month_of(r[time_col]), []).append(r)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    for month, part in by_month.items():
+        path = archive_dir / f"{table}-{month}.ndjson.gz"
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                for r in part:
+                    gz.write((json.dumps(r, separators=(",", ":")) + "\n").encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+
+def _day_totals(rows: List[Dict], days: Optional[Dict[str, List[float]]] = None) -> Dict[str, List[float]]:
+    """Fold rows into {day: [n, sum_mag, max_mag]}, adding to `days` if given."""
+    days = {} if days is None else days
+    for r in rows:
+        day = datetime.fromtimestamp(r["time_ms"] / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        agg = days.setdefault(day, [0, 0.0, float("-inf")])
+        agg[0] += 1
+        agg[1] += r["mag"]
+        agg[2] = max(agg[2], r["mag"])
+    return days
+
+def _rollup(conn: sqlite3.Connection, rows: List[Dict]) -> None:
+    _apply_rollup(conn, _day_totals(rows))
+
+def _apply_rollup(conn: sqlite3.Connection, days: Dict[str, List[float]]) -> None:
+    conn.executemany(
+        """
+        INSERT INTO quake_daily_rollup(day, n, sum_mag, max_mag) VALUES (?,?,?,?)
+        ON CONFLICT(day) DO UPDATE SET
+          n       = n + excluded.n,
+          sum_mag = sum_mag + excluded.sum_mag,
+          max_mag = MAX(max_mag, excluded.max_mag)
+        """,
+        [(d, n, s, m) for d, (n, s, m) in days.items()],
+    )
+
+def apply_policy(conn: sqlite3.Connection, policy: RetentionPolicy, now_ms: int,
+                 archive_dir: Path = ARCHIVE_DIR, batch: int = BATCH) -> int:
+    """
+    Move rows older than the policy cutoff to the monthly archive, `batch` rows
+    per transaction so the writer is never locked out for long. Archive files
+    are written (and fsynced) before the rows are deleted, so a crash can at
+    worst archive a batch twice, never lose it.
+    """
+    cutoff = now_ms - int(policy.keep_days * DAY_MS)
+    if policy.table == "quakes" and shards.enabled():
+        return _archive_shards(conn, cutoff, archive_dir, batch)
+    moved = 0
+    while True:
+        rows = [dict(r) for r in conn.execute(
+            f"SELECT * FROM {policy.table} WHERE {policy.time_col} < ? ORDER BY {policy.time_col} LIMIT ?",
+            (cutoff, batch),
+        )]
+        if not rows:
+            return moved
+        _append_archive(archive_dir, policy.table, rows, policy.time_col)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if policy.table == "quakes":
+                _rollup(conn, rows)
+            conn.executemany(f"DELETE FROM {policy.table} WHERE id = ?", [(r["id"],) for r in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        moved += len(rows)
+
+def _archive_shards(conn: sqlite3.Connection, cutoff: int, archive_dir: Path, batch: int) -> int:
+    """
+    Sharded storage ages out whole months: a frozen shard that ends before
+    the cutoff is archived, rolled up and its file removed.
+
+    The shard is archived batch by batch, but its rollup is staged and
+    applied in one transaction together with the month's archived_shards
+    row. A run that dies partway re-archives the month from the start (the
+    archive may hold a batch twice, as in apply_policy) without adding any
+    of it to the rollup twice; a month already recorded is only unlinked.
+    """
+    moved = 0
+    for month in reversed(shards.existing_months()):
+        if shards.month_end_ms(month) > cutoff:
+            break
+        if not shards.is_frozen(month):
+            continue  # may still be attached by the writer; freeze first
+        path = shards.shard_path(month)
+        if conn.execute("SELECT 1 FROM archived_shards WHERE month = ?", (month,)).fetchone() is None:
+            days: Dict[str, List[float]] = {}
+            rows_in_month = 0
+            src = sqlite3.connect(path.resolve().as_uri() + "?mode=ro&immutable=1", uri=True)
+            src.row_factory = sqlite3.Row
+            try:
+                cur = src.execute("SELECT * FROM quakes ORDER BY time_ms")
+                while True:
+                    rows = [dict(r) for r in cur.fetchmany(batch)]
+                    if not rows:
+                        break
+                    _append_archive(archive_dir, "quakes", rows, "time_ms")
+                    _day_totals(rows, days)
+                    rows_in_month += len(rows)
+            finally:
+                src.close()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _apply_rollup(conn, days)
+                conn.execute("INSERT INTO archived_shards(month, rows, archived_ms) VALUES (?,?,?)",
+                             (month, rows_in_month, int(time.time() * 1000)))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            moved += rows_in_month
+        path.chmod(0o600)
+        path.unlink()
+    return moved
+
+def run_retention(policies: Optional[List[RetentionPolicy]] = None, now_ms: Optional[int] = None,
+                  archive_dir: Path = ARCHIVE_DIR, batch: int = BATCH) -> Dict[str, int]:
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    conn = get_conn()
+    conn.isolation_level = None
+    try:
+        if shards.enabled():
+            shards.freeze_old_shards(now_ms)
+        moved = {p.table: apply_policy(conn, p, now_ms, Path(archive_dir), batch) for p in (policies or default_policies())}
+        # hand the freed pages back and keep the WAL from holding on to them
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return moved
+    finally:
+        conn.close()
+
+def enable_incremental_vacuum() -> bool:
+    """
+    Switch a database created before auto_vacuum=INCREMENTAL over to it.
+    That takes a full VACUUM (rewrites the file, needs the write lock and
+    as much free disk again), so run it once, off-peak. Returns whether a
+    VACUUM was needed.
+    """
+    conn = get_conn()
+    conn.isolation_level = None
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Archive and prune old quakes/alerts")
+    ap.add_argument("--quakes-days", type=float, default=None, help="Keep raw quakes this many days")
+    ap.add_argument("--alerts-days", type=float, default=None, help="Keep alerts this many days")
+    ap.add_argument("--archive-dir", type=str, default=str(ARCHIVE_DIR))
+    ap.add_argument("--batch", type=int, default=BATCH)
+    ap.add_argument("--vacuum", action="store_true",
+                    help="Once, on databases created before incremental auto_vacuum: switch over (full VACUUM)")
+    args = ap.parse_args()
+
+    init_db()
+    if args.vacuum:
+        print("auto_vacuum=INCREMENTAL " + ("enabled (VACUUM done)" if enable_incremental_vacuum() else "already on"))
+    policies = default_policies()
+    for p in policies:
+        override = args.quakes_days if p.table == "quakes" else args.alerts_days
+        if override is not None:
+            p.keep_days = override
+
+    moved = run_retention(policies, archive_dir=Path(args.archive_dir), batch=args.batch)
+    for table, n in moved.items():
+        print(f"{table}: archived {n} rows -> {args.archive_dir}")
+
+if __name__ == "__main__":
+    main()
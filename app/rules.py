@@ -1,6 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional, Tuple, Mapping, Any
+from typing import Optional, Tuple, Mapping, Any, List, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.usgs import QuakeBatch
 
 @dataclass
 class Rule:
@@ -9,6 +12,12 @@ class Rule:
     min_mag: float
     bbox: Optional[str] = None 
 
+def rule_class(rule: Rule) -> str:
+    """Low-cardinality metric label: 'global' or 'regional' plus the magnitude band, e.g. 'regional/m2.5+'."""
+    m = float(rule.min_mag)
+    band = "m6+" if m >= 6 else "m4.5+" if m >= 4.5 else "m2.5+" if m >= 2.5 else "all"
+    return f"{'regional' if rule.bbox else 'global'}/{band}"
+
 def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
     lon1, lat1, lon2, lat2 = map(float, bbox.split(","))
     # normalize so lon1<=lon2 and lat1<=lat2
@@ -31,3 +40,23 @@ def quake_matches_rule(quake: Mapping[str, Any], rule: Rule) -> bool:
         if not (lon1 <= lon <= lon2 and lat1 <= lat <= lat2):
             return False
     return True
+
+def match_batch(batch: "QuakeBatch", rules: Sequence[Rule]) -> List[Tuple[int, Rule]]:
+    """
+    Column-wise equivalent of quake_matches_rule over a whole QuakeBatch.
+    Returns (row index, rule) pairs. Each rule is one pass over the mag
+    (and, with a bbox, lon/lat) columns instead of one dict lookup per field
+    per quake.
+    """
+    out: List[Tuple[int, Rule]] = []
+    mags, lons, lats = batch.mag, batch.lon, batch.lat
+    for rule in rules:
+        min_mag = float(rule.min_mag)
+        if rule.bbox:
+            lon1, lat1, lon2, lat2 = parse_bbox(rule.bbox)
+            hits = [i for i, (m, lon, lat) in enumerate(zip(mags, lons, lats))
+                    if m >= min_mag and lon1 <= lon <= lon2 and lat1 <= lat <= lat2]
+        else:
+            hits = [i for i, m in enumerate(mags) if m >= min_mag]
+        out.extend((i, rule) for i in hits)
+    return out
@@ -0,0 +1,63 @@
+# app/runtime.py
+"""
+Saturation signals for the web process, sampled from inside the event loop.
+
+Sync endpoints and the SSE generator run on anyio's default thread limiter
+(40 tokens unless changed), so "in_use == total with tasks waiting" means
+requests are queueing for a thread rather than for the database. The same
+probe measures event-loop lag: how much later than asked an
+asyncio.sleep(interval) wakes up, which is time the loop spent blocked
+on something else.
+
+Every QUAKE_HUB_MEMSTATS_S the probe also refreshes the app.memstats
+gauges, off the loop.
+
+Started and stopped by main.lifespan; QUAKE_HUB_RUNTIME_PROBE_S sets the
+period (0 disables it).
+"""
+from __future__ import annotations
+import asyncio, os
+from typing import Optional
+
+import anyio.to_thread
+
+from app import memstats
+from app.metrics import THREADPOOL_TOKENS, THREADPOOL_WAITING, LOOP_LAG, LOOP_LAG_LAST
+
+PROBE_S = float(os.environ.get("QUAKE_HUB_RUNTIME_PROBE_S", "0.5"))
+
+def sample_threadpool() -> None:
+    """Record the default limiter's occupancy; must run on the event loop."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    THREADPOOL_TOKENS.labels("in_use").set(stats.borrowed_tokens)
+    THREADPOOL_TOKENS.labels("total").set(stats.total_tokens)
+    THREADPOOL_WAITING.set(stats.tasks_waiting)
+
+async def probe(interval: float = PROBE_S) -> None:
+    loop = asyncio.get_running_loop()
+    next_memstats = loop.time()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - t0 - interval)
+        LOOP_LAG.observe(lag)
+        LOOP_LAG_LAST.set(lag)
+        sample_threadpool()
+        if memstats.REFRESH_S > 0 and loop.time() >= next_memstats:
+            next_memstats = loop.time() + memstats.REFRESH_S
+            await loop.run_in_executor(None, memstats.update)
+
+def start_probe(interval: float = PROBE_S) -> Optional[asyncio.Task]:
+    if interval <= 0:
+        return None
+    return asyncio.get_running_loop().create_task(probe(interval), name="runtime-probe")
+
+async def stop_probe(task: Optional[asyncio.Task]) -> None:
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
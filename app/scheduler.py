@@ -0,0 +1,158 @@
+# app/scheduler.py
+from __future__ import annotations
+import logging, os, random, threading, time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from app.usgs import FEEDS
+from app.metrics import FEED_POLLS, FEED_INTERVAL, FEED_LAST_SUCCESS, FEED_FRESHNESS_LAG
+
+log = logging.getLogger(__name__)
+
+# base cadence per feed (seconds); override with QUAKE_HUB_FEED_INTERVALS="all_hour=30,all_week=3600"
+DEFAULT_INTERVALS: Dict[str, float] = {
+    "all_hour": 30, "all_day": 120, "all_week": 3600, "all_month": 3600,
+    "2.5_day": 120, "2.5_week": 1800, "4.5_day": 300, "significant_week": 600,
+}
+JITTER = 0.1            # +/- fraction of the interval
+ACTIVE_MAG = 4.5        # a new quake at least this big means "speed up"
+ACTIVE_NEW = 25         # ...as does this many new quakes in one poll
+SPEEDUP, SLOWDOWN = 0.5, 1.5
+
+def scheduler_enabled() -> bool:
+    return os.environ.get("QUAKE_HUB_SCHEDULER", "1") not in ("0", "false", "no")
+
+def configured_intervals() -> Dict[str, float]:
+    intervals = {f: DEFAULT_INTERVALS.get(f, 600.0) for f in FEEDS}
+    for item in filter(None, os.environ.get("QUAKE_HUB_FEED_INTERVALS", "").split(",")):
+        feed, _, secs = item.partition("=")
+        intervals[feed.strip()] = float(secs)
+    return {f: s for f, s in intervals.items() if s > 0}
+
+@dataclass
+class FeedState:
+    feed: str
+    base_s: float
+    interval_s: float
+    next_run: float = 0.0
+    running: bool = False
+    last_success: Optional[float] = None  # wall clock, seconds
+
+    @property
+    def min_s(self) -> float:
+        return max(5.0, self.base_s / 4)
+
+    @property
+    def max_s(self) -> float:
+        return self.base_s * 8
+
+class FeedScheduler:
+    """
+    Polls every configured feed on its own cadence.
+
+    After each poll the interval adapts: halve it (down to base/4) when the
+    poll brought a big quake or a burst of new ones, stretch it 1.5x (up to
+    8x base) when nothing new arrived, otherwise drift back to base. Errors
+    back off like an unchanged feed. A feed is never started again while its
+    previous poll is still running.
+    """
+
+    def __init__(self, ingest: Callable[[str], Dict], intervals: Optional[Dict[str, float]] = None,
+                 executor: Optional[Executor] = None, jitter: float = JITTER,
+                 clock: Callable[[], float] = time.monotonic, rng: Optional[random.Random] = None):
+        self.ingest = ingest
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.feeds: Dict[str, FeedState] = {}
+        now = clock()
+        for feed, secs in (intervals if intervals is not None else configured_intervals()).items():
+            # spread first polls over a few seconds rather than all at once
+            self.feeds[feed] = FeedState(feed, secs, secs, next_run=now + self.rng.uniform(0, min(secs, 5.0)))
+            FEED_INTERVAL.labels(feed).set(secs)
+        self._own_executor = executor is None
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- lifecycle ----------
+    # start/stop may repeat, e.g. as leadership moves between processes
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="feed-poll")
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="feed-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(min(1.0, max(0.05, self.seconds_until_next())))
+
+    # ---------- scheduling ----------
+    def seconds_until_next(self) -> float:
+        with self._lock:
+            idle = [s.next_run for s in self.feeds.values() if not s.running]
+        return (min(idle) - self.clock()) if idle else 1.0
+
+    def tick(self) -> List[str]:
+        """Start every due feed that isn't already running. Returns the feeds started."""
+        now = self.clock()
+        started = []
+        with self._lock:
+            for s in self.feeds.values():
+                if s.last_success is not None:
+                    FEED_FRESHNESS_LAG.labels(s.feed).set(time.time() - s.last_success)
+                if s.next_run > now:
+                    continue
+                if s.running:
+                    FEED_POLLS.labels(s.feed, "overlap_skipped").inc()
+                    continue
+                s.running = True
+                started.append(s.feed)
+        for feed in started:
+            self._executor.submit(self._poll, feed)
+        return started
+
+    def _poll(self, feed: str) -> None:
+        result: Optional[Dict] = None
+        try:
+            result = self.ingest(feed)
+        except Exception:
+            log.exception("scheduled ingest of %s failed", feed)
+        with self._lock:
+            s = self.feeds[feed]
+            s.running = False
+            outcome = self._adapt(s, result)
+            s.next_run = self.clock() + s.interval_s * (1 + self.rng.uniform(-self.jitter, self.jitter))
+        FEED_POLLS.labels(feed, outcome).inc()
+        FEED_INTERVAL.labels(feed).set(s.interval_s)
+        if result is not None:
+            FEED_LAST_SUCCESS.labels(feed).set(s.last_success)
+            FEED_FRESHNESS_LAG.labels(feed).set(0)
+
+    def _adapt(self, s: FeedState, result: Optional[Dict]) -> str:
+        if result is None:
+            s.interval_s = min(s.max_s, s.interval_s * SLOWDOWN)
+            return "error"
+        s.last_success = time.time()
+        new = result.get("new", 0)
+        if new and ((result.get("max_mag") or 0) >= ACTIVE_MAG or new >= ACTIVE_NEW):
+            s.interval_s = max(s.min_s, s.interval_s * SPEEDUP)
+            return "active"
+        if not new:
+            s.interval_s = min(s.max_s, s.interval_s * SLOWDOWN)
+            return "unchanged"
+        s.interval_s = s.base_s
+        return "changed"
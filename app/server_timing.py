@@ -0,0 +1,70 @@
+# app/server_timing.py
+"""
+Per-request timing breakdown, returned as a Server-Timing header.
+
+    Server-Timing: db;dur=3.2;desc="7 queries", template;dur=5.9, total;dur=11.4
+
+main.py's middleware opens an accumulator for each request in a ContextVar.
+The endpoint's threadpool thread gets a copy of the context that still
+points at the same dict. SQL statements (app.sqlstats), template
+rendering (timed()) and JSON rendering (TimedJSONResponse) add their time
+to it. Work done on other threads (the DB writer, ingest jobs) is not
+counted against the request.
+
+Browser devtools show the header under Network -> Timing.
+"""
+from __future__ import annotations
+import contextvars, time
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+_current: contextvars.ContextVar = contextvars.ContextVar("quake_hub_server_timing", default=None)
+
+def begin() -> contextvars.Token:
+    return _current.set({})
+
+def end(token: contextvars.Token) -> Dict[str, float]:
+    acc = _current.get()
+    _current.reset(token)
+    return acc or {}
+
+def active() -> bool:
+    return _current.get() is not None
+
+def add(name: str, seconds: float) -> None:
+    acc: Optional[Dict[str, float]] = _current.get()
+    if acc is not None:
+        acc[name] = acc.get(name, 0.0) + seconds
+        acc[name + ".n"] = acc.get(name + ".n", 0) + 1
+
+class timed:
+    """`with timed("template"): ...` adds the block's duration to the current request."""
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        add(self.name, time.perf_counter() - self.t0)
+
+class TimedJSONResponse(JSONResponse):
+    """Default response class, so JSON encoding shows up as `serialization`."""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialization"):
+            return super().render(content)
+
+def header(acc: Dict[str, float], total_s: float) -> str:
+    parts = []
+    for name in ("db", "template", "serialization"):
+        if name in acc:
+            entry = f"{name};dur={acc[name] * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{int(acc["db.n"])} queries"'
+            parts.append(entry)
+    parts.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(parts)
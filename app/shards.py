@@ -0,0 +1,284 @@
+# app/shards.py
+"""
+Optional monthly sharding of the `quakes` table (QUAKE_HUB_STORAGE=sharded).
+
+Each calendar month (UTC, by quake origin time) lives in its own file
+shards/quakes-YYYY-MM.db with the same `quakes` schema. The main database
+keeps rules, alerts and rollups. Queries ATTACH only the shards that overlap
+their time range. Once a month is FREEZE_AFTER_DAYS past its end the shard is
+switched out of WAL and made read-only; readers then open it with
+immutable=1 and it can be cached or copied as a plain file.
+"""
+from __future__ import annotations
+import argparse, logging, os, sqlite3, stat
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+log = logging.getLogger(__name__)
+
+STORAGE_MODE = os.environ.get("QUAKE_HUB_STORAGE", "single")
+SHARD_DIR = Path(os.environ.get("QUAKE_HUB_SHARD_DIR", Path(__file__).resolve().parent.parent / "shards"))
+FREEZE_AFTER_DAYS = float(os.environ.get("QUAKE_HUB_SHARD_FREEZE_DAYS", "35"))
+MAX_ATTACHED = 10  # SQLite's compile-time default for SQLITE_MAX_ATTACHED
+
+SHARD_SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS quakes (
+    id        TEXT PRIMARY KEY,
+    time_ms   INTEGER NOT NULL,
+    mag       REAL    NOT NULL,
+    place     TEXT    NOT NULL,
+    lon       REAL    NOT NULL,
+    lat       REAL    NOT NULL,
+    depth_km  REAL    NOT NULL,
+    updated_ms INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_quakes_time ON quakes(time_ms DESC);
+CREATE INDEX IF NOT EXISTS idx_quakes_mag  ON quakes(mag DESC);
+"""
+
+def enabled() -> bool:
+    return STORAGE_MODE == "sharded"
+
+# ---------- naming ----------
+def month_of(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m")
+
+def month_start_ms(month: str) -> int:
+    return int(datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def month_end_ms(month: str) -> int:
+    y, m = map(int, month.split("-"))
+    y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return month_start_ms(f"{y:04d}-{m:02d}")
+
+def schema_name(month: str) -> str:
+    return "q_" + month.replace("-", "_")
+
+def shard_path(month: str) -> Path:
+    return SHARD_DIR / f"quakes-{month}.db"
+
+def existing_months() -> List[str]:
+    """All shard months on disk, newest first."""
+    if not SHARD_DIR.exists():
+        return []
+    return sorted((p.stem[len("quakes-"):] for p in SHARD_DIR.glob("quakes-????-??.db")), reverse=True)
+
+def months_in_range(start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[str]:
+    """Existing shard months overlapping [start_ms, end_ms), newest first."""
+    return [m for m in existing_months()
+            if (start_ms is None or month_end_ms(m) > start_ms)
+            and (end_ms is None or month_start_ms(m) < end_ms)]
+
+def freeze_due(month: str, now_ms: int) -> bool:
+    """Whether `month` ended FREEZE_AFTER_DAYS or more before now_ms."""
+    return month_end_ms(month) <= now_ms - int(FREEZE_AFTER_DAYS * 86_400_000)
+
+def is_frozen(month: str) -> bool:
+    p = shard_path(month)
+    return p.exists() and not (p.stat().st_mode & stat.S_IWUSR)
+
+# ---------- lifecycle ----------
+def ensure_shard(month: str) -> Path:
+    path = shard_path(month)
+    if not path.exists():
+        SHARD_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.executescript(SHARD_SCHEMA)
+        conn.close()
+    else:
+        conn = sqlite3.connect(path)
+        try:
+            # live shards created before updated_ms existed (frozen ones are never written)
+            if "updated_ms" not in {r[1] for r in conn.execute("PRAGMA table_info(quakes)")}:
+                conn.execute("ALTER TABLE quakes ADD COLUMN updated_ms INTEGER NOT NULL DEFAULT 0")
+                conn.commit()
+        finally:
+            conn.close()
+    return path
+
+def freeze_old_shards(now_ms: int, skipped: Optional[List[str]] = None) -> List[str]:
+    """
+    Make every shard whose month ended FREEZE_AFTER_DAYS ago read-only.
+    A shard another connection still has attached can't leave WAL mode; it
+    is logged, appended to `skipped` and retried on the next run. The
+    writer detaches such shards after each commit (detach_freeze_due).
+    """
+    frozen = []
+    for month in existing_months():
+        if not freeze_due(month, now_ms) or is_frozen(month):
+            continue
+        path = shard_path(month)
+        conn = sqlite3.connect(path)
+        try:
+            # fold the WAL back in so the file is self-contained
+            conn.execute("PRAGMA journal_mode=DELETE")
+        except sqlite3.OperationalError as exc:
+            log.warning("shard %s not frozen (%s); still attached elsewhere?", month, exc)
+            if skipped is not None:
+                skipped.append(month)
+            continue
+        finally:
+            conn.close()
+        path.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        frozen.append(month)
+    return frozen
+
+# ---------- ATTACH routing ----------
+def _read_uri(month: str) -> str:
+    uri = shard_path(month).resolve().as_uri() + "?mode=ro"
+    return uri + "&immutable=1" if is_frozen(month) else uri
+
+@contextmanager
+def attached(conn: sqlite3.Connection, months: List[str]) -> Iterator[List[str]]:
+    """
+    ATTACH the given shard months read-only for the duration of a query and
+    yield their schema names. `conn` must have been opened with uri=True
+    (the read pool's connections are). At most MAX_ATTACHED at a time.
+    """
+    if len(months) > MAX_ATTACHED:
+        raise ValueError(f"can attach at most {MAX_ATTACHED} shards at once")
+    names = []
+    try:
+        for m in months:
+            conn.execute("ATTACH DATABASE ? AS " + schema_name(m), (_read_uri(m),))
+            names.append(schema_name(m))
+        yield names
+    finally:
+        for n in names:
+            conn.execute("DETACH DATABASE " + n)
+
+def chunks(months: List[str], size: int = MAX_ATTACHED) -> Iterator[List[str]]:
+    for i in range(0, len(months), size):
+        yield months[i:i + size]
+
+class ShardCapacityError(Exception):
+    """The shards a write needs don't fit next to the ones still in use."""
+
+def attach_for_write(conn: sqlite3.Connection, months: Iterable[str], evict: bool = True) -> None:
+    """
+    Make sure the writable shards for `months` are attached to a long-lived
+    writer connection. Must run outside a transaction. With `evict`, shards not
+    needed now are detached, oldest attachment first, to stay under
+    MAX_ATTACHED; without it (other pending writes may still use them) a
+    ShardCapacityError is raised instead.
+    """
+    wanted = {schema_name(m): m for m in months if not is_frozen(m)}
+    present = [r[1] for r in conn.execute("PRAGMA database_list") if r[1] not in ("main", "temp")]
+    missing = [n for n in wanted if n not in present]
+    spare = MAX_ATTACHED - len(present)
+    if spare < len(missing) and not evict:
+        raise ShardCapacityError(f"{len(missing)} shards needed, {spare} slots free")
+    for n in present:
+        if spare >= len(missing):
+            break
+        if n not in wanted:
+            conn.execute("DETACH DATABASE " + n)
+            spare += 1
+    for n in missing:
+        conn.execute("ATTACH DATABASE ? AS " + n, (ensure_shard(wanted[n]).as_posix(),))
+
+def detach_freeze_due(conn: sqlite3.Connection, now_ms: int) -> List[str]:
+    """
+    Detach writable shards that freeze_old_shards is due to freeze, so a
+    long-lived writer connection doesn't keep them in WAL mode forever.
+    Must run outside a transaction; a later write re-attaches as needed.
+    """
+    detached = []
+    for r in conn.execute("PRAGMA database_list").fetchall():
+        name = r[1]
+        if not name.startswith("q_"):
+            continue
+        month = name[2:].replace("_", "-")
+        if freeze_due(month, now_ms):
+            conn.execute("DETACH DATABASE " + name)
+            detached.append(month)
+    return detached
+
+def write_quakes(conn: sqlite3.Connection, rows: Iterable[tuple],
+                 write: Callable[[sqlite3.Connection, str, List[tuple]], int],
+                 stats: Optional[Dict[str, float]] = None) -> int:
+    """
+    Route quake row tuples (time_ms second) to their month's shard;
+    `write(conn, table, rows)` does the actual statements. Frozen months are
+    read-only, so their rows are not written; they are counted as
+    skipped_frozen in `stats` (live feeds never reach back that far, but
+    historical bulk loads can).
+    """
+    by_month: Dict[str, List[tuple]] = {}
+    for r in rows:
+        by_month.setdefault(month_of(r[1]), []).append(r)
+    present = {r[1] for r in conn.execute("PRAGMA database_list")}
+    count = 0
+    for month, part in by_month.items():
+        if is_frozen(month):
+            if stats is not None:
+                stats["skipped_frozen"] = stats.get("skipped_frozen", 0) + len(part)
+            continue
+        name = schema_name(month)
+        if name not in present:
+            raise RuntimeError(f"shard {month} is not attached; call attach_for_write first")
+        count += write(conn, f"{name}.quakes", part)
+    return count
+
+# ---------- maintenance CLI ----------
+def split_main_db(conn: sqlite3.Connection, write: Callable[[sqlite3.Connection, str, List[tuple]], int],
+                  batch: int = 10_000, stats: Optional[Dict[str, float]] = None) -> int:
+    """
+    Move rows from the main `quakes` table into monthly shards. Rows of
+    frozen months can't be written; they stay in the main table and are
+    counted as skipped_frozen in `stats`.
+    """
+    conn.isolation_level = None
+    moved = last = 0
+    while True:
+        rows = [tuple(r) for r in conn.execute(
+            "SELECT rowid, id, time_ms, mag, place, lon, lat, depth_km, updated_ms FROM main.quakes "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, batch))]
+        if not rows:
+            return moved
+        last = rows[-1][0]
+        rows = [r[1:] for r in rows]
+        months = sorted({month_of(r[1]) for r in rows})
+        for group in chunks(months, MAX_ATTACHED):
+            attach_for_write(conn, group)
+            part = [r for r in rows if month_of(r[1]) in group]
+            written = [r for r in part if not is_frozen(month_of(r[1]))]
+            conn.execute("BEGIN IMMEDIATE")
+            write_quakes(conn, part, write, stats)
+            conn.executemany("DELETE FROM main.quakes WHERE id = ?", [(r[0],) for r in written])
+            conn.execute("COMMIT")
+            moved += len(written)
+
+def main():
+    from app.db import init_db, get_conn, _write_quake_rows
+
+    ap = argparse.ArgumentParser(description="Monthly quake shards")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="List shards")
+    sub.add_parser("freeze", help="Make shards of finished months read-only")
+    sub.add_parser("split", help="Move quakes from the main database into shards")
+    args = ap.parse_args()
+
+    if args.cmd == "list":
+        for m in existing_months():
+            print(f"{m}  {'frozen' if is_frozen(m) else 'live  '}  {shard_path(m)}")
+    elif args.cmd == "freeze":
+        import time
+        skipped: List[str] = []
+        print("Frozen:", ", ".join(freeze_old_shards(int(time.time() * 1000), skipped)) or "nothing")
+        if skipped:
+            print("Still attached elsewhere, not frozen:", ", ".join(skipped))
+    elif args.cmd == "split":
+        init_db()
+        conn = get_conn()
+        stats: Dict[str, float] = {}
+        print(f"Moved {split_main_db(conn, _write_quake_rows, stats=stats)} quakes into {SHARD_DIR}")
+        if stats.get("skipped_frozen"):
+            print(f"Left {int(stats['skipped_frozen'])} quakes of frozen months in the main database")
+        conn.close()
+
+if __name__ == "__main__":
+    main()
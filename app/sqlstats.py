@@ -0,0 +1,178 @@
+# app/sqlstats.py
+"""
+Opt-in statement timing for every connection app.db opens.
+
+    QUAKE_HUB_SQL_STATS=1 QUAKE_HUB_SQL_SLOW_MS=50 uvicorn app.main:app
+    curl -X POST -H "X-Admin-Token: $TOKEN" "localhost:8000/debug/sql?enabled=1&slow_ms=20"
+
+Connections are created with `factory=InstrumentedConnection`. While
+stats, tracing and request timing are all off the wrappers only check
+flags. While stats are on, each execute / executemany / executescript is timed and recorded under its SQL template
+(literals, parameter lists and shard schema names folded away) in
+sqlite_statement_duration_seconds{statement}. Statements slower than the
+threshold are logged with their EXPLAIN QUERY PLAN and kept in a small
+ring for GET /debug/sql.
+
+Inside a recorded trace (app.tracing) each statement is also a span, and
+inside a web request its time counts towards the Server-Timing `db` entry.
+
+Only the execute call is timed: for a SELECT that covers planning and the
+first step, not rows fetched afterwards.
+"""
+from __future__ import annotations
+import logging, os, re, sqlite3, threading, time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app import memstats, server_timing, tracing
+from app.metrics import SQL_STATEMENT_SECONDS, SQL_SLOW_STATEMENTS
+
+log = logging.getLogger(__name__)
+
+MAX_TEMPLATES = 200   # distinct label values before the rest go to "other"
+SLOW_LOG_SIZE = 100
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PARAMS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NAMED  = re.compile(r"[:@$]\w+")
+_SHARD  = re.compile(r"\bq_\d{4}_\d{2}\b")
+_SPACE  = re.compile(r"\s+")
+
+def normalize_sql(sql: str) -> str:
+    """SQL template: literals and parameters become ?, value lists (?, ?, ...) and shard names collapse."""
+    s = _STRING.sub("?", sql)
+    s = _NAMED.sub("?", s)
+    s = _SHARD.sub("q_?", s)
+    s = _NUMBER.sub("?", s)
+    s = _PARAMS.sub("(?, ...)", s)
+    return _SPACE.sub(" ", s).strip()
+
+class _Stats:
+    def __init__(self):
+        self.enabled = os.environ.get("QUAKE_HUB_SQL_STATS", "0") not in ("0", "false", "no", "")
+        self.slow_s = float(os.environ.get("QUAKE_HUB_SQL_SLOW_MS", "100")) / 1000.0
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=SLOW_LOG_SIZE)
+        self._templates: Dict[str, str] = {}  # raw sql -> template
+        self._children: Dict[str, Any] = {}   # template -> histogram child
+        self._lock = threading.Lock()
+
+    def template(self, sql: str) -> str:
+        template = self._templates.get(sql)
+        if template is None:
+            template = normalize_sql(sql)
+            with self._lock:
+                if len(self._templates) >= 4 * MAX_TEMPLATES:
+                    self._templates.clear()  # ad-hoc SQL with inlined values; templates stay bounded below
+                self._templates[sql] = template
+        return template
+
+    def _child(self, sql: str):
+        template = self.template(sql)
+        child = self._children.get(template)
+        if child is None:
+            with self._lock:
+                label = template if len(self._children) < MAX_TEMPLATES else "other"
+                child = self._children.setdefault(template, SQL_STATEMENT_SECONDS.labels(label))
+        return template, child
+
+    def record(self, conn: sqlite3.Connection, sql: str, params: Any, seconds: float, kind: str) -> None:
+        template, child = self._child(sql)
+        child.observe(seconds)
+        if seconds < self.slow_s:
+            return
+        SQL_SLOW_STATEMENTS.inc()
+        plan = _explain(conn, sql, params) if kind == "execute" else []
+        entry = {"at": time.time(), "ms": round(seconds * 1000, 3), "kind": kind, "statement": template, "plan": plan}
+        self.slow.append(entry)
+        log.warning("slow sql %.1f ms: %s | plan: %s", seconds * 1000, template, "; ".join(plan) or "-")
+
+    def templates(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._templates)
+
+stats = _Stats()
+memstats.register("sqlstats.templates", lambda: memstats.measure(stats.templates()))
+memstats.register("sqlstats.slow_log", lambda: memstats.measure(list(stats.slow)))
+
+def configure(enabled: Optional[bool] = None, slow_ms: Optional[float] = None) -> Dict[str, Any]:
+    """Switch timing on/off or move the slow threshold; takes effect on the next statement."""
+    if enabled is not None:
+        stats.enabled = bool(enabled)
+    if slow_ms is not None:
+        stats.slow_s = max(0.0, float(slow_ms)) / 1000.0
+    return status()
+
+def status() -> Dict[str, Any]:
+    return {"enabled": stats.enabled, "slow_ms": stats.slow_s * 1000, "templates": len(stats._children),
+            "slow": list(stats.slow)}
+
+def _explain(conn: sqlite3.Connection, sql: str, params: Any) -> List[str]:
+    head = sql.lstrip()[:7].upper()
+    if not head.startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")):
+        return []
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except sqlite3.Error as exc:
+        return [f"(no plan: {exc})"]
+    return [str(r[-1]) for r in rows]
+
+class _Timed:
+    """Times one statement for the stats and/or as a tracing span."""
+    __slots__ = ("conn", "sql", "params", "kind", "scope", "t0")
+
+    def __init__(self, conn: sqlite3.Connection, sql: str, params: Any, kind: str):
+        self.conn, self.sql, self.params, self.kind = conn, sql, params, kind
+
+    def __enter__(self) -> None:
+        self.scope = None
+        if tracing.active():
+            self.scope = tracing.span("sqlite." + self.kind, tracing.CLIENT, **{
+                "db.system": "sqlite", "db.statement": stats.template(self.sql)})
+            self.scope.__enter__()
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        seconds = time.perf_counter() - self.t0
+        if self.scope is not None:
+            self.scope.__exit__(*exc)
+        server_timing.add("db", seconds)
+        if stats.enabled:
+            stats.record(self.conn, self.sql, self.params, seconds, self.kind)
+
+def _on() -> bool:
+    return stats.enabled or tracing.active() or server_timing.active()
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if not _on():
+            return super().execute(sql, parameters)
+        with _Timed(self.connection, sql, parameters, "execute"):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _on():
+            return super().executemany(sql, seq_of_parameters)
+        with _Timed(self.connection, sql, None, "executemany"):
+            return super().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        if not _on():
+            return super().executescript(sql_script)
+        with _Timed(self.connection, sql_script, None, "executescript"):
+            return super().executescript(sql_script)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.connect(..., factory=InstrumentedConnection); Connection.execute & co. go through the cursor."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
@@ -0,0 +1,232 @@
+# app/tracing.py
+"""
+Lightweight in-process tracing, exported as OTLP/JSON lines.
+
+    QUAKE_HUB_TRACE_FILE=traces.ndjson QUAKE_HUB_TRACE_SAMPLE=0.1 uvicorn app.main:app
+
+Spans cover HTTP requests, ingest jobs, pipeline stages, SQL statements
+and event publishes. The current span lives in a ContextVar, so asyncio
+tasks and the threadpool used for sync endpoints inherit it on their own;
+threads we start ourselves run their target through bind(), and the DB
+writer runs each queued op in the context it was submitted from.
+
+The keep/drop decision is made once per trace at its root span
+(QUAKE_HUB_TRACE_SAMPLE, default 0.1); everything under an unsampled root
+is skipped without allocating. With no QUAKE_HUB_TRACE_FILE, span() is a
+no-op.
+
+Finished spans are batched by a background thread and written one
+ExportTraceServiceRequest per line (the OTLP JSON encoding the collector's
+file exporter uses), so the file can be loaded by OTLP tooling or read
+with jq. The file rotates at QUAKE_HUB_TRACE_MAX_MB (default 50) keeping
+QUAKE_HUB_TRACE_BACKUPS (default 3) old files.
+"""
+from __future__ import annotations
+import atexit, contextvars, json, os, queue, random, threading, time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+SERVICE_NAME = "earthquake-alert-hub"
+INTERNAL, SERVER, CLIENT = 1, 2, 3  # OTLP SpanKind
+STATUS_OK, STATUS_ERROR = 1, 2
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attrs", "status", "sampled")
+
+    def __init__(self, name: str, kind: int, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else ""
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.status = 0
+        self.sampled = True
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def to_otlp(self) -> Dict:
+        out = {"traceId": self.trace_id, "spanId": self.span_id, "name": self.name, "kind": self.kind,
+               "startTimeUnixNano": str(self.start_ns), "endTimeUnixNano": str(self.end_ns),
+               "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attrs.items()]}
+        if self.parent_id:
+            out["parentSpanId"] = self.parent_id
+        if self.status:
+            out["status"] = {"code": self.status}
+        return out
+
+class _Unsampled:
+    """Context marker for a trace that was not sampled; its children are skipped."""
+    sampled = False
+
+_UNSAMPLED = _Unsampled()
+_current: contextvars.ContextVar = contextvars.ContextVar("quake_hub_span", default=None)
+
+def _otlp_value(v: Any) -> Dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+# ---------- exporter ----------
+class FileExporter:
+    """Background NDJSON writer with size-based rotation."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int, flush_s: float = 1.0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_s = flush_s
+        self._q: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._q.put(span)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        done = threading.Event()
+        self._q.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        """Write what is queued, then end the thread."""
+        self._q.put(None)
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Span] = []
+            waiters: List[threading.Event] = []
+            item = self._q.get()
+            deadline = time.monotonic() + self.flush_s
+            while True:
+                if item is None:
+                    if batch:
+                        self._write(batch)
+                    return
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= 512:
+                    break
+                try:
+                    item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for w in waiters:
+                w.set()
+
+    def _write(self, batch: List[Span]) -> None:
+        line = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                                        {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in batch]}],
+        }]}, separators=(",", ":")) + "\n"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+_exporter: Optional[FileExporter] = None
+_ratio = 0.0
+
+def configure(path: Optional[str], ratio: float = 0.1, max_mb: float = 50.0, backups: int = 3) -> None:
+    """(Re)point tracing at `path`; None turns it off. Spans already queued still go to the old file."""
+    global _exporter, _ratio
+    old = _exporter
+    _exporter = FileExporter(path, int(max_mb * 2**20), backups) if path else None
+    _ratio = max(0.0, min(1.0, ratio))
+    if old is not None:
+        old.close()
+
+def flush() -> None:
+    if _exporter is not None:
+        _exporter.flush()
+
+# ---------- spans ----------
+class _Scope:
+    __slots__ = ("span", "token")
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self) -> Optional[Span]:
+        self.token = _current.set(self.span)
+        return self.span if self.span is not _UNSAMPLED else None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current.reset(self.token)
+        sp = self.span
+        if sp is _UNSAMPLED:
+            return
+        sp.end_ns = time.time_ns()
+        if exc_type is not None:
+            sp.status = STATUS_ERROR
+            sp.attrs["exception.type"] = exc_type.__name__
+            sp.attrs["exception.message"] = str(exc)[:500]
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(sp)
+
+class _NoScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+_NO_SCOPE = _NoScope()
+
+def span(name: str, kind: int = INTERNAL, **attrs: Any):
+    """`with span("ingest.job", feed=feed) as sp:`; sp is None when the trace is not recorded."""
+    if _exporter is None:
+        return _NO_SCOPE
+    parent = _current.get()
+    if parent is None:
+        if random.random() >= _ratio:
+            return _Scope(_UNSAMPLED)
+    elif not parent.sampled:
+        return _NO_SCOPE
+    return _Scope(Span(name, kind, parent, attrs))
+
+def active() -> bool:
+    """True inside a recorded span; lets hot paths skip building span names and attributes."""
+    cur = _current.get()
+    return cur is not None and cur.sampled
+
+def current() -> Optional[Span]:
+    cur = _current.get()
+    return cur if cur is not None and cur.sampled else None
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """fn bound to a copy of the current context, for threads that should continue this trace."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+configure(os.environ.get("QUAKE_HUB_TRACE_FILE") or None,
+          float(os.environ.get("QUAKE_HUB_TRACE_SAMPLE", "0.1")),
+          float(os.environ.get("QUAKE_HUB_TRACE_MAX_MB", "50")),
+          int(os.environ.get("QUAKE_HUB_TRACE_BACKUPS", "3")))
+atexit.register(flush)
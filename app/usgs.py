@@ -1,20 +1,32 @@
 from __future__ import annotations
-from dataclasses import dataclass, asdict
-from typing import List, Optional
+import codecs, csv, json, os, re, time, zlib
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from xml.etree import ElementTree
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import httpx
 
+from app.metrics import FEED_WIRE_BYTES, FEED_DECODED_BYTES
+
+# point at a stand-in (e.g. python -m app.fake_usgs) for development and load tests
+USGS_BASE_URL = os.environ.get("QUAKE_HUB_USGS_BASE_URL", "https://earthquake.usgs.gov").rstrip("/")
+FEED_PATH = "/earthquakes/feed/v1.0/summary/{feed}.geojson"
+
 FEEDS = {
-    "all_hour":  "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_hour.geojson",
-    "all_day":   "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_day.geojson",
-    "all_week":  "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_week.geojson",
-    "all_month": "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_month.geojson",
-
-    "2.5_day":   "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/2.5_day.geojson",
-    "2.5_week":  "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/2.5_week.geojson",
-    "4.5_day":   "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/4.5_day.geojson",
-    "significant_week": "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/significant_week.geojson",
+    feed: USGS_BASE_URL + FEED_PATH.format(feed=feed)
+    for feed in ("all_hour", "all_day", "all_week", "all_month",
+                 "2.5_day", "2.5_week", "4.5_day", "significant_week")
 }
 
+def feed_label(feed: str) -> str:
+    """Metric label for a feed: FEEDS keys as they are, any ad-hoc URL as "custom" so series stay bounded."""
+    return feed if feed in FEEDS else "custom"
+
+QUAKE_FIELDS = ("id", "time_ms", "mag", "place", "lon", "lat", "depth_km", "updated_ms")
+
 @dataclass(frozen=True)
 class Quake:
     id: str
@@ -24,11 +36,15 @@ class Quake:
     lon: float
     lat: float
     depth_km: float
+    updated_ms: int = 0     # last revision at the source; time_ms if the feed has none
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        # flat fields only, so skip asdict()'s recursive deep copy
+        return {"id": self.id, "time_ms": self.time_ms, "mag": self.mag, "place": self.place,
+                "lon": self.lon, "lat": self.lat, "depth_km": self.depth_km, "updated_ms": self.updated_ms}
 
-def _normalize_feature(feature: dict) -> Optional[Quake]:
+def _feature_values(feature: dict) -> Optional[tuple]:
+    """(id, time_ms, mag, place, lon, lat, depth_km, updated_ms) from a GeoJSON feature, or None if unusable."""
     try:
         pid = feature["id"]
         props = feature.get("properties") or {}
@@ -42,43 +58,534 @@ def _normalize_feature(feature: dict) -> Optional[Quake]:
             return None
 
         mag = props.get("mag")
-        return Quake(
-            id=pid,
-            time_ms=int(t),
-            mag=float(mag) if mag is not None else 0.0,
-            place=str(props.get("place") or ""),
-            lon=float(lon),
-            lat=float(lat),
-            depth_km=float(depth),
+        updated = props.get("updated")
+        return (
+            pid,
+            int(t),
+            float(mag) if mag is not None else 0.0,
+            str(props.get("place") or ""),
+            float(lon),
+            float(lat),
+            float(depth),
+            int(updated) if updated is not None else int(t),
         )
     except Exception:
         return None
 
+# columns read from a ComCat/summary CSV export, in _csv_values order; `updated` may be absent
+CSV_COLUMNS = ("id", "time", "mag", "place", "longitude", "latitude", "depth", "updated")
+
+def csv_column_index(header: Sequence[str]) -> Tuple[int, ...]:
+    """Positions of CSV_COLUMNS in a CSV header row (-1 for a missing `updated`)."""
+    names = [h.strip() for h in header]
+    missing = [c for c in CSV_COLUMNS[:-1] if c not in names]
+    if missing:
+        raise ValueError(f"CSV header lacks {', '.join(missing)}")
+    return tuple(names.index(c) if c in names else -1 for c in CSV_COLUMNS)
+
+_ISO = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:?\d\d)?$")
+
+def _iso_time_ms(value: str) -> int:
+    """Epoch ms from '2024-01-15T08:31:22.345Z'-style times (any fraction, UTC if no offset)."""
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    m = _ISO.match(value)
+    if m is None:
+        raise ValueError(f"bad time {value!r}")
+    # fromisoformat on 3.10 takes neither 'Z' nor fractions other than 3/6 digits
+    base, frac, tz = m.groups()
+    dt = datetime.fromisoformat(base).replace(tzinfo=timezone.utc)
+    if tz and tz != "Z":
+        sign = -1 if tz[0] == "-" else 1
+        dt -= sign * timedelta(hours=int(tz[1:3]), minutes=int(tz[-2:]))
+    return int(dt.timestamp()) * 1000 + (int((frac + "000")[:3]) if frac else 0)
+
+def _csv_values(row: Sequence[str], idx: Tuple[int, ...]) -> Optional[tuple]:
+    """Same tuple as _feature_values, from one CSV record; None if unusable."""
+    try:
+        i_id, i_time, i_mag, i_place, i_lon, i_lat, i_depth, i_updated = idx
+        lon, lat, depth, t = row[i_lon], row[i_lat], row[i_depth], row[i_time]
+        if not (t and lon and lat and depth):
+            return None
+        mag = row[i_mag]
+        time_ms = _iso_time_ms(t)
+        updated = row[i_updated] if i_updated >= 0 else ""
+        return (row[i_id], time_ms, float(mag) if mag else 0.0, row[i_place],
+                float(lon), float(lat), float(depth), _iso_time_ms(updated) if updated else time_ms)
+    except (IndexError, ValueError):
+        return None
+
+def _normalize_feature(feature: dict) -> Optional[Quake]:
+    values = _feature_values(feature)
+    return Quake(*values) if values is not None else None
+
+class QuakeRow(Mapping):
+    """Read-only dict-like view of one row of a QuakeBatch; copies nothing."""
+    __slots__ = ("_batch", "_i")
+
+    def __init__(self, batch: "QuakeBatch", i: int):
+        self._batch = batch
+        self._i = i
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            col = getattr(self._batch, _COLUMN[key])
+        except KeyError:
+            raise KeyError(key) from None
+        return col[self._i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(QUAKE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(QUAKE_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"QuakeRow({dict(self)!r})"
+
+    @property
+    def batch(self) -> "QuakeBatch":
+        return self._batch
+
+_COLUMN = {"id": "ids", "time_ms": "time_ms", "mag": "mag", "place": "place",
+           "lon": "lon", "lat": "lat", "depth_km": "depth_km", "updated_ms": "updated_ms"}
+
+class QuakeBatch:
+    """
+    A feed's quakes as parallel columns: ids/place as lists, time_ms and
+    updated_ms as int64 arrays and mag/lon/lat/depth_km as float64 arrays. Built straight
+    from parsed features (no per-quake object), fed to executemany through
+    rows(), and scanned column-wise by app.rules.match_batch. Indexing
+    returns a QuakeRow view.
+    """
+    __slots__ = ("ids", "time_ms", "mag", "place", "lon", "lat", "depth_km", "updated_ms", "dropped", "stored_ms")
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.time_ms = array("q")
+        self.mag = array("d")
+        self.place: List[str] = []
+        self.lon = array("d")
+        self.lat = array("d")
+        self.depth_km = array("d")
+        self.updated_ms = array("q")
+        self.dropped = 0  # features _feature_values rejected
+        self.stored_ms = 0  # when the ingest pipeline committed these rows
+
+    @classmethod
+    def from_features(cls, features: Iterable[dict]) -> "QuakeBatch":
+        batch = cls()
+        for f in features:
+            batch.add_feature(f)
+        return batch
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "QuakeBatch":
+        batch = cls()
+        for r in rows:
+            batch.append(r["id"], r["time_ms"], r["mag"], r["place"], r["lon"], r["lat"], r["depth_km"],
+                         r.get("updated_ms") or r["time_ms"])
+        return batch
+
+    def add_values(self, values: Optional[tuple]) -> bool:
+        """Append a normalized tuple in QUAKE_FIELDS order; None counts as dropped."""
+        if values is None:
+            self.dropped += 1
+            return False
+        self.append(*values)
+        return True
+
+    def add_feature(self, feature: dict) -> bool:
+        return self.add_values(_feature_values(feature))
+
+    def add_csv_row(self, row: Sequence[str], idx: Tuple[int, ...]) -> bool:
+        return self.add_values(_csv_values(row, idx))
+
+    def append(self, id: str, time_ms: int, mag: float, place: str, lon: float, lat: float, depth_km: float,
+               updated_ms: int) -> None:
+        self.ids.append(id)
+        self.time_ms.append(time_ms)
+        self.mag.append(mag)
+        self.place.append(place)
+        self.lon.append(lon)
+        self.lat.append(lat)
+        self.depth_km.append(depth_km)
+        self.updated_ms.append(updated_ms)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: int) -> QuakeRow:
+        if not -len(self.ids) <= i < len(self.ids):
+            raise IndexError(i)
+        return QuakeRow(self, i % len(self.ids))
+
+    def __iter__(self) -> Iterator[QuakeRow]:
+        return (QuakeRow(self, i) for i in range(len(self.ids)))
+
+    def rows(self) -> Iterator[tuple]:
+        """Positional tuples in QUAKE_FIELDS order, for executemany."""
+        return zip(self.ids, self.time_ms, self.mag, self.place, self.lon, self.lat, self.depth_km, self.updated_ms)
+
+    def to_dicts(self) -> List[dict]:
+        return [dict(zip(QUAKE_FIELDS, r)) for r in self.rows()]
+
+    def max_mag(self) -> Optional[float]:
+        return max(self.mag) if self.mag else None
+
 def fetch_quakes(feed: str = "all_hour",
                  timeout: float = 30.0,
                  client: Optional[httpx.Client] = None) -> List[Quake]:
+    values = adapter_for(feed).values(stream_feed(feed, timeout, client))
+    return [Quake(*v) for v in values if v is not None]
+
+def fetch_batch(feed: str = "all_hour",
+                timeout: float = 30.0,
+                client: Optional[httpx.Client] = None) -> QuakeBatch:
+    """Like fetch_quakes, but parses the streamed body straight into columns."""
+    return adapter_for(feed).parse(stream_feed(feed, timeout, client))
+
+ACCEPT_ENCODING = "gzip, deflate"
+
+class _Inflater:
+    """Incremental decoder for one Content-Encoding (gzip, deflate or identity)."""
+
+    def __init__(self, encoding: Optional[str]):
+        self.encoding = (encoding or "identity").strip().lower()
+        if self.encoding in ("gzip", "x-gzip"):
+            self._z = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == "deflate":
+            self._z = None  # zlib-wrapped per the RFC, but some servers send raw; decided on the first bytes
+        elif self.encoding == "identity":
+            self._z = None
+        else:
+            raise ValueError(f"unsupported Content-Encoding {encoding!r}")
 
+    def decompress(self, data: bytes) -> bytes:
+        if self.encoding == "identity":
+            return data
+        if self._z is None:
+            zlib_header = len(data) >= 2 and data[0] & 0x0F == 8 and ((data[0] << 8) | data[1]) % 31 == 0
+            self._z = zlib.decompressobj(zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS)
+        return self._z.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush() if self._z is not None else b""
+
+def stream_feed(feed: str = "all_hour",
+                timeout: float = 30.0,
+                client: Optional[httpx.Client] = None,
+                chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Yield the decoded feed body in chunks as it arrives. gzip/deflate are
+    asked for explicitly and inflated chunk by chunk, so neither the
+    compressed nor the decoded body is ever held whole. Bytes on the wire
+    and after decoding are counted per feed.
+    """
     url = FEEDS.get(feed, feed)
+    label = feed_label(feed)
+    wire, decoded = FEED_WIRE_BYTES.labels(label), FEED_DECODED_BYTES.labels(label)
     close_client = False
     if client is None:
         client = httpx.Client(timeout=timeout)
         close_client = True
 
     try:
-        resp = client.get(url)
-        resp.raise_for_status()
-        data = resp.json()
-        feats = data.get("features", [])
-        quakes: List[Quake] = []
-        for f in feats:
-            q = _normalize_feature(f)
-            if q is not None:
-                quakes.append(q)
-        return quakes
+        with client.stream("GET", url, headers={"Accept-Encoding": ACCEPT_ENCODING}) as resp:
+            resp.raise_for_status()
+            inflater = _Inflater(resp.headers.get("Content-Encoding"))
+            for raw in resp.iter_raw(chunk_size):
+                wire.inc(len(raw))
+                data = inflater.decompress(raw)
+                if data:
+                    decoded.inc(len(data))
+                    yield data
+            tail = inflater.flush()
+            if tail:
+                decoded.inc(len(tail))
+                yield tail
     finally:
         if close_client:
             client.close()
 
+_WS = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+def iter_geojson_features(chunks: Iterable[bytes], metadata: Optional[Dict[str, Any]] = None) -> Iterator[dict]:
+    """
+    Incrementally parse a GeoJSON FeatureCollection, yielding each entry of
+    `features` as soon as its closing brace has arrived, without holding the
+    whole document. Other top-level members (e.g. `metadata`) are stored into
+    `metadata` if a dict is passed.
+    """
+    it = iter(chunks)
+    dec = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, eof = "", 0, False
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        for raw in it:
+            text = dec.decode(raw)
+            if text:
+                buf = buf[pos:] + text
+                pos = 0
+                return True
+        buf = buf[pos:] + dec.decode(b"", final=True)
+        pos, eof = 0, True
+        return False
+
+    def skip_ws() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not more():
+                raise ValueError("unexpected end of GeoJSON")
+
+    def value() -> Any:
+        nonlocal pos
+        while True:
+            skip_ws()
+            try:
+                v, end = _decoder.raw_decode(buf, pos)
+                # a number at the very end of the buffer may still be growing
+                if end < len(buf) or eof:
+                    pos = end
+                    return v
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if not more():
+                continue
+
+    def expect(ch: str) -> None:
+        nonlocal pos
+        if skip_ws() != ch:
+            raise ValueError(f"expected {ch!r} in GeoJSON at offset {pos}")
+        pos += 1
+
+    expect("{")
+    if skip_ws() == "}":
+        return
+    while True:
+        key = value()
+        expect(":")
+        if key == "features":
+            expect("[")
+            if skip_ws() == "]":
+                pos += 1
+            else:
+                while True:
+                    yield value()
+                    sep = skip_ws()
+                    pos += 1
+                    if sep == "]":
+                        break
+                    if sep != ",":
+                        raise ValueError(f"expected ',' or ']' in features at offset {pos}")
+        else:
+            v = value()
+            if metadata is not None:
+                metadata[key] = v
+        sep = skip_ws()
+        pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"expected ',' or '}}' in GeoJSON at offset {pos}")
+
+
+# ---------- feed adapters ----------
+class FeedAdapter:
+    """
+    Turns a streamed feed body (an iterable of byte chunks) into QuakeBatches
+    in two steps: records() decodes the format as the bytes arrive, yielding
+    one raw record per event, and normalize() turns a record into a tuple in
+    QUAKE_FIELDS order (or None if it is unusable).
+    """
+    name = ""
+
+    def records(self, chunks: Iterable[bytes]) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def normalize(self, record: Any) -> Optional[tuple]:
+        raise NotImplementedError
+
+    def values(self, chunks: Iterable[bytes]) -> Iterator[Optional[tuple]]:
+        return map(self.normalize, self.records(chunks))
+
+    def batches(self, chunks: Iterable[bytes], size: int = 500,
+                timings: Optional[Dict[str, float]] = None) -> Iterator[QuakeBatch]:
+        """
+        Batches of up to `size` quakes. Records are decoded a batch at a time
+        and then normalized, so with `timings` the normalize seconds can be
+        added up with two clock reads per batch.
+        """
+        records, normalize = self.records(chunks), self.normalize
+        while True:
+            block = list(islice(records, size))
+            if not block:
+                return
+            t0 = time.perf_counter()
+            batch = QuakeBatch()
+            for r in block:
+                batch.add_values(normalize(r))
+            if timings is not None:
+                timings["normalize"] = timings.get("normalize", 0.0) + time.perf_counter() - t0
+            yield batch
+
+    def parse(self, chunks: Iterable[bytes]) -> QuakeBatch:
+        batch = QuakeBatch()
+        for v in self.values(chunks):
+            batch.add_values(v)
+        return batch
+
+class GeoJSONAdapter(FeedAdapter):
+    name = "geojson"
+
+    def records(self, chunks: Iterable[bytes]) -> Iterator[dict]:
+        return iter_geojson_features(chunks)
+
+    def normalize(self, record: dict) -> Optional[tuple]:
+        return _feature_values(record)
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    dec = codecs.getincrementaldecoder("utf-8-sig")()
+    rest = ""
+    for raw in chunks:
+        lines = (rest + dec.decode(raw)).split("\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    rest += dec.decode(b"", final=True)
+    if rest:
+        yield rest
+
+class CSVAdapter(FeedAdapter):
+    """USGS/FDSN-style CSV with a header row naming at least CSV_COLUMNS."""
+    name = "csv"
+
+    def records(self, chunks: Iterable[bytes]) -> Iterator[Tuple[List[str], Tuple[int, ...]]]:
+        rows = csv.reader(_iter_lines(chunks))
+        header = next(rows, None)
+        if header is None:
+            return
+        idx = csv_column_index(header)
+        for row in rows:
+            if row:
+                yield row, idx
+
+    def normalize(self, record: Tuple[List[str], Tuple[int, ...]]) -> Optional[tuple]:
+        return _csv_values(*record)
+
+def _local(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+def _child(elem, name: str):
+    for c in elem:
+        if _local(c.tag) == name:
+            return c
+    return None
+
+def _value(elem, *path: str) -> Optional[str]:
+    for name in path:
+        if elem is None:
+            return None
+        elem = _child(elem, name)
+    return elem.text.strip() if elem is not None and elem.text else None
+
+def _quakeml_fields(event) -> Dict[str, Optional[str]]:
+    """The text fields we need from one QuakeML <event>, from its preferred origin and magnitude."""
+    attrs = {_local(k): v for k, v in event.attrib.items()}
+    if "eventsource" in attrs and "eventid" in attrs:
+        pid = attrs["eventsource"] + attrs["eventid"]  # the ANSS id, as in the GeoJSON feeds
+    else:
+        public = attrs.get("publicID", "")
+        pid = public.split("eventid=")[-1].split("&")[0] if "eventid=" in public else public.rsplit("/", 1)[-1]
+
+    def preferred(kind: str):
+        want = _value(event, f"preferred{kind[0].upper()}{kind[1:]}ID")
+        found = [c for c in event if _local(c.tag) == kind]
+        for c in found:
+            if c.get("publicID") == want:
+                return c
+        return found[0] if found else None
+
+    origin, magnitude = preferred("origin"), preferred("magnitude")
+    return {
+        "id": pid, "time": _value(origin, "time", "value"), "mag": _value(magnitude, "mag", "value"),
+        "place": _value(event, "description", "text"), "lat": _value(origin, "latitude", "value"),
+        "lon": _value(origin, "longitude", "value"), "depth": _value(origin, "depth", "value"),
+        "updated": _value(event, "creationInfo", "creationTime") or _value(origin, "creationInfo", "creationTime"),
+    }
+
+def _quakeml_values(f: Dict[str, Optional[str]]) -> Optional[tuple]:
+    try:
+        if not f["id"] or f["time"] is None or f["lat"] is None or f["lon"] is None or f["depth"] is None:
+            return None
+        time_ms = _iso_time_ms(f["time"])
+        return (f["id"], time_ms, float(f["mag"]) if f["mag"] else 0.0, f["place"] or "",
+                float(f["lon"]), float(f["lat"]), float(f["depth"]) / 1000.0,  # QuakeML depth is in metres
+                _iso_time_ms(f["updated"]) if f["updated"] else time_ms)
+    except (ValueError, TypeError):
+        return None
+
+class QuakeMLAdapter(FeedAdapter):
+    """
+    QuakeML 1.2 (FDSN event service, ANSS/regional networks). Parsed with a
+    pull parser fed chunk by chunk; each <event> is dropped from the tree as
+    soon as its fields have been read, so memory stays flat however large
+    the window.
+    """
+    name = "quakeml"
+
+    def records(self, chunks: Iterable[bytes]) -> Iterator[Dict[str, Optional[str]]]:
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        stack: List[Any] = []
+        for raw in chunks:
+            parser.feed(raw)
+            yield from self._events(parser, stack)
+        parser.close()
+        yield from self._events(parser, stack)
+
+    def normalize(self, record: Dict[str, Optional[str]]) -> Optional[tuple]:
+        return _quakeml_values(record)
+
+    @staticmethod
+    def _events(parser, stack: List[Any]) -> Iterator[Dict[str, Optional[str]]]:
+        for kind, elem in parser.read_events():
+            if kind == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if _local(elem.tag) == "event":
+                fields = _quakeml_fields(elem)
+                if stack:
+                    stack[-1].remove(elem)
+                elem.clear()
+                yield fields
+
+ADAPTERS: Dict[str, FeedAdapter] = {a.name: a for a in (GeoJSONAdapter(), QuakeMLAdapter(), CSVAdapter())}
+
+def register_adapter(adapter: FeedAdapter) -> None:
+    ADAPTERS[adapter.name] = adapter
+
+def adapter_for(feed: str) -> FeedAdapter:
+    """
+    Pick the adapter for a FEEDS key or URL: an explicit `format=` query
+    parameter wins, then the path suffix; GeoJSON otherwise.
+    """
+    url = FEEDS.get(feed, feed).lower()
+    m = re.search(r"[?&]format=([a-z]+)", url)
+    fmt = m.group(1) if m else url.split("?")[0].rsplit(".", 1)[-1]
+    fmt = {"xml": "quakeml", "json": "geojson"}.get(fmt, fmt)
+    return ADAPTERS.get(fmt, ADAPTERS["geojson"])
+
 
 if __name__ == "__main__":
     import sys, json
@@ -0,0 +1,228 @@
+# app/writer.py
+from __future__ import annotations
+import atexit, contextvars, os, queue, sqlite3, threading, time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+from app import memstats, shards, tracing
+from app.db import get_conn, split_quake_write, prepare_quake_write, write_quakes, write_alerts, RetryAfterCommit
+from app.usgs import QuakeBatch
+from app.metrics import WRITER_GROUP_SIZE, WRITER_COMMIT_LATENCY, WRITER_QUEUE_WAIT, WRITER_FAILED_OPS
+
+MAX_LATENCY_MS = float(os.environ.get("QUAKE_HUB_WRITER_MAX_LATENCY_MS", "20"))
+MAX_GROUP_OPS  = int(os.environ.get("QUAKE_HUB_WRITER_MAX_GROUP", "64"))
+IDLE_S = 60.0  # an idle writer still lets go of shards that are due to freeze
+
+WriteFn = Callable[[sqlite3.Connection], Any]
+PrepareFn = Callable[[sqlite3.Connection, bool], None]
+
+class _Op:
+    __slots__ = ("fn", "prepare", "future", "enqueued", "context")
+
+    def __init__(self, fn: WriteFn, prepare: Optional[PrepareFn] = None):
+        self.fn = fn
+        self.prepare = prepare
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+        # the submitter's trace, so this op's SQL spans land under it
+        self.context = contextvars.copy_context() if tracing.active() else None
+
+_STOP = object()
+
+def _sum_futures(parts: List[Future]) -> Future:
+    """One future for several write parts: the sum of their results, or the first error."""
+    out: Future = Future()
+    pending = [len(parts)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            pending[0] -= 1
+            if pending[0]:
+                return
+        errors = [f.exception() for f in parts if f.exception() is not None]
+        if errors:
+            out.set_exception(errors[0])
+        else:
+            out.set_result(sum(f.result() for f in parts))
+
+    for f in parts:
+        f.add_done_callback(done)
+    return out
+
+class DbWriter:
+    """
+    Single thread that owns the write connection.
+
+    Callers hand over batches (functions of the connection) and get a Future
+    back. Batches arriving within `max_latency_ms` of the first one are merged
+    into one transaction; each batch runs under its own SAVEPOINT so a failing
+    batch is rolled back without taking its neighbours down. Futures resolve
+    only after COMMIT returns.
+    """
+
+    def __init__(self, max_latency_ms: float = MAX_LATENCY_MS, max_group: int = MAX_GROUP_OPS):
+        self.max_latency = max_latency_ms / 1000.0
+        self.max_group = max(1, int(max_group))
+        self.commits = 0
+        self._q: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush everything queued so far, then stop the thread."""
+        with self._lock:
+            t = self._thread
+            if t is None or not t.is_alive():
+                return
+            self._q.put(_STOP)
+        t.join(timeout)
+
+    # ---------- submit ----------
+    def submit(self, fn: WriteFn, prepare: Optional[PrepareFn] = None) -> Future:
+        """
+        Queue `fn(conn)` for the next group commit.
+
+        `prepare(conn, fresh)`, if given, runs before the transaction opens
+        (e.g. to ATTACH a shard). `fresh` is False when batches prepared
+        earlier in the same transaction must not be disturbed; the hook can
+        then raise RetryAfterCommit and the writer commits what it has first.
+        """
+        self.start()
+        op = _Op(fn, prepare)
+        self._q.put(op)
+        return op.future
+
+    def submit_quakes(self, quakes: Iterable[Mapping[str, Any]], stats: Optional[Dict[str, float]] = None) -> Future:
+        """Future resolves to the number of new quake rows; new/revised counts and max_new_mag go into `stats`."""
+        parts = [
+            self.submit(lambda conn, rows=rows: write_quakes(conn, rows, stats),
+                        prepare=lambda conn, fresh, rows=rows: prepare_quake_write(conn, rows, fresh))
+            for rows in split_quake_write(quakes if isinstance(quakes, QuakeBatch) else list(quakes))
+        ]
+        if not parts:
+            done: Future = Future()
+            done.set_result(0)
+            return done
+        return parts[0] if len(parts) == 1 else _sum_futures(parts)
+
+    def submit_alerts(self, alerts: Iterable[Mapping[str, Any]]) -> Future:
+        """Future resolves to the list of alerts that were actually inserted."""
+        rows = list(alerts)
+        return self.submit(lambda conn: write_alerts(conn, rows))
+
+    # ---------- writer thread ----------
+    def _run(self) -> None:
+        conn = get_conn()
+        conn.isolation_level = None  # we issue BEGIN/COMMIT ourselves
+        try:
+            stopping = False
+            while not stopping:
+                try:
+                    first = self._q.get(timeout=IDLE_S)
+                except queue.Empty:
+                    self._release_shards(conn)
+                    continue
+                if first is _STOP:
+                    break
+                group = [first]
+                deadline = first.enqueued + self.max_latency
+                while len(group) < self.max_group:
+                    try:
+                        nxt = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if nxt is _STOP:
+                        stopping = True
+                        break
+                    group.append(nxt)
+                self._commit(conn, group)
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, group: List[_Op]) -> None:
+        pending = [op for op in group if op.future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+        started = time.monotonic()
+        for op in pending:
+            WRITER_QUEUE_WAIT.observe(started - op.enqueued)
+
+        done: List[tuple] = []
+        while pending:
+            # normally one transaction; a prepare hook may ask for a split
+            segment: List[_Op] = []
+            while pending:
+                op = pending[0]
+                if op.prepare is not None:
+                    try:
+                        op.prepare(conn, not segment)
+                    except RetryAfterCommit:
+                        if segment:
+                            break
+                        self._fail(done, pending.pop(0), RuntimeError("write cannot be prepared"))
+                        continue
+                    except Exception as exc:
+                        self._fail(done, pending.pop(0), exc)
+                        continue
+                segment.append(pending.pop(0))
+            if not segment:
+                continue
+            try:
+                done.extend(self._run_segment(conn, segment))
+            except Exception as exc:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                for op in segment + pending:
+                    done.append((op, False, exc))
+                pending = []
+
+        WRITER_COMMIT_LATENCY.observe(time.monotonic() - started)
+        self._release_shards(conn)
+        for op, ok, value in done:
+            if ok:
+                op.future.set_result(value)
+            else:
+                op.future.set_exception(value)
+
+    def _run_segment(self, conn: sqlite3.Connection, segment: List[_Op]) -> List[tuple]:
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        for op in segment:
+            conn.execute("SAVEPOINT op")
+            try:
+                results.append((op, True, op.fn(conn) if op.context is None else op.context.run(op.fn, conn)))
+                conn.execute("RELEASE op")
+            except Exception as exc:
+                conn.execute("ROLLBACK TO op")
+                conn.execute("RELEASE op")
+                WRITER_FAILED_OPS.inc()
+                results.append((op, False, exc))
+        conn.execute("COMMIT")
+        self.commits += 1
+        WRITER_GROUP_SIZE.observe(len(segment))
+        return results
+
+    @staticmethod
+    def _release_shards(conn: sqlite3.Connection) -> None:
+        # an attached shard stays in WAL mode and can't be frozen (shards.freeze_old_shards)
+        if shards.enabled():
+            shards.detach_freeze_due(conn, int(time.time() * 1000))
+
+    @staticmethod
+    def _fail(done: List[tuple], op: _Op, exc: BaseException) -> None:
+        WRITER_FAILED_OPS.inc()
+        done.append((op, False, exc))
+
+writer = DbWriter()
+atexit.register(writer.stop)
+# ops are closures over rows the submitter still holds, so only the count is meaningful
+memstats.register("writer.queue", lambda: (writer._q.qsize(), None))
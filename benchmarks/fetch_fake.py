@@ -0,0 +1,53 @@
+# benchmarks/fetch_fake.py
+"""
+fetch_quakes against the local USGS stand-in: a new client per fetch (the
+scheduler's default) vs one shared keep-alive client.
+
+    python -m benchmarks.fetch_fake --fetches 50 --latency-ms 20 --backlog 5000
+"""
+from __future__ import annotations
+import argparse, json, time
+
+import httpx
+
+from app.fake_usgs import FakeUSGS
+from app.usgs import fetch_quakes
+
+def _percentile(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))] if xs else 0.0
+
+def run(fake: FakeUSGS, feed: str, fetches: int, shared: bool) -> dict:
+    before = dict(fake.stats)
+    client = httpx.Client(timeout=30.0) if shared else None
+    times, rows = [], 0
+    try:
+        for _ in range(fetches):
+            t0 = time.perf_counter()
+            rows = len(fetch_quakes(fake.url(feed), client=client))
+            times.append(time.perf_counter() - t0)
+    finally:
+        if client is not None:
+            client.close()
+    return {
+        "mode": "shared_client" if shared else "client_per_fetch",
+        "rows": rows,
+        "connections": fake.stats["connections"] - before["connections"],
+        "p50_ms": round(_percentile(times, 50) * 1000, 2),
+        "p99_ms": round(_percentile(times, 99) * 1000, 2),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="fetch_quakes against the fake USGS server")
+    ap.add_argument("--feed", default="all_day")
+    ap.add_argument("--fetches", type=int, default=50)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--backlog", type=int, default=5000)
+    args = ap.parse_args()
+
+    with FakeUSGS(latency_ms=args.latency_ms, backlog=args.backlog, rate_per_s=1.0) as fake:
+        results = [run(fake, args.feed, args.fetches, shared) for shared in (False, True)]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/parse_formats.py
+"""
+Parse throughput of the feed adapters on the same synthetic catalog
+rendered as GeoJSON, CSV and QuakeML, fed in 64 KiB chunks.
+
+    python -m benchmarks.parse_formats --events 20000 --repeat 3
+"""
+from __future__ import annotations
+import argparse, csv, io, json, random, time, tracemalloc
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+from app.usgs import ADAPTERS
+
+CHUNK = 64 * 1024
+
+def synthetic_events(n: int, seed: int = 7) -> list:
+    rnd = random.Random(seed)
+    return [{"id": f"bench{i}", "time_ms": 1_700_000_000_000 + i * 1000, "mag": round(rnd.uniform(-1, 7), 2),
+             "place": f"{rnd.randint(1, 99)} km N of Somewhere, CA", "lon": round(rnd.uniform(-180, 180), 4),
+             "lat": round(rnd.uniform(-70, 70), 4), "depth_km": round(rnd.uniform(0, 600), 2)} for i in range(n)]
+
+def _iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def render_geojson(events) -> bytes:
+    return json.dumps({"type": "FeatureCollection", "metadata": {"count": len(events)}, "features": [
+        {"type": "Feature", "id": e["id"],
+         "properties": {"time": e["time_ms"], "mag": e["mag"], "place": e["place"], "type": "earthquake"},
+         "geometry": {"type": "Point", "coordinates": [e["lon"], e["lat"], e["depth_km"]]}} for e in events]}).encode()
+
+def render_csv(events) -> bytes:
+    out = io.StringIO()
+    w = csv.writer(out, lineterminator="\n")
+    w.writerow(["time", "latitude", "longitude", "depth", "mag", "magType", "net", "id", "place", "type"])
+    for e in events:
+        w.writerow([_iso(e["time_ms"]), e["lat"], e["lon"], e["depth_km"], e["mag"], "ml", "us", e["id"], e["place"], "earthquake"])
+    return out.getvalue().encode()
+
+def render_quakeml(events) -> bytes:
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<q:quakeml xmlns="http://quakeml.org/xmlns/bed/1.2" '
+             'xmlns:q="http://quakeml.org/xmlns/quakeml/1.2"><eventParameters publicID="bench">']
+    for e in events:
+        parts.append(
+            f'<event publicID={quoteattr("quakeml:bench?eventid=" + e["id"])}>'
+            f'<description><text>{escape(e["place"])}</text></description>'
+            f'<origin publicID="o{e["id"]}"><time><value>{_iso(e["time_ms"])}</value></time>'
+            f'<latitude><value>{e["lat"]}</value></latitude><longitude><value>{e["lon"]}</value></longitude>'
+            f'<depth><value>{round(e["depth_km"] * 1000)}</value></depth></origin>'
+            f'<magnitude publicID="m{e["id"]}"><mag><value>{e["mag"]}</value></mag></magnitude>'
+            f'<preferredOriginID>o{e["id"]}</preferredOriginID><preferredMagnitudeID>m{e["id"]}</preferredMagnitudeID>'
+            '</event>')
+    parts.append("</eventParameters></q:quakeml>")
+    return "".join(parts).encode()
+
+def _chunks(body: bytes):
+    return (body[i:i + CHUNK] for i in range(0, len(body), CHUNK))
+
+def measure(name: str, body: bytes, repeat: int) -> dict:
+    adapter = ADAPTERS[name]
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        batch = adapter.parse(_chunks(body))
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    adapter.parse(_chunks(body))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"format": name, "rows": len(batch), "body_kib": round(len(body) / 1024, 1),
+            "best_s": round(best, 4), "rows_per_s": round(len(batch) / best), "mib_per_s": round(len(body) / 2**20 / best, 1),
+            "peak_kib": round(peak / 1024, 1)}
+
+def main():
+    ap = argparse.ArgumentParser(description="GeoJSON vs CSV vs QuakeML parse throughput")
+    ap.add_argument("--events", type=int, default=20_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    events = synthetic_events(args.events)
+    bodies = {"geojson": render_geojson(events), "csv": render_csv(events), "quakeml": render_quakeml(events)}
+    print(json.dumps([measure(name, body, args.repeat) for name, body in bodies.items()], indent=2))
+
+if __name__ == "__main__":
+    main()
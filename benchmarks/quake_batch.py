@@ -0,0 +1,62 @@
+# benchmarks/quake_batch.py
+"""
+Time and allocations to normalize parsed features: a Quake dataclass plus a
+dict per feature (the old path) vs one columnar QuakeBatch.
+
+    python -m benchmarks.quake_batch --features 10000 --repeat 5
+"""
+from __future__ import annotations
+import argparse, json, random, time, tracemalloc
+
+from app.usgs import QuakeBatch, _normalize_feature
+
+def synthetic_features(n: int, seed: int = 7) -> list:
+    rnd = random.Random(seed)
+    return [{"type": "Feature", "id": f"bench{i}",
+             "properties": {"time": 1_700_000_000_000 + i * 1000, "mag": round(rnd.uniform(-1, 7), 2),
+                            "place": f"{rnd.randint(1, 99)} km N of Somewhere"},
+             "geometry": {"type": "Point", "coordinates": [rnd.uniform(-180, 180), rnd.uniform(-90, 90),
+                                                           rnd.uniform(0, 600)]}}
+            for i in range(n)]
+
+def _dicts(features):
+    out = []
+    for f in features:
+        q = _normalize_feature(f)
+        if q is not None:
+            out.append(q.to_dict())
+    return out
+
+def _batch(features):
+    return QuakeBatch.from_features(features)
+
+def measure(fn, features, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(features)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    result = fn(features)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_10k = 10_000 / len(features)
+    return {
+        "rows": len(result),
+        "best_ms_per_10k": round(min(times) * 1000 * per_10k, 2),
+        "retained_kib_per_10k": round(retained / 1024 * per_10k, 1),
+        "peak_kib_per_10k": round(peak / 1024 * per_10k, 1),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Quake dataclass+dict vs columnar QuakeBatch")
+    ap.add_argument("--features", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    features = synthetic_features(args.features)
+    print(json.dumps({name: measure(fn, features, args.repeat)
+                      for name, fn in (("dataclass_dicts", _dicts), ("quake_batch", _batch))}, indent=2))
+
+if __name__ == "__main__":
+    main()
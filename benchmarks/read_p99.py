@@ -0,0 +1,109 @@
+# benchmarks/read_p99.py
+"""
+Read latency under continuous ingest: pooled read-only connections vs a fresh
+read-write connection per call (the pre-pool behaviour).
+
+    python -m benchmarks.read_p99 --seconds 5 --readers 8
+"""
+from __future__ import annotations
+import argparse, json, random, tempfile, threading, time
+from pathlib import Path
+
+from app import db
+from app.rules import Rule
+from app.writer import DbWriter
+
+READS = ("get_daily_report", "list_recent_alerts", "list_rules")
+
+def _percentile(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))] if xs else 0.0
+
+def _direct_read(name):
+    conn = db.get_conn()
+    try:
+        if name == "list_rules":
+            return conn.execute("SELECT id, name, min_mag, bbox FROM rules ORDER BY id DESC").fetchall()
+        if name == "get_daily_report":
+            return conn.execute(
+                "SELECT date(time_ms/1000,'unixepoch') AS day, COUNT(*), AVG(mag), MAX(mag) "
+                "FROM quakes GROUP BY day ORDER BY day DESC LIMIT 7").fetchall()
+        return conn.execute(
+            "SELECT id, created_ms, quake_id, rule_id, mag, place, lon, lat, rule_name "
+            "FROM alerts ORDER BY created_ms DESC LIMIT 25").fetchall()
+    finally:
+        conn.close()
+
+def run(mode: str, seconds: float, readers: int, batch: int, seed: int = 7) -> dict:
+    rnd = random.Random(seed)
+    w = DbWriter()
+    rule = Rule(id=db.create_rule("bench", 0.0, None), name="bench", min_mag=0.0)
+    stop = threading.Event()
+    latencies = []
+    lat_lock = threading.Lock()
+    written = [0]
+
+    def ingest():
+        n = 0
+        base = 1_700_000_000_000
+        while not stop.is_set():
+            rows = [{"id": f"{mode}{n + i}", "time_ms": base + (n + i) * 60_000, "mag": rnd.uniform(0, 7),
+                     "place": "bench", "lon": rnd.uniform(-180, 180), "lat": rnd.uniform(-90, 90),
+                     "depth_km": 10.0} for i in range(batch)]
+            w.submit_quakes(rows).result()
+            w.submit_alerts([db.alert_snapshot(r, rule, r["time_ms"]) for r in rows[:5]]).result()
+            n += batch
+            written[0] = n
+
+    def read():
+        local = []
+        i = 0
+        while not stop.is_set():
+            name = READS[i % len(READS)]
+            t0 = time.perf_counter()
+            if mode == "pool":
+                getattr(db, name)()
+            else:
+                _direct_read(name)
+            local.append(time.perf_counter() - t0)
+            i += 1
+        with lat_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=ingest)] + [threading.Thread(target=read) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    w.stop()
+
+    return {
+        "mode": mode,
+        "reads": len(latencies),
+        "reads_per_s": round(len(latencies) / seconds, 1),
+        "rows_written": written[0],
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Read p99 under continuous ingest")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--batch", type=int, default=200, help="quakes per ingest batch")
+    args = ap.parse_args()
+
+    results = []
+    for mode in ("direct", "pool"):
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_PATH = (Path(tmp) / "bench.db").as_posix()
+            db.init_db()
+            results.append(run(mode, args.seconds, args.readers, args.batch))
+            db.get_read_pool().close()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# benchmarks/suite.py
+"""
+The hub's hot paths in one offline run, with JSON results and a regression check.
+
+    python -m benchmarks.suite --quick --out bench.json            # ~10 s smoke run
+    python -m benchmarks.suite --out baseline.json                 # full sizes (daily report at 1M rows)
+    python -m benchmarks.suite --compare baseline.json --tolerance 0.25
+    python -m benchmarks.suite --only match,eventbus
+
+Every case builds its data from a fixed seed and gets its own scratch
+database, so runs differ only by machine noise. Metrics named *_per_s are
+higher-is-better and *_ms lower-is-better; --compare flags any of them
+that moved the wrong way by more than --tolerance against the baseline
+and exits 1. Other numbers (row counts, sizes) are context only.
+
+The focused scripts next to this one (read_p99, bulk_load, fetch_fake,
+parse_formats, quake_batch) stay the place to dig into a single path.
+"""
+from __future__ import annotations
+import argparse, asyncio, json, platform, random, statistics, sys, tempfile, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from app import db
+from app.events import EventBus, bus
+from app.rules import Rule, match_batch
+from app.usgs import QuakeBatch, _normalize_feature
+from benchmarks.quake_batch import synthetic_features
+
+SEED = 7
+DAY_MS = 86_400_000
+
+# ---------- helpers ----------
+@contextmanager
+def scratch_db() -> Iterator[Path]:
+    saved = db.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = (Path(tmp) / "bench.db").as_posix()
+        db.init_db()
+        try:
+            yield Path(tmp)
+        finally:
+            db.get_read_pool().close()
+            db.DB_PATH = saved
+
+def best(fn: Callable[[], object], repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def quake_rows(n: int, seed: int = SEED, days: int = 365, prefix: str = "b") -> List[Dict]:
+    """n quakes spread over the last `days` days, Gutenberg-Richter magnitudes."""
+    rnd = random.Random(seed)
+    start = 1_700_000_000_000
+    return [{"id": f"{prefix}{i}", "time_ms": start + int(rnd.random() * days * DAY_MS),
+             "mag": round(rnd.expovariate(2.3), 2), "place": f"{rnd.randint(1, 99)} km N of Bench",
+             "lon": rnd.uniform(-180, 180), "lat": rnd.uniform(-80, 80), "depth_km": rnd.uniform(0, 600)}
+            for i in range(n)]
+
+def _rate(n: int, seconds: float) -> float:
+    return round(n / seconds, 1) if seconds > 0 else 0.0
+
+def _pct(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))] if xs else 0.0
+
+# ---------- cases ----------
+def bench_normalize(quick: bool) -> Tuple[Dict, Dict]:
+    n = 20_000 if quick else 100_000
+    feats = synthetic_features(n, SEED)
+    per_feature = best(lambda: [_normalize_feature(f) for f in feats])
+    batch = best(lambda: QuakeBatch.from_features(feats))
+    return {"features": n}, {"normalize_feature_per_s": _rate(n, per_feature), "quake_batch_per_s": _rate(n, batch)}
+
+def bench_bulk_upsert(quick: bool) -> Tuple[Dict, Dict]:
+    n = 20_000 if quick else 200_000
+    rows = quake_rows(n)
+    with scratch_db():
+        t0 = time.perf_counter()
+        inserted = db.bulk_upsert_quakes(rows)
+        fresh = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        db.bulk_upsert_quakes(rows)  # every row known and unchanged
+        again = time.perf_counter() - t0
+    return {"rows": n}, {"inserted": inserted, "new_rows_per_s": _rate(n, fresh), "duplicate_rows_per_s": _rate(n, again)}
+
+def bench_match(quick: bool) -> Tuple[Dict, Dict]:
+    grid = [(1_000, 10), (10_000, 10), (10_000, 100)] + ([] if quick else [(100_000, 100)])
+    rnd = random.Random(SEED)
+    metrics: Dict[str, float] = {}
+    for n_quakes, n_rules in grid:
+        batch = QuakeBatch.from_rows(quake_rows(n_quakes))
+        rules = []
+        for i in range(n_rules):
+            bbox = None
+            if i % 2:
+                lon, lat = rnd.uniform(-170, 150), rnd.uniform(-70, 50)
+                bbox = f"{lon:.2f},{lat:.2f},{lon + 20:.2f},{lat + 20:.2f}"
+            rules.append(Rule(i + 1, f"r{i}", round(rnd.uniform(0, 5), 1), bbox))
+        secs = best(lambda: match_batch(batch, rules))
+        metrics[f"q{n_quakes}_r{n_rules}_evals_per_s"] = _rate(n_quakes * n_rules, secs)
+    return {"grid": grid}, metrics
+
+def bench_alerts(quick: bool) -> Tuple[Dict, Dict]:
+    n = 2_000 if quick else 20_000
+    rows = quake_rows(n)
+    with scratch_db():
+        db.bulk_upsert_quakes(rows)
+        rule = Rule(db.create_rule("bench", 0.0, None), "bench", 0.0)
+        t0 = time.perf_counter()
+        for q in rows:  # one transaction per alert
+            conn = db.get_conn()
+            db.write_alerts(conn, [db.alert_snapshot(q, rule, 1)])
+            conn.commit()
+            conn.close()
+        one_by_one = time.perf_counter() - t0
+        other = Rule(db.create_rule("bench-bulk", 0.0, None), "bench-bulk", 0.0)
+        conn = db.get_conn()
+        t0 = time.perf_counter()
+        db.write_alerts(conn, [db.alert_snapshot(q, other, 1) for q in rows])
+        conn.commit()
+        bulk = time.perf_counter() - t0
+        conn.close()
+    return {"alerts": n}, {"single_alert_per_s": _rate(n, one_by_one), "write_alerts_per_s": _rate(n, bulk)}
+
+def bench_daily_report(quick: bool) -> Tuple[Dict, Dict]:
+    sizes = [10_000, 100_000] if quick else [10_000, 1_000_000]
+    metrics: Dict[str, float] = {}
+    for n in sizes:
+        with scratch_db():
+            conn = db.get_conn()
+            step = 100_000
+            for i in range(0, n, step):
+                part = quake_rows(min(step, n - i), seed=SEED + i, prefix=f"d{i}_")
+                conn.executemany(db.QUAKE_INSERT_SQL.format(table="quakes"), map(db.quake_row, part))
+                conn.commit()
+            conn.close()
+            db.get_daily_report(7)  # warm the page cache
+            times = []
+            for _ in range(5):
+                t0 = time.perf_counter()
+                db.get_daily_report(7)
+                times.append(time.perf_counter() - t0)
+        label = f"{n // 1000}k" if n < 1_000_000 else f"{n // 1_000_000}m"
+        metrics[f"rows_{label}_median_ms"] = round(statistics.median(times) * 1000, 3)
+    return {"rows": sizes}, metrics
+
+def bench_eventbus(quick: bool) -> Tuple[Dict, Dict]:
+    n = 50_000 if quick else 200_000
+    readers = 64
+    ev_bus = EventBus()
+    t0 = time.perf_counter()
+    for i in range(n):
+        ev_bus.publish({"type": "Bench", "i": i})
+    alone = time.perf_counter() - t0
+
+    # fan-out: SSE-style clients each poll tail(1) every millisecond while the publisher runs
+    stop = threading.Event()
+    reads = [0] * readers
+
+    def reader(k: int) -> None:
+        while not stop.wait(0.001):
+            ev_bus.tail(1)
+            reads[k] += 1
+
+    threads = [threading.Thread(target=reader, args=(k,)) for k in range(readers)]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    for i in range(n):
+        ev_bus.publish({"type": "Bench", "i": i})
+    contended = time.perf_counter() - t0
+    stop.set()
+    for t in threads:
+        t.join()
+    return ({"events": n, "readers": readers},
+            {"publish_per_s": _rate(n, alone), "publish_with_readers_per_s": _rate(n, contended),
+             "tail_reads_per_s": _rate(sum(reads), contended)})
+
+SSE_POLL_S = 0.001
+
+def bench_sse(quick: bool) -> Tuple[Dict, Dict]:
+    subscribers, rounds = (4, 5) if quick else (16, 20)
+    with scratch_db():
+        from app import main  # imported late: app.main runs init_db() on the current DB_PATH
+        from app.main import events_stream
+
+        async def run() -> List[float]:
+            bus.publish({"type": "BenchWarmup"})
+            streams = [events_stream().body_iterator for _ in range(subscribers)]
+            await asyncio.gather(*(s.__anext__() for s in streams))
+            latencies: List[float] = []
+            for r in range(rounds):
+                sent = time.perf_counter()
+                bus.publish({"type": "BenchDelivery", "round": r})
+
+                async def receive(stream) -> float:
+                    await stream.__anext__()
+                    return time.perf_counter() - sent
+
+                latencies += await asyncio.gather(*(receive(s) for s in streams))
+            return latencies
+
+        # with the default 1 s poll the numbers would only measure the sleep;
+        # at 1 ms they show the serialize/hand-off cost per subscriber
+        saved, main.SSE_POLL_S = main.SSE_POLL_S, SSE_POLL_S
+        try:
+            lat = asyncio.run(run())
+        finally:
+            main.SSE_POLL_S = saved
+    return ({"subscribers": subscribers, "rounds": rounds, "poll_s": SSE_POLL_S},
+            {"delivery_p50_ms": round(_pct(lat, 50) * 1000, 1), "delivery_p99_ms": round(_pct(lat, 99) * 1000, 1)})
+
+CASES: Dict[str, Callable[[bool], Tuple[Dict, Dict]]] = {
+    "normalize": bench_normalize,
+    "bulk_upsert": bench_bulk_upsert,
+    "match": bench_match,
+    "alerts": bench_alerts,
+    "daily_report": bench_daily_report,
+    "eventbus": bench_eventbus,
+    "sse": bench_sse,
+}
+
+# ---------- run / compare ----------
+def run_suite(names: List[str], quick: bool) -> Dict:
+    out = {"seed": SEED, "quick": quick, "python": platform.python_version(), "platform": platform.platform(),
+           "created_s": int(time.time()), "cases": {}}
+    for name in names:
+        t0 = time.perf_counter()
+        params, metrics = CASES[name](quick)
+        out["cases"][name] = {"params": params, "metrics": metrics, "seconds": round(time.perf_counter() - t0, 2)}
+        print(f"{name:<13} {json.dumps(metrics)}", file=sys.stderr)
+    return out
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Metrics that got worse than the baseline by more than `tolerance` (a fraction)."""
+    regressions = []
+    for case, entry in current["cases"].items():
+        base = baseline.get("cases", {}).get(case, {}).get("metrics", {})
+        for metric, value in entry["metrics"].items():
+            old = base.get(metric)
+            if not old or not isinstance(value, (int, float)):
+                continue
+            if metric.endswith("_per_s"):
+                change = (old - value) / old
+            elif metric.endswith("_ms"):
+                change = (value - old) / old
+            else:
+                continue
+            if change > tolerance:
+                regressions.append({"case": case, "metric": metric, "baseline": old, "current": value,
+                                    "worse_by": round(change, 3)})
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmark suite for the hub's hot paths")
+    ap.add_argument("--quick", action="store_true", help="Smaller sizes for a fast smoke run")
+    ap.add_argument("--only", type=str, default="", help=f"Comma-separated cases: {','.join(CASES)}")
+    ap.add_argument("--out", type=str, default=None, help="Write results JSON here (default: stdout)")
+    ap.add_argument("--compare", type=str, default=None, help="Baseline results JSON to check against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (fraction)")
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        ap.error(f"unknown case(s): {', '.join(unknown)}")
+    results = run_suite(names, args.quick)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get("quick") != args.quick:
+            print("warning: baseline and this run use different sizes (--quick)", file=sys.stderr)
+        results["regressions"] = compare(results, baseline, args.tolerance)
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+    for r in results.get("regressions", []):
+        print(f"REGRESSION {r['case']}.{r['metric']}: {r['baseline']} -> {r['current']} "
+              f"(worse by {r['worse_by']:.0%})", file=sys.stderr)
+    sys.exit(1 if results.get("regressions") else 0)
+
+if __name__ == "__main__":
+    main()
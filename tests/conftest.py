@@ -0,0 +1,10 @@
+import pytest
+
+from app import db
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """Point app.db at a fresh database file for the duration of a test."""
+    monkeypatch.setattr(db, "DB_PATH", (tmp_path / "quakes.db").as_posix())
+    db.init_db()
+    return tmp_path
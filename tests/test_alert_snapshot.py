@@ -0,0 +1,35 @@
+import sqlite3
+
+from app import db
+
+def test_migration_backfills_legacy_alert_rows(tmp_path, monkeypatch):
+    path = (tmp_path / "legacy.db").as_posix()
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE quakes (id TEXT PRIMARY KEY, time_ms INTEGER NOT NULL, mag REAL NOT NULL,
+                             place TEXT NOT NULL, lon REAL NOT NULL, lat REAL NOT NULL, depth_km REAL NOT NULL);
+        CREATE TABLE rules (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, min_mag REAL NOT NULL, bbox TEXT);
+        CREATE TABLE alerts (id INTEGER PRIMARY KEY AUTOINCREMENT, quake_id TEXT NOT NULL,
+                             rule_id INTEGER NOT NULL, created_ms INTEGER NOT NULL);
+        INSERT INTO quakes VALUES ('us1', 1700000000000, 4.2, 'Old place', -120.0, 35.0, 8.0);
+        INSERT INTO rules(name, min_mag, bbox) VALUES ('Legacy', 4.0, NULL);
+        INSERT INTO alerts(quake_id, rule_id, created_ms) VALUES ('us1', 1, 1700000001000);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.init_db()
+
+    [a] = db.list_recent_alerts()
+    assert (a["mag"], a["place"], a["lat"], a["lon"], a["rule_name"]) == (4.2, "Old place", 35.0, -120.0, "Legacy")
+    assert a["time_ms"] == 1700000000000
+
+def test_recent_alerts_is_a_single_index_scan(tmp_db):
+    for sql in (db.RECENT_ALERTS_SQL, db.LIST_ALERTS_SQL):  # the statements the listings run
+        with db.read_conn() as conn:
+            plan = " ".join(r["detail"] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, (25,)))
+        assert "COVERING INDEX idx_alerts_recent" in plan
+        assert "quakes" not in plan and "rules" not in plan
@@ -0,0 +1,18 @@
+from benchmarks.suite import compare
+
+def _run(**metrics):
+    return {"cases": {"case": {"params": {}, "metrics": metrics}}}
+
+def test_compare_flags_only_metrics_that_got_worse_beyond_tolerance():
+    base = _run(rows_per_s=1000.0, report_ms=10.0, rows=500)
+    current = _run(rows_per_s=700.0, report_ms=11.0, rows=5)
+    [reg] = compare(current, base, tolerance=0.25)
+    assert reg == {"case": "case", "metric": "rows_per_s", "baseline": 1000.0, "current": 700.0, "worse_by": 0.3}
+
+    # lower *_ms and higher *_per_s are improvements; unsuffixed numbers are context only
+    assert compare(_run(rows_per_s=5000.0, report_ms=1.0, rows=0), base, 0.25) == []
+    assert [r["metric"] for r in compare(_run(report_ms=20.0), base, 0.25)] == ["report_ms"]
+
+def test_compare_skips_metrics_missing_from_the_baseline():
+    assert compare(_run(new_per_s=1.0), _run(), 0.25) == []
+    assert compare(_run(rows_per_s=1.0), {"cases": {}}, 0.25) == []
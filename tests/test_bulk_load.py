@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from app import db
+from app.bulk_load import bulk_load, read_checkpoint
+
+HEADER = "time,latitude,longitude,depth,mag,magType,nst,gap,dmin,rms,net,id,updated,place,type\n"
+
+def _csv(path, start, n):
+    lines = [HEADER]
+    for i in range(start, start + n):
+        lines.append(f'2023-03-{1 + i % 28:02d}T00:00:{i % 60:02d}.000Z,{i % 80}.5,-{i % 170}.25,{i % 30}.0,'
+                     f'{(i % 60) / 10},ml,,,,,us,us{i},2023-04-01T00:00:00.000Z,"{i} km N of Place, CA",earthquake\n')
+    lines.append("2023-03-01T00:00:00.000Z,,,,1.0,ml,,,,,us,broken,,nowhere,earthquake\n")
+    path.write_text("".join(lines))
+
+def _indexes():
+    conn = db.get_conn()
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    conn.close()
+    return names
+
+def _count():
+    conn = db.get_conn()
+    n = conn.execute("SELECT COUNT(*) FROM quakes").fetchone()[0]
+    conn.close()
+    return n
+
+def test_bulk_load_csv_and_geojson_with_pool(tmp_db):
+    src = tmp_db / "exports"
+    src.mkdir()
+    _csv(src / "a.csv", 0, 3000)
+    feats = [{"type": "Feature", "id": f"g{i}", "properties": {"time": 1_680_000_000_000 + i, "mag": 2.0, "place": "g"},
+              "geometry": {"type": "Point", "coordinates": [1.0, 2.0, 3.0]}} for i in range(50)]
+    (src / "b.geojson").write_text(json.dumps({"type": "FeatureCollection", "features": feats}))
+
+    stats = bulk_load([str(src)], tmp_db / "ckpt.json", workers=2, chunk_bytes=16 * 1024, txn_rows=500)
+    assert stats["rows"] == 3050 and stats["inserted"] == 3050 and stats["dropped"] == 1
+    assert stats["units"] > 4
+    assert _count() == 3050
+    assert {"idx_quakes_time", "idx_quakes_mag"} <= _indexes()
+    assert not (tmp_db / "ckpt.json").exists()
+    q = db.list_recent_quakes(3000)
+    assert any(r["place"] == "7 km N of Place, CA" for r in q)
+
+def test_bulk_load_resumes_from_checkpoint(tmp_db, monkeypatch):
+    _csv(tmp_db / "a.csv", 0, 2000)
+    ckpt = tmp_db / "ckpt.json"
+
+    def interrupt(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        bulk_load([str(tmp_db / "a.csv")], ckpt, workers=0, chunk_bytes=8 * 1024, txn_rows=100, progress=interrupt)
+    saved = read_checkpoint(ckpt)
+    first = saved["rows"]
+    assert 0 < first < 2000 and _count() == first
+    assert "idx_quakes_time" not in _indexes()
+
+    after_init = []
+    real_init = db.init_db
+    monkeypatch.setattr(db, "init_db", lambda **kw: (real_init(**kw), after_init.append("idx_quakes_time" in _indexes())))
+    stats = bulk_load([str(tmp_db / "a.csv")], ckpt, workers=0, chunk_bytes=8 * 1024, txn_rows=100)
+    assert after_init == [False]  # resuming doesn't build the indexes over the partial table first
+    assert stats["rows"] == 2000 and stats["inserted"] == 2000
+    assert _count() == 2000
+    assert "idx_quakes_time" in _indexes()
+
+def test_bulk_load_only_looks_up_ids_when_the_table_had_rows(tmp_db, monkeypatch):
+    lookups = []
+    real = db._stored_versions
+    monkeypatch.setattr(db, "_stored_versions", lambda conn, table, ids: lookups.append(len(ids)) or real(conn, table, ids))
+    _csv(tmp_db / "a.csv", 0, 500)
+    bulk_load([str(tmp_db / "a.csv")], tmp_db / "ckpt.json", workers=0, txn_rows=100)
+    assert lookups == [] and _count() == 500
+
+    # a later export with a newer `updated` revises what is already there
+    text = (tmp_db / "a.csv").read_text().replace("2023-04-01T00:00:00.000Z", "2023-05-01T00:00:00.000Z")
+    (tmp_db / "b.csv").write_text(text.replace(' km N of Place', ' km S of Place'))
+    stats = bulk_load([str(tmp_db / "b.csv")], tmp_db / "ckpt.json", workers=0, txn_rows=100)
+    assert sum(lookups) == 500 and stats["inserted"] == 0
+    assert all(" km S of " in q["place"] for q in db.list_recent_quakes(500))
@@ -0,0 +1,66 @@
+import time
+
+import httpx
+import pytest
+
+from app import db
+from app.fake_usgs import FakeUSGS
+from app.ingest import run_ingest
+from app.usgs import fetch_quakes, stream_feed
+from app.writer import DbWriter
+
+class Clock:
+    def __init__(self):
+        self.t = 1_700_000_000.0
+
+    def __call__(self):
+        return self.t
+
+def test_real_fetch_over_keepalive_with_growing_feed():
+    clock = Clock()
+    with FakeUSGS(rate_per_s=1.0, backlog=100, clock=clock) as fake, httpx.Client() as client:
+        first = fetch_quakes(fake.url("all_hour"), client=client)
+        clock.t += 30
+        second = fetch_quakes(fake.url("all_hour"), client=client)
+        assert len(second) == len(first) + 30
+        assert second[0].time_ms > first[0].time_ms  # newest first
+        assert all(q.mag >= 2.5 for q in fetch_quakes(fake.url("2.5_day"), client=client))
+        assert fake.stats["connections"] == 1 and fake.stats["requests"] == 3
+
+def test_etag_and_gzip():
+    with FakeUSGS(clock=Clock()) as fake, httpx.Client() as client:
+        r = client.get(fake.url("all_day"))
+        assert r.headers["content-encoding"] == "gzip" and r.json()["features"]
+        again = client.get(fake.url("all_day"), headers={"If-None-Match": r.headers["etag"]})
+        assert again.status_code == 304 and fake.stats["not_modified"] == 1
+        plain = client.get(fake.url("all_day"), headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert len(plain.content) > int(r.headers["content-length"])
+
+def test_injected_failures_latency_and_bandwidth():
+    with FakeUSGS(latency_ms=300, clock=Clock()) as fake:
+        with pytest.raises(httpx.ReadTimeout):
+            fetch_quakes(fake.url("all_hour"), timeout=0.1)
+        fake.latency = 0
+        fake.fail_next(503, "drop")
+        with pytest.raises(httpx.HTTPStatusError):
+            fetch_quakes(fake.url("all_hour"))
+        with pytest.raises(httpx.RemoteProtocolError):
+            fetch_quakes(fake.url("all_hour"))
+        assert fetch_quakes(fake.url("all_hour"))
+        assert client_404(fake)
+
+    with FakeUSGS(bandwidth_bps=256 * 1024, compress=False, backlog=500, rate_per_s=1.0, clock=Clock()) as fake:
+        t0 = time.monotonic()
+        size = sum(map(len, stream_feed(fake.url("all_day"), chunk_size=4096)))
+        assert size == fake.stats["bytes_sent"] > 64 * 1024
+        assert time.monotonic() - t0 >= size / (256 * 1024) * 0.8
+
+def client_404(fake):
+    return httpx.get(fake.base_url + "/earthquakes/feed/v1.0/summary/nope.geojson").status_code == 404
+
+def test_ingest_pipeline_against_fake(tmp_db):
+    db.create_rule("all", 0.0, None)
+    with FakeUSGS(clock=Clock()) as fake:
+        result = run_ingest(fake.url("all_hour"), writer=DbWriter())
+    assert result["ingested"] == result["new"] == len(result["alerts"]) > 0
@@ -0,0 +1,75 @@
+import json
+
+from app.usgs import CSVAdapter, GeoJSONAdapter, QuakeMLAdapter, adapter_for
+
+GEOJSON = json.dumps({"type": "FeatureCollection", "metadata": {}, "features": [
+    {"type": "Feature", "id": "ci40000001",
+     "properties": {"time": 1705307482345, "updated": 1705309200000, "mag": 2.71, "place": "10 km NE of Ridgecrest, CA"},
+     "geometry": {"type": "Point", "coordinates": [-117.5, 35.7, 8.2]}},
+    {"type": "Feature", "id": "us7000abcd",
+     "properties": {"time": 1705311000000, "updated": 1705312800000, "mag": None, "place": "Fiji region"},
+     "geometry": {"type": "Point", "coordinates": [178.1, -17.9, 560.0]}},
+]}).encode()
+
+CSV = (
+    "time,latitude,longitude,depth,mag,magType,nst,gap,dmin,rms,net,id,updated,place,type\n"
+    '2024-01-15T08:31:22.345Z,35.7,-117.5,8.2,2.71,ml,,,,,ci,ci40000001,2024-01-15T09:00:00.000Z,'
+    '"10 km NE of Ridgecrest, CA",earthquake\n'
+    "2024-01-15T09:30:00.000Z,-17.9,178.1,560,,mb,,,,,us,us7000abcd,2024-01-15T10:00:00.000Z,Fiji region,earthquake\n"
+    "2024-01-15T09:31:00.000Z,,,,1.0,mb,,,,,us,broken,,nowhere,earthquake\n"
+).encode()
+
+QUAKEML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<q:quakeml xmlns="http://quakeml.org/xmlns/bed/1.2" xmlns:q="http://quakeml.org/xmlns/quakeml/1.2"
+           xmlns:catalog="http://anss.org/xmlns/catalog/0.1">
+ <eventParameters publicID="quakeml:earthquake.usgs.gov/fdsnws/event/1/query">
+  <event catalog:eventsource="ci" catalog:eventid="40000001" publicID="quakeml:earthquake.usgs.gov/x?eventid=ci40000001">
+   <description><type>earthquake name</type><text>10 km NE of Ridgecrest, CA</text></description>
+   <origin publicID="o-other"><time><value>2024-01-15T00:00:00Z</value></time>
+    <latitude><value>0</value></latitude><longitude><value>0</value></longitude><depth><value>0</value></depth></origin>
+   <origin publicID="o-pref"><time><value>2024-01-15T08:31:22.345000Z</value></time>
+    <latitude><value>35.7</value></latitude><longitude><value>-117.5</value></longitude>
+    <depth><value>8200</value></depth></origin>
+   <magnitude publicID="m-pref"><mag><value>2.71</value></mag></magnitude>
+   <preferredOriginID>o-pref</preferredOriginID>
+   <preferredMagnitudeID>m-pref</preferredMagnitudeID>
+   <creationInfo><creationTime>2024-01-15T09:00:00.000Z</creationTime></creationInfo>
+  </event>
+  <event publicID="quakeml:earthquake.usgs.gov/fdsnws/event/1/query?eventid=us7000abcd&amp;format=quakeml">
+   <description><text>Fiji region</text></description>
+   <origin publicID="o2"><time><value>2024-01-15T09:30:00Z</value></time>
+    <latitude><value>-17.9</value></latitude><longitude><value>178.1</value></longitude>
+    <depth><value>560000</value></depth>
+    <creationInfo><creationTime>2024-01-15T10:00:00Z</creationTime></creationInfo></origin>
+  </event>
+  <event publicID="quakeml:broken"><description><text>no origin</text></description></event>
+ </eventParameters>
+</q:quakeml>
+"""
+
+EXPECTED = [
+    {"id": "ci40000001", "time_ms": 1705307482345, "mag": 2.71, "place": "10 km NE of Ridgecrest, CA",
+     "lon": -117.5, "lat": 35.7, "depth_km": 8.2, "updated_ms": 1705309200000},
+    {"id": "us7000abcd", "time_ms": 1705311000000, "mag": 0.0, "place": "Fiji region",
+     "lon": 178.1, "lat": -17.9, "depth_km": 560.0, "updated_ms": 1705312800000},
+]
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_three_formats_give_the_same_batch():
+    for adapter, body, dropped in ((GeoJSONAdapter(), GEOJSON, 0), (CSVAdapter(), CSV, 1), (QuakeMLAdapter(), QUAKEML, 1)):
+        for size in (5, 64, len(body)):
+            batch = adapter.parse(_chunks(body, size))
+            assert batch.to_dicts() == EXPECTED, (adapter.name, size)
+            assert batch.dropped == dropped
+
+def test_batches_are_chunked():
+    sizes = [len(b) for b in CSVAdapter().batches(_chunks(CSV, 16), size=1)]
+    assert sizes == [1, 1, 0]  # the trailing batch only carries the dropped row
+
+def test_adapter_selection():
+    assert adapter_for("all_hour").name == "geojson"
+    assert adapter_for("https://earthquake.usgs.gov/fdsnws/event/1/query?format=xml&minmagnitude=4").name == "quakeml"
+    assert adapter_for("https://example.org/catalog/week.csv").name == "csv"
+    assert adapter_for("https://example.org/feed.quakeml").name == "quakeml"
@@ -0,0 +1,48 @@
+import json
+import zlib
+
+import httpx
+import pytest
+import respx
+
+from app.fake_usgs import FakeUSGS
+from app.metrics import FEED_DECODED_BYTES, FEED_WIRE_BYTES
+from app.usgs import _Inflater, feed_label, fetch_quakes, stream_feed
+
+def _bytes(feed):
+    label = feed_label(feed)  # the fake's URLs are ad-hoc, so "custom"
+    return FEED_WIRE_BYTES.labels(label)._value.get(), FEED_DECODED_BYTES.labels(label)._value.get()
+
+def test_gzip_is_negotiated_and_counted():
+    with FakeUSGS(backlog=3000, rate_per_s=1.0) as fake:
+        url = fake.url("all_day")
+        wire0, dec0 = _bytes(url)
+        body = b"".join(stream_feed(url, chunk_size=4096))
+        wire, dec = _bytes(url)
+        assert fake.stats["bytes_sent"] == wire - wire0
+        assert dec - dec0 == len(body) > 5 * (wire - wire0)
+        assert len(json.loads(body)["features"]) == 3001
+
+        fake.compress = False
+        wire0, dec0 = _bytes(url)
+        assert len(fetch_quakes(url)) == 3001
+        wire, dec = _bytes(url)
+        assert wire - wire0 == dec - dec0
+
+@pytest.mark.parametrize("wbits", [zlib.MAX_WBITS, -zlib.MAX_WBITS])
+def test_deflate_zlib_and_raw(wbits):
+    doc = {"type": "FeatureCollection", "features": [
+        {"id": f"d{i}", "properties": {"time": 1, "mag": 1.0, "place": "x"},
+         "geometry": {"coordinates": [1.0, 2.0, 3.0]}} for i in range(200)]}
+    co = zlib.compressobj(6, zlib.DEFLATED, wbits)
+    packed = co.compress(json.dumps(doc).encode()) + co.flush()
+    url = "https://example.test/deflate.geojson"
+    with respx.mock:
+        route = respx.get(url).mock(return_value=httpx.Response(
+            200, content=packed, headers={"Content-Encoding": "deflate"}))
+        assert len(fetch_quakes(url)) == 200
+        assert route.calls[0].request.headers["Accept-Encoding"] == "gzip, deflate"
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        _Inflater("br")
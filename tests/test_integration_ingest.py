@@ -1,3 +1,5 @@
+import time
+
 import respx
 from httpx import Response
 from fastapi.testclient import TestClient
@@ -25,6 +27,15 @@ USGS_SAMPLE = {
     ],
 }
 
+def _wait_for_job(job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/ingest/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
 def test_create_rule_and_ingest_triggers_alert():
     # Create a rule via the API
     r = client.post("/rules", data={"name": "CA 3+", "min_mag": 3.0, "bbox": "-125,32,-114,42"})
@@ -35,10 +46,16 @@ def test_create_rule_and_ingest_triggers_alert():
     with respx.mock:
         respx.get(FEEDS["all_hour"]).mock(return_value=Response(200, json=USGS_SAMPLE))
         res = client.post("/ingest", data={"feed": "all_hour"})
-        assert res.status_code == 200
-        data = res.json()
+        assert res.status_code == 202
+        job = _wait_for_job(res.json()["job_id"])
+        assert job["status"] == "succeeded"
+        assert set(job["stages"]) >= {"fetch", "store", "match", "alert_write", "publish"}
+        data = job["result"]
         assert data["ingested"] == 2
 
         # Verify that OUR rule produced exactly one alert for the CA quake (us123)
         mine = [a for a in data["alerts"] if a["rule_id"] == created_id and a["quake_id"] == "us123"]
         assert len(mine) == 1
+
+def test_unknown_job_is_404():
+    assert client.get("/ingest/jobs/nope").status_code == 404
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from app.jobs import JobManager
+
+def test_concurrent_requests_for_a_feed_share_one_job():
+    release = threading.Event()
+    calls = []
+
+    def run(feed, stages):
+        calls.append(feed)
+        release.wait(5)
+        stages["fetch"] = 0.01
+        return {"ingested": 1}
+
+    mgr = JobManager(run)
+    a, created_a = mgr.submit("all_hour")
+    b, created_b = mgr.submit("all_hour")
+    c, _ = mgr.submit("all_day")
+    assert created_a and not created_b and a is b
+    assert c is not a
+
+    release.set()
+    assert mgr.run_and_wait("all_hour", timeout=5) == {"ingested": 1}  # may join a or start fresh
+    assert a.future.result(timeout=5) == {"ingested": 1}
+    assert mgr.get(a.id).to_dict()["status"] == "succeeded"
+    assert mgr.get(a.id).stages == {"fetch": 0.01}
+
+    d, created_d = mgr.submit("all_hour")
+    assert created_d and d.id != a.id
+    d.future.result(timeout=5)
+
+def test_failed_job_reports_error():
+    def run(feed, stages):
+        raise ValueError("bad feed")
+
+    mgr = JobManager(run)
+    job, _ = mgr.submit("x")
+    with pytest.raises(RuntimeError):
+        job.future.result(timeout=5)
+    assert job.status == "failed" and "bad feed" in job.error
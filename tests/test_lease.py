@@ -0,0 +1,58 @@
+import os, signal, sqlite3, subprocess, sys, time
+from pathlib import Path
+
+from app.lease import Lease
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_lease_is_exclusive_until_expiry(tmp_db):
+    a = Lease("sched", holder="a", ttl_s=10)
+    b = Lease("sched", holder="b", ttl_s=10)
+    assert a.try_acquire(now_ms=1_000)
+    assert not b.try_acquire(now_ms=2_000)
+    assert a.try_acquire(now_ms=5_000)            # renew pushes expiry to 15_000
+    assert not b.try_acquire(now_ms=14_000)
+    assert b.try_acquire(now_ms=15_001)
+    assert not a.try_acquire(now_ms=15_002)
+
+def _holder(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT holder, expires_ms FROM leases WHERE name = 'mp'").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row and row[1] > time.time() * 1000 else None
+
+def _wait_for_holder(db_path, exclude=None, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        h = _holder(db_path)
+        if h and h != exclude:
+            return h
+        time.sleep(0.05)
+    raise AssertionError("no leader elected")
+
+def test_survivor_takes_over_when_leader_is_killed(tmp_db):
+    db_path = str(tmp_db / "quakes.db")
+    script = "from app.lease import Lease; import time; Lease('mp', ttl_s=1.0).start(); time.sleep(60)"
+    env = {**os.environ, "QUAKE_HUB_DB": db_path, "PYTHONPATH": str(ROOT)}
+    procs = {}
+    for _ in range(3):
+        p = subprocess.Popen([sys.executable, "-c", script], cwd=str(ROOT), env=env)
+        procs[p.pid] = p
+    try:
+        leader = _wait_for_holder(db_path)
+        pid = int(leader.split(":")[1])
+        assert pid in procs
+        procs[pid].send_signal(signal.SIGKILL)
+        procs[pid].wait()
+
+        killed_at = time.time()
+        successor = _wait_for_holder(db_path, exclude=leader)
+        assert int(successor.split(":")[1]) in procs
+        assert int(successor.split(":")[1]) != pid
+        assert time.time() - killed_at < 3.0
+    finally:
+        for p in procs.values():
+            p.kill()
+            p.wait()
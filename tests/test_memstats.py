@@ -0,0 +1,54 @@
+import sys
+
+from fastapi.testclient import TestClient
+
+from app import memstats
+from app.events import EventBus
+from app.main import app
+from app.metrics import MEMORY_BYTES
+
+def _gauge(name):
+    for m in MEMORY_BYTES.collect():
+        for s in m.samples:
+            if s.labels == {"structure": name}:
+                return s.value
+    return None
+
+def test_deep_size_follows_references_and_extrapolates_samples():
+    payload = "x" * 1000
+    assert memstats.deep_size({"k": payload}) > sys.getsizeof(payload)
+    rows = [{"id": f"q{i}", "place": "p" * 100} for i in range(5000)]
+    exact = memstats.deep_size(rows, sample=len(rows))
+    approx = memstats.deep_size(rows, sample=64)
+    assert abs(approx - exact) / exact < 0.05
+
+def test_registered_structures_reach_the_gauges():
+    ring = EventBus(maxlen=100)
+    memstats.register("test.ring", lambda: memstats.measure(ring.snapshot()))
+    try:
+        empty = memstats.update()["test.ring"]
+        for i in range(100):
+            ring.publish({"type": "Test", "pad": f"{i:03d}" + "x" * 500})
+        full = memstats.update()["test.ring"]
+        assert empty["entries"] == 0 and full["entries"] == 100
+        assert full["bytes"] > 100 * 500
+        assert _gauge("test.ring") == full["bytes"]
+    finally:
+        memstats.unregister("test.ring")
+    assert _gauge("test.ring") is None and "test.ring" not in memstats.registered()
+
+def test_failing_sizer_is_reported_not_raised():
+    memstats.register("test.broken", lambda: 1 / 0)
+    try:
+        assert "ZeroDivisionError" in memstats.snapshot()["test.broken"]["error"]
+    finally:
+        memstats.unregister("test.broken")
+
+def test_debug_memory_lists_the_builtin_structures(tmp_db, monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setenv("QUAKE_HUB_ADMIN_TOKEN", "s3cret")
+    assert client.get("/debug/memory", headers={"X-Admin-Token": "nope"}).status_code == 403
+    body = client.get("/debug/memory", headers={"X-Admin-Token": "s3cret"}).json()
+    for name in ("events.ring", "sqlstats.templates", "pipeline.queues", "writer.queue", "db.read_pool", "sqlite.heap"):
+        assert name in body["structures"]
+    assert body["total_bytes"] >= body["structures"]["events.ring"]["bytes"]
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+WORKER = """
+import sys
+from app.metrics import INGEST_COUNT, LAST_INGEST_TS, READ_POOL_IN_USE, process_exit
+INGEST_COUNT.inc(int(sys.argv[1]))
+LAST_INGEST_TS.set(int(sys.argv[2]))
+READ_POOL_IN_USE.inc()
+if sys.argv[3] == "exit":
+    process_exit()
+"""
+
+def _run(code, env, *args):
+    out = subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return out.stdout
+
+def test_workers_are_merged_with_gauge_modes(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    _run(WORKER, env, "3", "1700000000000", "exit")
+    _run(WORKER, env, "4", "1700000500000", "stay")
+    _run(WORKER, env, "5", "1700000100000", "stay")
+    text = _run("import sys; from app.metrics import render; sys.stdout.write(render().decode())", env)
+    lines = {l.rsplit(" ", 1)[0]: float(l.rsplit(" ", 1)[1]) for l in text.splitlines() if l and not l.startswith("#")}
+    assert lines["quakes_ingested_total"] == 12
+    assert lines["last_ingest_timestamp"] == 1700000500000  # max, not whichever worker answered
+    # the worker that exited cleanly no longer counts towards the live gauge
+    assert lines["db_read_pool_in_use"] == 2
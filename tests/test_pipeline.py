@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from app import db
+from app.metrics import FEATURES, FEATURES_SEEN, INGEST_STAGE_SECONDS
+from app.pipeline import IngestPipeline, STAGES, TIMED_STAGES
+from app.usgs import iter_geojson_features
+from app.writer import DbWriter
+
+def _feature(i, mag):
+    return {"type": "Feature", "id": f"p{i}",
+            "properties": {"time": 1700000000000 + i, "mag": mag, "place": f"Place {i}"},
+            "geometry": {"type": "Point", "coordinates": [-120.0 + i / 100, 35.0, 5.0]}}
+
+def _body(features):
+    doc = {"type": "FeatureCollection", "metadata": {"generated": 1}, "features": features}
+    return json.dumps(doc).encode()
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_streaming_parser_handles_any_chunking():
+    feats = [_feature(i, 1.0) for i in range(50)]
+    body = _body(feats)
+    for size in (1, 7, 1000, len(body)):
+        meta = {}
+        assert list(iter_geojson_features(_chunks(body, size), meta)) == feats
+        assert meta["metadata"] == {"generated": 1}
+
+def test_pipeline_stores_matches_and_alerts(tmp_db):
+    db.create_rule("M3+", 3.0, None)
+    feats = [_feature(i, 2.0 + (i % 3)) for i in range(100)] + [{"id": "broken"}]
+    w = DbWriter()
+    p = IngestPipeline("all_hour", source=_chunks(_body(feats), 512), writer=w, chunk_rows=7, queue_slots=1)
+    result = p.run()
+
+    assert result["ingested"] == 100 and result["new"] == 100
+    assert result["max_mag"] == 4.0
+    assert len(result["alerts"]) == 66
+    assert set(p.stages) == set(STAGES)
+
+    again = IngestPipeline("all_hour", source=[_body(feats)], writer=w).run()
+    assert again["new"] == 0 and again["alerts"] == []
+    w.stop()
+
+def test_stage_failure_aborts_the_pipeline(tmp_db):
+    w = DbWriter()
+    with pytest.raises(ValueError):
+        IngestPipeline("all_hour", source=[b'{"features": [{"id": 1}, oops'], writer=w).run()
+    w.stop()
+
+def _sample(metric, suffix, **labels):
+    for m in metric.collect():
+        for s in m.samples:
+            if s.name.endswith(suffix) and s.labels == labels:
+                return s.value
+    return 0.0
+
+def test_revisions_duplicates_and_drops_are_counted(tmp_db):
+    feats = [_feature(i, 2.0) for i in range(10)] + [{"id": "broken"}]
+    # an ad-hoc feed URL is labelled "custom", however many different ones are ingested
+    feed = "https://example.org/fdsnws/event/1/query?format=geojson&starttime=2024-01-01"
+    count = lambda result: _sample(FEATURES, "_total", feed="custom", result=result)
+    results = ("new", "revised", "duplicate", "dropped")
+    before = [count(r) for r in results]
+    seen = _sample(FEATURES_SEEN, "_total", feed="custom")
+    stages = [_sample(INGEST_STAGE_SECONDS, "_count", feed="custom", stage=s) for s in TIMED_STAGES]
+    w = DbWriter()
+    first = IngestPipeline(feed, source=[_body(feats)], writer=w).run()
+    assert (first["new"], first["revised"], first["dropped"]) == (10, 0, 1)
+
+    for f in feats[:3]:
+        f["properties"].update(mag=5.5, updated=f["properties"]["time"] + 60_000)
+    second = IngestPipeline(feed, source=[_body(feats)], writer=w).run()
+    w.stop()
+    assert (second["new"], second["revised"]) == (0, 3)
+    assert [q["mag"] for q in db.list_quakes_since(0) if q["id"] in ("p0", "p1", "p2")] == [5.5] * 3
+
+    assert [count(r) - b for r, b in zip(results, before)] == [10, 3, 7, 2]
+    assert _sample(FEATURES_SEEN, "_total", feed="custom") - seen == 22
+    for stage, b in zip(TIMED_STAGES, stages):
+        assert _sample(INGEST_STAGE_SECONDS, "_count", feed="custom", stage=stage) - b == 2
+    assert _sample(FEATURES_SEEN, "_total", feed=feed) == 0.0
+
+def test_alert_latency_flows_through_the_event(tmp_db):
+    from app.events import bus
+    from app.main import observe_delivery
+    from app.metrics import ALERT_ORIGIN_TO_INGEST, ALERT_INSERT_TO_SSE
+
+    db.create_rule("West M4.5+", 4.5, "-125,30,-110,45")
+    feats = [_feature(1, 5.0)]
+    feats[0]["properties"]["updated"] = 1700000030001
+    clock = iter(range(1700000090000, 1700000100000, 1000))
+    labels = dict(feed="4.5_day", rule_class="regional/m4.5+")
+    origin_sum = _sample(ALERT_ORIGIN_TO_INGEST, "_sum", **labels)
+    delivered = _sample(ALERT_INSERT_TO_SSE, "_count", **labels)
+    w = DbWriter()
+    IngestPipeline("4.5_day", source=[_body(feats)], writer=w, now_ms=lambda: next(clock)).run()
+    w.stop()
+
+    ev = [e for e in bus.tail(10) if e["type"] == "QuakeDetected" and e["feed"] == "4.5_day"][-1]
+    assert ev["rule"]["class"] == "regional/m4.5+"
+    assert ev["quake"]["time_ms"] == 1700000000001 and ev["ingested_ms"] < ev["alerted_ms"]
+    assert _sample(ALERT_ORIGIN_TO_INGEST, "_sum", **labels) - origin_sum == \
+        pytest.approx((ev["ingested_ms"] - 1700000000001) / 1000)
+    observe_delivery(ev)
+    assert _sample(ALERT_INSERT_TO_SSE, "_count", **labels) - delivered == 1
+
+def test_max_mag_only_counts_newly_inserted_quakes(tmp_db):
+    import random
+    from app.scheduler import FeedScheduler
+
+    w = DbWriter()
+    IngestPipeline("all_day", source=[_body([_feature(1, 5.0)])], writer=w).run()
+    result = IngestPipeline("all_day", source=[_body([_feature(1, 5.0), _feature(2, 1.0)])], writer=w).run()
+    w.stop()
+    assert result["new"] == 1 and result["max_mag"] == 1.0
+
+    sched = FeedScheduler(lambda feed: result, {"all_day": 120}, jitter=0, rng=random.Random(1))
+    assert sched._adapt(sched.feeds["all_day"], result) == "changed"  # an old M5 is not "active"
@@ -0,0 +1,56 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from app import profiler
+from app.main import app
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+def test_cpu_profile_sees_a_busy_thread():
+    stop = threading.Event()
+    t = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    t.start()
+    try:
+        result = profiler.profile(0.3, "cpu", hz=200)
+    finally:
+        stop.set()
+        t.join()
+    lines = result["collapsed"].splitlines()
+    assert result["samples"] > 0 and lines
+    spinner = [l for l in lines if l.startswith("spinner;")]
+    assert spinner and any("test_profiler:_spin" in l for l in spinner)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) >= 1
+
+def test_alloc_profile_reports_live_allocations():
+    keep = []
+    stop = threading.Event()
+
+    def allocate():
+        while not stop.is_set():
+            keep.append(bytearray(10_000))
+            stop.wait(0.005)
+
+    t = threading.Thread(target=allocate)
+    t.start()
+    try:
+        result = profiler.profile(0.3, "alloc", top=5)
+    finally:
+        stop.set()
+        t.join()
+    assert result["bytes"] > 0 and len(result["top"]) <= 5
+    assert any("test_profiler.py" in s["site"] for s in result["top"])
+
+def test_profile_endpoint_is_admin_only_and_single_flight(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setenv("QUAKE_HUB_ADMIN_TOKEN", "s3cret")
+    assert client.get("/debug/profile?seconds=0.1").status_code == 403
+    headers = {"X-Admin-Token": "s3cret"}
+    r = client.get("/debug/profile?seconds=0.1&format=json", headers=headers)
+    assert r.status_code == 200 and r.json()["mode"] == "cpu"
+    assert client.get("/debug/profile?mode=wall", headers=headers).status_code == 400
+    with profiler._busy:
+        assert client.get("/debug/profile?seconds=0.1", headers=headers).status_code == 409
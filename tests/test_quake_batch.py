@@ -0,0 +1,36 @@
+import random
+
+from app import db
+from app.rules import Rule, match_batch, quake_matches_rule
+from app.usgs import QuakeBatch, _normalize_feature
+
+def _feature(i, mag, lon, lat):
+    return {"id": f"q{i}", "properties": {"time": 1_700_000_000_000 + i, "mag": mag, "place": f"p{i}"},
+            "geometry": {"coordinates": [lon, lat, 10.0]}}
+
+def test_batch_rows_match_dataclass_path():
+    feats = [_feature(i, 1.0 + i, -120.0 + i, 35.0) for i in range(3)]
+    feats.append({"id": "bad", "properties": {}, "geometry": {"coordinates": [None, None, None]}})
+    batch = QuakeBatch.from_features(feats)
+    assert len(batch) == 3 and batch.dropped == 1
+    assert batch.to_dicts() == [_normalize_feature(f).to_dict() for f in feats[:3]]
+    row = batch[-1]
+    assert row["id"] == "q2" and row["mag"] == 3.0 and dict(row) == batch.to_dicts()[2]
+    assert list(batch.rows())[0] == ("q0", 1_700_000_000_000, 1.0, "p0", -120.0, 35.0, 10.0, 1_700_000_000_000)
+
+def test_match_batch_agrees_with_row_matcher():
+    rnd = random.Random(3)
+    batch = QuakeBatch.from_features(
+        _feature(i, rnd.uniform(0, 7), rnd.uniform(-180, 180), rnd.uniform(-90, 90)) for i in range(500))
+    rules = [Rule(1, "M4+", 4.0), Rule(2, "West", 2.0, "-125,32,-114,42"), Rule(3, "flipped", 1.0, "10,50,-10,-50")]
+    expected = sorted((i, r.id) for r in rules for i, q in enumerate(batch) if quake_matches_rule(q, r))
+    assert sorted((i, r.id) for i, r in match_batch(batch, rules)) == expected
+
+def test_write_quakes_accepts_batch(tmp_db):
+    batch = QuakeBatch.from_features(_feature(i, 2.0, 0.0, 0.0) for i in range(5))
+    conn = db.get_conn()
+    assert db.write_quakes(conn, batch) == 5
+    assert db.write_quakes(conn, batch) == 0
+    conn.commit()
+    conn.close()
+    assert {q["id"] for q in db.list_recent_quakes(10)} == {f"q{i}" for i in range(5)}
@@ -0,0 +1,25 @@
+import sqlite3
+
+import pytest
+
+from app import db
+
+def test_pool_connections_are_read_only(tmp_db):
+    with db.read_conn() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO rules(name, min_mag) VALUES ('x', 1.0)")
+
+def test_pool_sees_committed_writes(tmp_db):
+    assert db.list_rules() == []
+    rid = db.create_rule("M4+", 4.0, None)
+    assert [r["id"] for r in db.list_rules()] == [rid]
+
+def test_pool_is_bounded(tmp_db):
+    pool = db.ReadPool(db.DB_PATH, size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    pool.close()
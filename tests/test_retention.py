@@ -0,0 +1,63 @@
+import gzip, json
+
+from app import db
+from app.retention import DAY_MS, RetentionPolicy, run_retention
+from app.rules import Rule
+
+NOW = 1_750_000_000_000
+
+def _quake(qid, age_days, mag):
+    return {"id": qid, "time_ms": NOW - int(age_days * DAY_MS), "mag": mag,
+            "place": "Test", "lon": -120.0, "lat": 35.0, "depth_km": 5.0}
+
+def test_old_rows_are_archived_rolled_up_and_deleted(tmp_db):
+    old = [_quake("old1", 100, 3.0), _quake("old2", 100, 5.0)]
+    fresh = [_quake("new1", 1, 2.0)]
+    db.bulk_upsert_quakes(old + fresh)
+    rule = Rule(id=db.create_rule("all", 0.0, None), name="all", min_mag=0.0)
+    conn = db.get_conn()
+    db.write_alerts(conn, [db.alert_snapshot(old[0], rule, NOW - 400 * DAY_MS),
+                           db.alert_snapshot(fresh[0], rule, NOW - DAY_MS)])
+    conn.commit()
+    conn.close()
+    report_before = db.get_daily_report(30)
+
+    archive = tmp_db / "archive"
+    moved = run_retention([RetentionPolicy("quakes", "time_ms", 90),
+                           RetentionPolicy("alerts", "created_ms", 365)],
+                          now_ms=NOW, archive_dir=archive, batch=1)
+
+    assert moved == {"quakes": 2, "alerts": 1}
+    assert [q["id"] for q in db.list_recent_quakes(10)] == ["new1"]
+    assert [a["quake_id"] for a in db.list_recent_alerts()] == ["new1"]
+
+    [qfile] = archive.glob("quakes-*.ndjson.gz")
+    with gzip.open(qfile, "rt") as fh:
+        assert sorted(json.loads(line)["id"] for line in fh) == ["old1", "old2"]
+    assert len(list(archive.glob("alerts-*.ndjson.gz"))) == 1
+
+    # the archived day is still reported, from the rollup
+    assert db.get_daily_report(30) == report_before
+
+def test_new_databases_use_incremental_auto_vacuum(tmp_db):
+    conn = db.get_conn()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.close()
+
+def test_existing_databases_switch_auto_vacuum_only_on_request(tmp_path, monkeypatch):
+    import sqlite3
+    from app.retention import enable_incremental_vacuum
+
+    path = tmp_path / "old.db"
+    sqlite3.connect(path).execute("CREATE TABLE legacy (x)").connection.close()  # a file that predates auto_vacuum
+    monkeypatch.setattr(db, "DB_PATH", path.as_posix())
+    db.init_db()  # no VACUUM at startup
+    conn = db.get_conn()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    conn.close()
+
+    assert enable_incremental_vacuum() is True
+    assert enable_incremental_vacuum() is False
+    conn = db.get_conn()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.close()
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from app import runtime
+from app.events import bus
+from app.main import events_stream
+from app.metrics import LOOP_LAG, THREADPOOL_TOKENS, STREAM_SUBSCRIBERS, STREAM_BYTES
+
+def _lag_sum():
+    return [s.value for s in LOOP_LAG.collect()[0].samples if s.name.endswith("_sum")][0]
+
+def test_probe_sees_a_blocked_loop_and_the_threadpool():
+    before = _lag_sum()
+
+    async def main():
+        task = runtime.start_probe(0.02)
+        await asyncio.sleep(0.03)
+        time.sleep(0.2)  # block the loop the way a sync call in an async route would
+        await asyncio.sleep(0.05)
+        await runtime.stop_probe(task)
+
+    asyncio.run(main())
+    assert _lag_sum() - before >= 0.1
+    assert THREADPOOL_TOKENS.labels("total")._value.get() >= 1
+
+def test_sse_stream_counts_subscribers_and_bytes():
+    bus.publish({"type": "TestEvent", "message": "hi"})
+    subs, pushed = STREAM_SUBSCRIBERS.labels("events"), STREAM_BYTES.labels("events")
+    before_subs, before_bytes = subs._value.get(), pushed._value.get()
+
+    async def main():
+        body = events_stream().body_iterator
+        chunk = await body.__anext__()
+        assert subs._value.get() == before_subs + 1
+        return chunk
+
+    chunk = asyncio.run(main())
+    assert chunk.startswith("data: ")
+    assert pushed._value.get() == before_bytes + len(chunk.encode())
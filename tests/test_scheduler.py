@@ -0,0 +1,61 @@
+import random
+from concurrent.futures import Executor
+
+from app.scheduler import FeedScheduler
+
+class Inline(Executor):
+    def submit(self, fn, *args):
+        fn(*args)
+
+class Deferred(Executor):
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        self.calls.append((fn, args))
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_feeds_adapt_their_interval():
+    clock = Clock()
+    results = {"all_hour": {"new": 0}, "all_week": {"new": 3, "max_mag": 6.1}}
+    sched = FeedScheduler(lambda feed: results[feed], {"all_hour": 30, "all_week": 3600},
+                          executor=Inline(), jitter=0, clock=clock, rng=random.Random(1))
+    clock.now += 10
+    assert sorted(sched.tick()) == ["all_hour", "all_week"]
+    assert sched.feeds["all_hour"].interval_s == 45       # unchanged -> slower
+    assert sched.feeds["all_week"].interval_s == 1800     # big quake -> faster
+
+    for _ in range(20):
+        clock.now += 10_000
+        sched.tick()
+    assert sched.feeds["all_hour"].interval_s == 240      # capped at 8x base
+    assert sched.feeds["all_week"].interval_s == 900      # floored at base/4
+
+    results["all_hour"] = {"new": 2, "max_mag": 1.0}
+    clock.now += 10_000
+    sched.tick()
+    assert sched.feeds["all_hour"].interval_s == 30       # ordinary change -> back to base
+
+def test_errors_back_off_and_running_feeds_are_not_restarted():
+    clock = Clock()
+    ex = Deferred()
+
+    def boom(feed):
+        raise RuntimeError("USGS down")
+
+    sched = FeedScheduler(boom, {"all_hour": 30}, executor=ex, jitter=0, clock=clock)
+    clock.now += 10
+    assert sched.tick() == ["all_hour"]
+    clock.now += 100
+    assert sched.tick() == []                             # previous poll still in flight
+
+    fn, args = ex.calls.pop()
+    fn(*args)
+    assert sched.feeds["all_hour"].interval_s == 45
+    assert sched.feeds["all_hour"].next_run == clock.now + 45
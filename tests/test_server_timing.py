@@ -0,0 +1,31 @@
+import re
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import HTTP_REQUEST_SECONDS
+
+client = TestClient(app)
+
+def _entries(response):
+    return {m.group(1): float(m.group(2)) for m in re.finditer(r"(\w+);dur=([\d.]+)", response.headers["Server-Timing"])}
+
+def test_home_page_breaks_down_db_and_template_time(tmp_db):
+    r = client.get("/")
+    assert r.status_code == 200
+    timing = _entries(r)
+    assert {"db", "template", "total"} <= set(timing)
+    assert timing["total"] >= timing["db"]
+    assert re.search(r'db;dur=[\d.]+;desc="\d+ queries"', r.headers["Server-Timing"])
+
+def test_json_routes_report_serialization_and_feed_the_route_histogram(tmp_db):
+    def count():
+        for s in HTTP_REQUEST_SECONDS.collect()[0].samples:
+            if s.name.endswith("_count") and s.labels == {"method": "GET", "route": "/ingest/jobs/{job_id}", "status": "4xx"}:
+                return s.value
+        return 0.0
+
+    before = count()
+    assert "serialization" in _entries(client.get("/rules"))
+    assert client.get("/ingest/jobs/nope").status_code == 404
+    assert count() == before + 1
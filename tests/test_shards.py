@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from app import db, shards
+from app.retention import DAY_MS, RetentionPolicy, run_retention
+from app.writer import DbWriter
+
+JAN = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+
+def _quake(qid, time_ms, mag=3.0):
+    return {"id": qid, "time_ms": time_ms, "mag": mag, "place": "Test",
+            "lon": -120.0, "lat": 35.0, "depth_km": 5.0}
+
+@pytest.fixture
+def sharded(tmp_db, monkeypatch):
+    monkeypatch.setattr(shards, "STORAGE_MODE", "sharded")
+    monkeypatch.setattr(shards, "SHARD_DIR", tmp_db / "shards")
+    return tmp_db / "shards"
+
+def test_writes_route_to_monthly_shards(sharded):
+    rows = [_quake(f"m{m}", JAN + m * 31 * DAY_MS) for m in range(12)]
+    w = DbWriter()
+    assert w.submit_quakes(rows).result(timeout=5) == 12
+    assert w.submit_quakes(rows[:3]).result(timeout=5) == 0
+    w.stop()
+
+    assert len(shards.existing_months()) == 12
+    assert [q["id"] for q in db.list_recent_quakes(3)] == ["m11", "m10", "m9"]
+    assert len(db.list_recent_quakes(100)) == 12  # more shards than one ATTACH round
+    assert [q["id"] for q in db.list_quakes_since(JAN + 10 * 31 * DAY_MS)] == ["m11", "m10"]
+    assert len(db.get_daily_report(30)) == 12
+
+def test_range_queries_only_touch_overlapping_shards(sharded):
+    db.bulk_upsert_quakes([_quake("a", JAN), _quake("b", JAN + 40 * DAY_MS), _quake("c", JAN + 70 * DAY_MS)])
+    assert shards.months_in_range(JAN + 40 * DAY_MS) == ["2024-03", "2024-02"]
+
+def test_old_shards_freeze_and_age_out(sharded):
+    db.bulk_upsert_quakes([_quake("old", JAN, 4.0), _quake("new", JAN + 200 * DAY_MS, 2.0)])
+    now = JAN + 200 * DAY_MS
+
+    assert shards.freeze_old_shards(now) == ["2024-01"]
+    assert shards.is_frozen("2024-01") and not shards.is_frozen("2024-07")
+    assert [q["id"] for q in db.list_quakes_since(0)] == ["new", "old"]  # immutable read
+
+    report = db.get_daily_report(30)
+    moved = run_retention([RetentionPolicy("quakes", "time_ms", 90)], now_ms=now,
+                          archive_dir=sharded.parent / "archive")
+    assert moved == {"quakes": 1}
+    assert shards.existing_months() == ["2024-07"]
+    assert db.get_daily_report(30) == report
+
+def test_shards_freeze_while_the_global_writer_runs(sharded):
+    from app.writer import writer
+
+    writer.stop()  # restart on this test's database
+    try:
+        assert writer.submit_quakes([_quake("old", JAN, 4.0)]).result(timeout=5) == 1
+        moved = run_retention([RetentionPolicy("quakes", "time_ms", 90)], now_ms=JAN + 200 * DAY_MS,
+                              archive_dir=sharded.parent / "archive")
+        assert moved == {"quakes": 1} and shards.existing_months() == []
+    finally:
+        writer.stop()
+
+def test_freeze_reports_shards_still_attached_elsewhere(sharded):
+    db.bulk_upsert_quakes([_quake("old", JAN)])
+    holder = db.get_conn()
+    holder.isolation_level = None
+    shards.attach_for_write(holder, ["2024-01"])
+    holder.execute("SELECT count(*) FROM q_2024_01.quakes").fetchone()
+    skipped = []
+    assert shards.freeze_old_shards(JAN + 200 * DAY_MS, skipped) == []
+    assert skipped == ["2024-01"] and not shards.is_frozen("2024-01")
+
+    assert shards.detach_freeze_due(holder, JAN + 200 * DAY_MS) == ["2024-01"]
+    holder.close()
+    assert shards.freeze_old_shards(JAN + 200 * DAY_MS) == ["2024-01"]
+
+def test_shard_archive_resumes_without_double_counting(sharded, monkeypatch):
+    from app import retention
+
+    db.bulk_upsert_quakes([_quake(f"q{i}", JAN + i * 3_600_000, 3.0) for i in range(10)])
+    now = JAN + 200 * DAY_MS
+    report = db.get_daily_report(30)
+    archive = sharded.parent / "archive"
+    policy = [RetentionPolicy("quakes", "time_ms", 90)]
+
+    real_append, calls = retention._append_archive, []
+    def crash_on_third(*args):
+        calls.append(1)
+        if len(calls) == 3:
+            raise OSError("disk full")
+        real_append(*args)
+    monkeypatch.setattr(retention, "_append_archive", crash_on_third)
+    with pytest.raises(OSError):
+        run_retention(policy, now_ms=now, archive_dir=archive, batch=3)
+    assert shards.existing_months() == ["2024-01"]
+
+    monkeypatch.setattr(retention, "_append_archive", real_append)
+    assert run_retention(policy, now_ms=now, archive_dir=archive, batch=3) == {"quakes": 10}
+    assert shards.existing_months() == []
+    assert db.get_daily_report(30) == report
+
+def test_bulk_load_reports_rows_for_frozen_months(sharded):
+    from app.bulk_load import bulk_load
+
+    db.bulk_upsert_quakes([_quake("jan", JAN)])
+    shards.freeze_old_shards(JAN + 200 * DAY_MS)
+    feats = [{"type": "Feature", "id": f"g{i}", "properties": {"time": JAN + i * DAY_MS, "mag": 2.0, "place": "g"},
+              "geometry": {"type": "Point", "coordinates": [1.0, 2.0, 3.0]}} for i in range(40)]
+    export = sharded.parent / "old.geojson"
+    export.write_text(json.dumps({"type": "FeatureCollection", "features": feats}))
+
+    stats = bulk_load([str(export)], sharded.parent / "ckpt.json", workers=0)
+    assert stats["skipped_frozen"] == 31  # January; the rest lands in a new February shard
+    assert stats["rows"] == 9 and stats["inserted"] == 9
+    assert len(db.list_quakes_since(0)) == 10
+
+def test_split_leaves_rows_of_frozen_months_in_the_main_db(sharded):
+    db.bulk_upsert_quakes([_quake("jan", JAN)])
+    shards.freeze_old_shards(JAN + 200 * DAY_MS)
+    conn = db.get_conn()
+    conn.executemany("INSERT INTO main.quakes(id, time_ms, mag, place, lon, lat, depth_km) VALUES (?,?,?,?,?,?,?)",
+                     [(f"s{i}", JAN + i * DAY_MS, 2.0, "s", 1.0, 2.0, 3.0) for i in range(40)])
+    conn.commit()
+
+    stats = {}
+    assert shards.split_main_db(conn, db._write_quake_rows, batch=3, stats=stats) == 9
+    assert stats["skipped_frozen"] == 31
+    left = [r[0] for r in conn.execute("SELECT id FROM main.quakes ORDER BY time_ms")]
+    assert left == [f"s{i}" for i in range(31)]
+    conn.close()
+    assert len(db.list_quakes_since(JAN + 31 * DAY_MS)) == 9
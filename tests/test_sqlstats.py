@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+
+from app import db, sqlstats
+from app.main import app
+from app.metrics import SQL_STATEMENT_SECONDS
+
+def _count(template):
+    for m in SQL_STATEMENT_SECONDS.collect():
+        for s in m.samples:
+            if s.name.endswith("_count") and s.labels == {"statement": template}:
+                return s.value
+    return 0.0
+
+def test_normalize_folds_literals_params_and_shards():
+    assert sqlstats.normalize_sql("SELECT *  FROM q_2024_01.quakes\n WHERE mag >= 4.5 AND place = 'it''s'") == \
+        "SELECT * FROM q_?.quakes WHERE mag >= ? AND place = ?"
+    assert sqlstats.normalize_sql("DELETE FROM alerts WHERE id IN (?, ?, ?) AND rule_id = :rid") == \
+        "DELETE FROM alerts WHERE id IN (?, ...) AND rule_id = ?"
+
+def test_statements_are_timed_only_while_enabled(tmp_db, monkeypatch):
+    monkeypatch.setattr(sqlstats.stats, "enabled", False)
+    monkeypatch.setattr(sqlstats.stats, "slow_s", 10.0)
+    template = "SELECT id FROM rules WHERE min_mag > ?"
+    conn = db.get_conn()
+    before = _count(template)
+    conn.execute("SELECT id FROM rules WHERE min_mag > 1").fetchall()
+    assert _count(template) == before
+
+    sqlstats.configure(enabled=True, slow_ms=0)
+    conn.execute("SELECT id FROM rules WHERE min_mag > 1").fetchall()
+    conn.cursor().execute("SELECT id FROM rules WHERE min_mag > ?", (2,)).fetchall()
+    conn.close()
+    assert _count(template) == before + 2
+    slow = sqlstats.status()["slow"][-1]
+    assert slow["statement"] == template and slow["plan"]
+
+def test_debug_sql_needs_the_admin_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.delenv("QUAKE_HUB_ADMIN_TOKEN", raising=False)
+    assert client.get("/debug/sql").status_code == 404
+    monkeypatch.setenv("QUAKE_HUB_ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(sqlstats.stats, "enabled", False)
+    assert client.post("/debug/sql?enabled=true").status_code == 403
+    for wrong in ("s3cre", "s3cret!", "S3CRET"):
+        assert client.get("/debug/sql", headers={"X-Admin-Token": wrong}).status_code == 403
+    r = client.post("/debug/sql?enabled=true&slow_ms=250", headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200 and r.json()["enabled"] is True and r.json()["slow_ms"] == 250
+    assert sqlstats.stats.enabled
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from app import db, tracing
+from app.pipeline import IngestPipeline
+from app.writer import DbWriter
+
+BODY = json.dumps({"type": "FeatureCollection", "features": [
+    {"type": "Feature", "id": "t1", "properties": {"time": 1700000000000, "mag": 5.0, "place": "Here"},
+     "geometry": {"type": "Point", "coordinates": [-120.0, 35.0, 5.0]}},
+]}).encode()
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.ndjson"
+    tracing.configure(str(path), ratio=1.0)
+    yield path
+    tracing.configure(None)
+
+def _spans(path):
+    tracing.flush()
+    out = []
+    for line in path.read_text().splitlines():
+        for rs in json.loads(line)["resourceSpans"]:
+            for ss in rs["scopeSpans"]:
+                out.extend(ss["spans"])
+    return out
+
+def test_ingest_spans_nest_across_threads(tmp_db, trace_file):
+    db.create_rule("M4+", 4.0, None)
+    w = DbWriter()
+    with tracing.span("test.root"):
+        IngestPipeline("all_hour", source=[BODY], writer=w).run()
+    w.stop()
+    spans = _spans(trace_file)
+    by_id = {s["spanId"]: s for s in spans}
+    by_name = {s["name"]: s for s in spans}
+    assert len({s["traceId"] for s in spans}) == 1
+
+    pipeline = by_name["ingest.pipeline"]
+    assert pipeline["parentSpanId"] == by_name["test.root"]["spanId"]
+    assert by_name["ingest.stage.store"]["parentSpanId"] == pipeline["spanId"]
+    # writes run on the writer thread but belong to the stage that submitted them
+    inserts = [s for s in spans if s["name"] == "sqlite.executemany"
+               and "INSERT OR IGNORE INTO quakes" in json.dumps(s["attributes"])]
+    assert inserts and by_id[inserts[0]["parentSpanId"]]["name"] == "ingest.stage.store"
+    publish = by_name["events.publish"]
+    assert by_id[publish["parentSpanId"]]["name"] == "ingest.stage.publish"
+    attrs = {a["key"]: a["value"] for a in pipeline["attributes"]}
+    assert attrs["new"] == {"intValue": "1"}
+
+def test_unsampled_traces_record_nothing(tmp_path):
+    path = tmp_path / "traces.ndjson"
+    tracing.configure(str(path), ratio=0.0)
+    try:
+        with tracing.span("root") as sp:
+            assert sp is None and not tracing.active()
+            with tracing.span("child") as child:
+                assert child is None
+        tracing.flush()
+        assert not path.exists()
+    finally:
+        tracing.configure(None)
+
+def test_export_file_rotates(tmp_path):
+    path = tmp_path / "traces.ndjson"
+    tracing.configure(str(path), ratio=1.0, max_mb=0.001, backups=2)
+    try:
+        for i in range(40):
+            with tracing.span("s", i=i, pad="x" * 200):
+                pass
+            tracing.flush()
+        assert path.exists() and (tmp_path / "traces.ndjson.1").exists() and (tmp_path / "traces.ndjson.2").exists()
+        assert not (tmp_path / "traces.ndjson.3").exists()
+    finally:
+        tracing.configure(None)
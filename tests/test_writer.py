@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from app import db
+from app.rules import Rule
+from app.writer import DbWriter
+
+def _quake(i):
+    return {"id": f"t{i}", "time_ms": 1700000000000 + i, "mag": 1.0 + i / 10,
+            "place": "Test", "lon": -120.0, "lat": 35.0, "depth_km": 5.0}
+
+def test_concurrent_batches_are_group_committed(tmp_db):
+    w = DbWriter(max_latency_ms=200)
+    futures = []
+    lock = threading.Lock()
+
+    def ingest(n):
+        fut = w.submit_quakes([_quake(n * 10 + k) for k in range(10)])
+        with lock:
+            futures.append(fut)
+
+    threads = [threading.Thread(target=ingest, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(f.result(timeout=5) for f in futures) == [10] * 8
+    assert w.commits < 8
+    w.stop()
+    assert len(db.list_recent_quakes(limit=1000)) == 80
+
+def test_failed_batch_does_not_roll_back_neighbours(tmp_db):
+    w = DbWriter(max_latency_ms=200)
+    ok = w.submit_quakes([_quake(1)])
+    bad = w.submit(lambda conn: conn.execute("INSERT INTO nope VALUES (1)"))
+    rule = Rule(id=db.create_rule("any", 0.0, None), name="any", min_mag=0.0)
+    alerts = w.submit_alerts([db.alert_snapshot(_quake(1), rule, 1),
+                              db.alert_snapshot(_quake(1), rule, 2)])
+
+    assert ok.result(timeout=5) == 1
+    with pytest.raises(Exception):
+        bad.result(timeout=5)
+    inserted = alerts.result(timeout=5)
+    assert [a["created_ms"] for a in inserted] == [1]
+    w.stop()